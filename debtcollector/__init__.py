@@ -13,9 +13,22 @@
 from __future__ import annotations
 
 import importlib.metadata
+import os
 import warnings
 
 from debtcollector import _utils
+from debtcollector import eventlog as _eventlog
+from debtcollector import policy as _policy
+
+# Structured (lazily formatted) warning categories, pass one of these as the
+# category of a deprecation to have warnings carrying the details of what
+# was deprecated (as fields) be emitted.
+DebtCollectorWarning = _utils.DebtCollectorWarning
+DebtCollectorDeprecationWarning = _utils.DebtCollectorDeprecationWarning
+DebtCollectorPendingDeprecationWarning = (
+    _utils.DebtCollectorPendingDeprecationWarning
+)
+DebtCollectorFutureWarning = _utils.DebtCollectorFutureWarning
 
 
 def __getattr__(name: str) -> str:
@@ -39,6 +52,7 @@ def deprecate(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] = DeprecationWarning,
+    deprecation_id: str | None = None,
 ) -> None:
     """Helper to deprecate some thing using generated message format.
 
@@ -56,13 +70,42 @@ def deprecate(
                        to locate where the users code is in the
                        :func:`warnings.warn` call
     :param category: the :mod:`warnings` category to use, defaults to
-                     :py:class:`DeprecationWarning` if not provided
+                     :py:class:`DeprecationWarning` if not provided (when
+                     a :class:`.DebtCollectorWarning` is used its message
+                     is only generated when needed)
+    :param deprecation_id: stable identifier of the deprecated thing (used
+                           to look up any :mod:`debtcollector.policy`
+                           configured for it); when not provided no policy
+                           is applied
     """
-    out_message = _utils.generate_message(
+    out_message = _utils.make_message(
         prefix,
         postfix=postfix,
         version=version,
         message=message,
         removal_version=removal_version,
+        category=category,
+        deprecation_id=deprecation_id,
+    )
+    _utils.deprecation(
+        out_message,
+        stacklevel=stacklevel,
+        category=category,
+        deprecation_id=deprecation_id,
     )
-    _utils.deprecation(out_message, stacklevel=stacklevel, category=category)
+
+
+_policy._load_from_environment()
+_eventlog._load_from_environment()
+if os.environ.get('DEBTCOLLECTOR_AUDIT'):
+    from debtcollector import attribution as _attribution
+
+    _attribution._load_from_environment()
+if os.environ.get('DEBTCOLLECTOR_SHARED_COUNTS') or os.environ.get(
+    'DEBTCOLLECTOR_SHARED_ONCE'
+):
+    # Only imported when needed so that running its reader (with ``python
+    # -m debtcollector.shared``) does not import it twice.
+    from debtcollector import shared as _shared
+
+    _shared._load_from_environment()
@@ -15,22 +15,584 @@
 from __future__ import annotations
 
 import builtins
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+import copy
 import functools
+import heapq
+import importlib.metadata
 import inspect
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import traceback
 import types
 from typing import Any
 import warnings
+import weakref
+
+LOG = logging.getLogger(__name__)
 
 # See https://docs.python.org/3/library/builtins.html
 _BUILTIN_MODULES = ('builtins', 'exceptions')
 _enabled = True
 
+# Policy actions (see :mod:`debtcollector.policy`).
+IGNORE = 'ignore'
+ONCE = 'once'
+ALWAYS = 'always'
+ERROR = 'error'
+SAMPLE = 'sample'
+
+# Deprecation id (or dotted name prefix) -> (action, sample rate); this is
+# managed by the :mod:`debtcollector.policy` module (which replaces it, and
+# the resolved policies, as a whole whenever the policies change).
+_policies: dict[str, tuple[str, int]] = {}
+# Deprecation id -> resolved policy (or none); cleared when the policies
+# change so that resolving the policy of a deprecation is only done once.
+_resolved_policies: dict[str, tuple[str, int] | None] = {}
+# Lookup function of the policy file loaded (if any), consulted when none of
+# the above policies apply.
+_compiled_policy: Callable[[str], tuple[str, int] | None] | None = None
+# Whether any of the above has anything in it (or any deprecation is overdue).
+_policy_active = False
+
+# How deprecations that are overdue for removal (when compared to the
+# installed version of the distribution they are in) are handled; one of
+# none (not checked), 'log' or 'error'.
+_removal_enforcement: str | None = None
+# Deprecation id -> counter of hits (for the 'once' and 'sample' actions);
+# taking the next number of a counter is a single (C level) call so threads
+# never take the same one, which (unlike incrementing a number in a dict)
+# makes sure only one of many concurrent first hits is the first.
+_policy_hits: dict[str, Iterator[int]] = {}
+# Tells if a deprecation is hit for the first time on this host (when once
+# per host warnings are enabled, see :mod:`debtcollector.shared`).
+_host_once: Callable[[str], bool] | None = None
+
+# Name of the audit event (see :func:`sys.audit`) raised for every hit of a
+# deprecation (that has an identifier), with the identifier, the code object
+# of the caller and the line of the caller as arguments, when enabled (see
+# :func:`debtcollector.attribution.enable_audit`).
+AUDIT_EVENT = 'debtcollector.deprecation'
+_audit = False
+
+# Callables told about every hit of a deprecation (that has an identifier)
+# along with the frame of its caller (swapped as a whole when changed).
+_observers: tuple[Callable[[str, types.FrameType], None], ...] = ()
+# Where hits are attributed to their callers and where sampled stacks of
+# hits are kept (when enabled, see :mod:`debtcollector.attribution`).
+_attribution: CallerCounts | None = None
+_stack_samples: StackSamples | None = None
+# Told about every hit of a deprecation (that has an identifier) along with
+# the frame of its caller and the message, when a tracing integration is
+# enabled (see :mod:`debtcollector.tracing`).
+_tracing: Callable[[str, types.FrameType, str | Warning], None] | None = None
+# Told about every hit of any deprecation (with its identifier, if any, the
+# frame of its caller, if found, the message and the category) before any
+# policy is applied; each returns whether the hit should not be passed to the
+# warnings module (see :mod:`debtcollector.fixtures.recording`).
+_recorders: tuple[
+    Callable[
+        [str | None, types.FrameType | None, str | Warning, type[Warning]],
+        bool,
+    ],
+    ...,
+] = ()
+
+
+def add_observer(observer: Callable[[str, types.FrameType], None]) -> None:
+    """Adds a callable told about hits (and the frame of their caller)."""
+    global _observers
+    _observers = _observers + (observer,)
+
+
+def remove_observer(
+    observer: Callable[[str, types.FrameType], None],
+) -> None:
+    """Removes a callable previously added by :func:`.add_observer`."""
+    global _observers
+    _observers = tuple(o for o in _observers if o != observer)
+
+
+def add_recorder(
+    recorder: Callable[
+        [str | None, types.FrameType | None, str | Warning, type[Warning]],
+        bool,
+    ],
+) -> None:
+    """Adds a callable told about every hit (before any policy applies)."""
+    global _recorders
+    _recorders = _recorders + (recorder,)
+
+
+def remove_recorder(
+    recorder: Callable[
+        [str | None, types.FrameType | None, str | Warning, type[Warning]],
+        bool,
+    ],
+) -> None:
+    """Removes a callable previously added by :func:`.add_recorder`."""
+    global _recorders
+    _recorders = tuple(r for r in _recorders if r != recorder)
+
+
+def register_at_fork(
+    before: Callable[[], None] | None = None,
+    after_in_child: Callable[[], None] | None = None,
+) -> None:
+    """Registers callables run around forks (where processes can fork).
+
+    Runtime state that is per process (counts, buffers, locks...) should
+    be written out ``before`` forking (if it must not be lost) and reset
+    ``after_in_child`` (so that children never report, write or wait on
+    what belongs to their parent).
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    kwargs: dict[str, Callable[[], None]] = {}
+    if before is not None:
+        kwargs['before'] = before
+    if after_in_child is not None:
+        kwargs['after_in_child'] = after_in_child
+    os.register_at_fork(**kwargs)
+
+
+def get_deprecation_id(kind: str, name: str) -> str:
+    """Generates the stable identifier of some kind of deprecated thing.
+
+    The identifier is of the form ``<kind>:<name>`` where the name is the
+    fully qualified (dotted) name of the deprecated thing, for example
+    ``function:mypackage.mymodule.MyClass.my_method``.
+    """
+    return f"{kind}:{name}"
+
+
+class Deprecation:
+    """Information about something that has been deprecated."""
+
+    __slots__ = ('id', 'kind', 'name', 'version', 'removal_version', 'overdue')
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        version: str | None = None,
+        removal_version: str | None = None,
+    ):
+        self.id = get_deprecation_id(kind, name)
+        self.kind = kind
+        self.name = name
+        self.version = version
+        self.removal_version = removal_version
+        self.overdue = False
+
+    def __repr__(self) -> str:
+        return f'<Deprecation {self.id!r}>'
+
+
+# Deprecation id -> deprecation (for all deprecations made so far).
+_deprecations: dict[str, Deprecation] = {}
+
+
+def register_deprecation(
+    kind: str,
+    name: str,
+    version: str | None = None,
+    removal_version: str | None = None,
+) -> str:
+    """Records information about a deprecation (returning its identifier).
+
+    This is expected to be called when something is deprecated (and not each
+    time that deprecated thing is used).
+    """
+    deprecation = Deprecation(
+        kind, name, version=version, removal_version=removal_version
+    )
+    _deprecations[deprecation.id] = deprecation
+    if _removal_enforcement is not None:
+        check_removal(deprecation)
+    return deprecation.id
+
+
+@functools.cache
+def _get_packages_distributions() -> dict[str, list[str]]:
+    return dict(importlib.metadata.packages_distributions())
+
+
+@functools.cache
+def get_installed_version(package: str) -> str | None:
+    """Gets the installed version of the distribution providing a package.
+
+    :param package: top-level package (or module) name
+    """
+    for distribution in _get_packages_distributions().get(package, []):
+        try:
+            return importlib.metadata.version(distribution)
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    return None
+
+
+_VERSION_RE = re.compile(r'v?(\d+(?:\.\d+)*)(.*)', re.IGNORECASE)
+_PRE_RELEASE_RE = re.compile(r'[.\-_]?(a|b|c|rc|alpha|beta|pre|preview|dev)')
+
+
+@functools.lru_cache(maxsize=256)
+def parse_version(version: str) -> tuple[tuple[int, ...], int] | None:
+    """Parses a version string into something that can be compared.
+
+    Only the release numbers (with trailing zeros dropped) and whether the
+    version is a pre-release (or development) version of that release are
+    kept; ``None`` is returned for versions that can not be parsed.
+    """
+    match = _VERSION_RE.match(version.strip())
+    if match is None:
+        return None
+    release = [int(part) for part in match.group(1).split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    final = 0 if _PRE_RELEASE_RE.match(match.group(2)) else 1
+    return (tuple(release), final)
+
+
+def check_removal(deprecation: Deprecation) -> None:
+    """Checks if a deprecation is overdue for removal (handling it if so).
+
+    The installed version of the distribution providing the top-level
+    package of the deprecated thing is compared to the removal version.
+    """
+    removal = deprecation.removal_version
+    if not removal or removal == '?':
+        return
+    package = deprecation.name.partition('.')[0]
+    installed = get_installed_version(package)
+    if installed is None:
+        return
+    removal_parsed = parse_version(removal)
+    installed_parsed = parse_version(installed)
+    if removal_parsed is None or installed_parsed is None:
+        return
+    if installed_parsed < removal_parsed:
+        return
+    if _removal_enforcement == ERROR:
+        global _policy_active
+        deprecation.overdue = True
+        _policy_active = True
+        _resolved_policies.pop(deprecation.id, None)
+    else:
+        LOG.warning(
+            "Deprecation '%s' was to be removed in version '%s' (but "
+            "version '%s' of its '%s' package is installed)",
+            deprecation.id,
+            removal,
+            installed,
+            package,
+        )
+
+
+def get_deprecated_name(deprecation_id: str) -> str:
+    """Gets the name of the deprecated thing from a deprecation identifier.
+
+    Note that for arguments (and their values) the name also includes the
+    argument (for example ``mypackage.mymodule.func(old_arg)``), the
+    dotted prefixes of such names are those of the function.
+    """
+    return deprecation_id.partition(':')[2]
+
+
+def resolve_policy(deprecation_id: str) -> tuple[str, int] | None:
+    """Finds (and caches) the policy that applies to some deprecation.
+
+    An exact match on the deprecation id is preferred, after which the
+    longest matching dotted prefix of the deprecated things name is used
+    (and then the policy file, if one was loaded); deprecations that are
+    overdue for removal are otherwise escalated to errors.
+    """
+    # The tables are replaced (not mutated) when the policies change, so
+    # grab them all up front to avoid caching a stale result in a new one;
+    # the cache first, as it is replaced last (see policy._replace).
+    resolved = _resolved_policies
+    compiled = _compiled_policy
+    policies = _policies
+    policy = policies.get(deprecation_id)
+    if policy is None:
+        name = get_deprecated_name(deprecation_id)
+        policy = policies.get(name)
+        name = name.partition('(')[0]
+        while policy is None and name:
+            policy = policies.get(name)
+            name = name.rpartition('.')[0]
+    if policy is None and compiled is not None:
+        policy = compiled(deprecation_id)
+    if policy is None:
+        deprecation = _deprecations.get(deprecation_id)
+        if deprecation is not None and deprecation.overdue:
+            policy = (ERROR, 1)
+    resolved[deprecation_id] = policy
+    return policy
+
+
+class InternalCallers:
+    """Tells if callers are inside of some package (caching the answer).
+
+    The answer is cached per code object of the caller, so that checking
+    a caller (that was seen before) costs a single dictionary lookup.
+    """
+
+    __slots__ = ('package', '_cache')
+
+    def __init__(self, package: str):
+        self.package = package
+        self._cache: dict[types.CodeType, bool] = {}
+
+    def is_internal(self, frame: types.FrameType) -> bool:
+        code = frame.f_code
+        internal = self._cache.get(code)
+        if internal is None:
+            module = frame.f_globals.get('__name__') or ''
+            internal = module == self.package or module.startswith(
+                self.package + '.'
+            )
+            self._cache[code] = internal
+        return internal
+
+
+def get_internal_callers(package: str | None) -> InternalCallers | None:
+    """Gets what should be passed to :func:`.deprecation` for a package."""
+    if not package:
+        return None
+    return InternalCallers(package)
+
+
+class CallerCounts:
+    """Bounded counts of deprecation hits per calling location.
+
+    Locations are keyed by ``(deprecation id, code object, line)``; the name
+    of the calling module and function is resolved (and kept) when a location
+    is first seen so that counting further hits is a dictionary lookup and an
+    increment. At most ``capacity`` locations are tracked; when full the
+    least counted location is replaced by the new one (which inherits its
+    count, as the space-saving algorithm does) so that the most frequent
+    callers are kept, with the inherited count kept as the error bound.
+
+    The least counted location is found using a min-heap of the locations
+    by count, which counting does not update (so that it stays a dictionary
+    lookup and an increment): entries whose count went up since they were
+    pushed are pushed again (with their current count) when found at the
+    top while evicting, so evicting costs logarithmic time (amortized).
+
+    Each thread counts in its own shard (so threads never contend on, or
+    lose each other's increments of, the same counts); shards are merged
+    when a snapshot is taken and the shards of threads that are gone are
+    folded into one (so at most ``capacity`` locations are tracked per live
+    thread, plus once more for all the threads that are gone).
+    """
+
+    __slots__ = ('capacity', '_local', '_lock', '_shards', '_retired')
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(
+                f"Capacity must be greater than zero (not {capacity})"
+            )
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self) -> None:
+        """Forgets all the locations (and their counts)."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (thread, location -> [count, error, module name, function name])
+        self._shards: list[
+            tuple[weakref.ref[threading.Thread], dict[Any, list[Any]]]
+        ] = []
+        # Locations counted by threads that are gone.
+        self._retired: dict[Any, list[Any]] = {}
+
+    def _add_shard(self) -> dict[Any, list[Any]]:
+        entries: dict[Any, list[Any]] = {}
+        with self._lock:
+            self._retire()
+            self._shards.append(
+                (weakref.ref(threading.current_thread()), entries)
+            )
+        # (count when pushed, tie breaker, location) of each location.
+        self._local.heap = []
+        self._local.pushes = itertools.count()
+        self._local.entries = entries
+        return entries
+
+    def _retire(self) -> None:
+        # Folds the shards of threads that are gone (with our lock held).
+        live = []
+        for shard in self._shards:
+            thread = shard[0]()
+            if thread is not None and thread.is_alive():
+                live.append(shard)
+            else:
+                self._merge(self._retired, shard[1])
+        if len(live) == len(self._shards):
+            return
+        self._shards = live
+        retired = self._retired
+        if len(retired) > self.capacity:
+            kept = sorted(
+                retired.items(), key=lambda item: item[1][0], reverse=True
+            )
+            self._retired = dict(kept[: self.capacity])
+
+    @staticmethod
+    def _merge(
+        merged: dict[Any, list[Any]], entries: dict[Any, list[Any]]
+    ) -> None:
+        for key, entry in list(entries.items()):
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = list(entry)
+            else:
+                existing[0] += entry[0]
+                existing[1] += entry[1]
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        try:
+            entries = self._local.entries
+        except AttributeError:
+            entries = self._add_shard()
+        code = frame.f_code
+        key = (deprecation_id, code, frame.f_lineno)
+        entry = entries.get(key)
+        if entry is not None:
+            entry[0] += 1
+            return
+        local = self._local
+        heap = local.heap
+        pushes = local.pushes
+        error = 0
+        if len(entries) >= self.capacity:
+            while True:
+                count, _push, victim = heap[0]
+                victim_count = entries[victim][0]
+                if victim_count == count:
+                    heapq.heappop(heap)
+                    break
+                # Counted since it was pushed (so it may not be the least).
+                heapq.heapreplace(heap, (victim_count, next(pushes), victim))
+            del entries[victim]
+            error = count
+        entries[key] = [
+            error + 1,
+            error,
+            frame.f_globals.get('__name__') or '?',
+            getattr(code, 'co_qualname', code.co_name),
+        ]
+        heapq.heappush(heap, (error + 1, next(pushes), key))
+
+    def snapshot(self) -> list[tuple[str, str, str, int, int, int]]:
+        """Gets ``(id, module, function, line, count, error)`` tuples."""
+        merged: dict[Any, list[Any]] = {}
+        with self._lock:
+            self._retire()
+            self._merge(merged, self._retired)
+            for _thread, entries in self._shards:
+                self._merge(merged, entries)
+        return [
+            (deprecation_id, module, function, line, count, error)
+            for (deprecation_id, _code, line), (
+                count,
+                error,
+                module,
+                function,
+            ) in merged.items()
+        ]
+
+
+class StackSamples:
+    """Bounded samples of the call stacks that hit deprecations.
+
+    The stack (up to ``depth`` frames, starting at the caller) is captured
+    for the first ``first`` hits of each deprecation and after that for
+    every ``every`` hits only. Identical stacks are counted (and not kept
+    again) and at most ``limit`` distinct stacks are kept per deprecation.
+    Frame summaries are cached by ``(code object, line)`` so that stacks
+    sharing frames share their summaries (and so that summaries are only
+    made once).
+    """
+
+    __slots__ = ('depth', 'first', 'every', 'limit', '_hits', '_stacks')
+
+    def __init__(self, depth: int, first: int, every: int, limit: int):
+        for name, value in (('depth', depth), ('every', every)):
+            if value < 1:
+                raise ValueError(
+                    f"The {name} must be greater than zero (not {value})"
+                )
+        self.depth = depth
+        self.first = first
+        self.every = every
+        self.limit = limit
+        # Deprecation id -> hits
+        self._hits: dict[str, int] = {}
+        # Deprecation id -> stack -> [count, frame summaries]
+        self._stacks: dict[
+            str,
+            dict[tuple[tuple[types.CodeType, int], ...], list[Any]],
+        ] = {}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _summarize(code: types.CodeType, line: int) -> traceback.FrameSummary:
+        return traceback.FrameSummary(
+            code.co_filename, line, code.co_name, lookup_line=False
+        )
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        hits = self._hits.get(deprecation_id, 0)
+        self._hits[deprecation_id] = hits + 1
+        if hits >= self.first and (hits - self.first + 1) % self.every:
+            return
+        key: list[tuple[types.CodeType, int]] = []
+        current: types.FrameType | None = frame
+        while current is not None and len(key) < self.depth:
+            key.append((current.f_code, current.f_lineno))
+            current = current.f_back
+        stack = tuple(key)
+        stacks = self._stacks.setdefault(deprecation_id, {})
+        entry = stacks.get(stack)
+        if entry is not None:
+            entry[0] += 1
+        elif len(stacks) < self.limit:
+            summaries = tuple(self._summarize(*item) for item in stack)
+            stacks[stack] = [1, summaries]
+
+    def get_hits(self, deprecation_id: str) -> int:
+        """Gets how many hits a deprecation has had (sampled or not)."""
+        return self._hits.get(deprecation_id, 0)
+
+    def clear(self) -> None:
+        """Forgets all the hits (and the stacks sampled)."""
+        self._hits = {}
+        self._stacks = {}
+
+    def snapshot(
+        self,
+    ) -> list[tuple[str, tuple[traceback.FrameSummary, ...], int]]:
+        """Gets ``(id, frame summaries, count)`` tuples."""
+        return [
+            (deprecation_id, summaries, count)
+            for deprecation_id, stacks in list(self._stacks.items())
+            for count, summaries in list(stacks.values())
+        ]
+
 
 def deprecation(
-    message: str,
+    message: str | Warning,
     stacklevel: int | None = None,
     category: type[Warning] | None = None,
+    deprecation_id: str | None = None,
+    internal_callers: InternalCallers | None = None,
 ) -> None:
     """Warns about some type of deprecation that has been (or will be) made.
 
@@ -47,11 +609,103 @@ def deprecation(
     existing users of those functions, methods, code; which a library should
     avoid doing by always giving at *least* N + 1 release for users to address
     the deprecation warnings).
+
+    When a ``deprecation_id`` is provided (see :func:`.get_deprecation_id`)
+    the policy (if any) configured for it is applied before the
+    :mod:`warnings` module is invoked (which is skipped when once per host
+    warnings are enabled and another process already warned about it).
+
+    The message may also be a warning (see :func:`.make_message`), in which
+    case the category is the one of that warning.
+
+    When ``internal_callers`` is provided (see :func:`.get_internal_callers`)
+    nothing is done when the caller (found using the ``stacklevel``) is
+    inside the package the deprecated thing belongs to. Otherwise, when a
+    ``deprecation_id`` is provided, the ``debtcollector.deprecation`` audit
+    event is raised (see :func:`sys.audit`, when enabled), observers (see
+    :func:`.add_observer`) are told about the hit and that caller and so is
+    the tracing integration (if any); the caller is only looked up when
+    any of those (or ``internal_callers``) needs it. Recorders (if any, see
+    :mod:`debtcollector.fixtures.recording`) are told about every hit
+    (before any policy is applied).
     """
     if not _enabled:
         return None
+    if internal_callers is not None or (
+        deprecation_id is not None
+        and (_audit or _observers or _tracing is not None)
+    ):
+        try:
+            # Our frame is at the first stack level (like it is for the
+            # warnings module) hence the minus one (and no stacklevel is
+            # the first one, like it is for the warnings module too).
+            frame = sys._getframe(stacklevel - 1 if stacklevel else 0)
+        except ValueError:
+            pass
+        else:
+            if internal_callers is not None and internal_callers.is_internal(
+                frame
+            ):
+                return None
+            if deprecation_id is not None:
+                if _audit:
+                    sys.audit(
+                        AUDIT_EVENT,
+                        deprecation_id,
+                        frame.f_code,
+                        frame.f_lineno,
+                    )
+                for observer in _observers:
+                    observer(deprecation_id, frame)
+                if _tracing is not None:
+                    _tracing(deprecation_id, frame, message)
     if category is None:
         category = DeprecationWarning
+    quiet = False
+    if _recorders:
+        try:
+            caller = sys._getframe(stacklevel - 1 if stacklevel else 0)
+        except ValueError:
+            caller = None
+        for recorder in _recorders:
+            if recorder(deprecation_id, caller, message, category):
+                quiet = True
+    if deprecation_id is not None and _policy_active:
+        try:
+            policy = _resolved_policies[deprecation_id]
+        except KeyError:
+            policy = resolve_policy(deprecation_id)
+        if policy is not None:
+            action, rate = policy
+            if action == IGNORE:
+                return None
+            if action == ERROR:
+                if isinstance(message, Warning):
+                    # The message may be shared (by every hit of a
+                    # deprecation), so raise a copy of it (that the traceback
+                    # and context of this hit end up on).
+                    raise copy.copy(message)
+                raise category(message)
+            if action != ALWAYS:
+                counter = _policy_hits.get(deprecation_id)
+                if counter is None:
+                    counter = _policy_hits.setdefault(
+                        deprecation_id, itertools.count()
+                    )
+                hits = next(counter)
+                if action == ONCE:
+                    if hits:
+                        return None
+                elif hits % rate:
+                    return None
+    if (
+        deprecation_id is not None
+        and _host_once is not None
+        and not _host_once(deprecation_id)
+    ):
+        return None
+    if quiet:
+        return None
     if stacklevel is None:
         warnings.warn(message, category=category)
     else:
@@ -60,6 +714,128 @@ def deprecation(
     return None
 
 
+def _after_fork_in_child() -> None:
+    # Hits (and stacks) are counted per process, so the child starts with
+    # none; the policy hits are kept as they tell what was already warned
+    # about (like the warnings registries the child inherits do).
+    if _attribution is not None:
+        _attribution.clear()
+    if _stack_samples is not None:
+        _stack_samples.clear()
+
+
+register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# The :mod:`sys.monitoring` namespace (python 3.12+) used to warn about the
+# first call of deprecated code objects (see :func:`.monitor_first_call`),
+# the tool id acquired from it (once needed) and what to warn with for each
+# code object being monitored (keyed by the identity of the code objects,
+# as distinct code objects can compare equal, and keeping them alive so that
+# identities are not reused).
+_monitoring: Any = getattr(sys, 'monitoring', None)
+_MONITORING_TOOL_IDS = (3, 4)
+_monitoring_tool_id: int | None = None
+_monitored: dict[
+    int,
+    tuple[
+        types.CodeType,
+        str | Warning,
+        int,
+        type[Warning] | None,
+        str | None,
+        InternalCallers | None,
+    ],
+] = {}
+
+
+def _on_monitored_start(code: types.CodeType, instruction_offset: int) -> Any:
+    try:
+        (
+            monitored_code,
+            message,
+            stacklevel,
+            category,
+            deprecation_id,
+            internal_callers,
+        ) = _monitored[id(code)]
+    except KeyError:
+        return _monitoring.DISABLE
+    if monitored_code is not code:
+        return _monitoring.DISABLE
+    if not _enabled:
+        # Keep watching, so that the call made after re-enabling warns.
+        return None
+    if internal_callers is not None:
+        try:
+            # Our frame is 0, the frame of the code being started is 1.
+            frame = sys._getframe(stacklevel - 1)
+        except ValueError:
+            pass
+        else:
+            if internal_callers.is_internal(frame):
+                return None
+    # One more level than usual, as this is called by the started code
+    # (instead of by a wrapper that calls the deprecated code).
+    deprecation(
+        message,
+        stacklevel=stacklevel + 1,
+        category=category,
+        deprecation_id=deprecation_id,
+    )
+    return _monitoring.DISABLE
+
+
+def _get_monitoring_tool_id() -> int | None:
+    global _monitoring_tool_id
+    if _monitoring_tool_id is None and _monitoring is not None:
+        for tool_id in _MONITORING_TOOL_IDS:
+            if _monitoring.get_tool(tool_id) is None:
+                _monitoring.use_tool_id(tool_id, 'debtcollector')
+                _monitoring.register_callback(
+                    tool_id,
+                    _monitoring.events.PY_START,
+                    _on_monitored_start,
+                )
+                _monitoring_tool_id = tool_id
+                break
+    return _monitoring_tool_id
+
+
+def monitor_first_call(
+    code: types.CodeType,
+    message: str | Warning,
+    stacklevel: int = 3,
+    category: type[Warning] | None = None,
+    deprecation_id: str | None = None,
+    internal_callers: InternalCallers | None = None,
+) -> bool:
+    """Warns about the first call of a code object (using sys.monitoring).
+
+    The ``PY_START`` event of the code object is watched (on python 3.12 or
+    newer) and disabled once the first (non-internal) call has been warned
+    about, after which calling that code costs nothing more than it did
+    before. Returns false when this is not possible (in which case the
+    caller is expected to fall back to wrapping the deprecated callable).
+    """
+    tool_id = _get_monitoring_tool_id()
+    if tool_id is None:
+        return False
+    _monitored[id(code)] = (
+        code,
+        message,
+        stacklevel,
+        category,
+        deprecation_id,
+        internal_callers,
+    )
+    events = _monitoring.get_local_events(tool_id, code)
+    _monitoring.set_local_events(
+        tool_id, code, events | _monitoring.events.PY_START
+    )
+    return True
+
+
 def get_qualified_name(
     obj: Callable[..., Any] | types.ModuleType | builtins.function,
 ) -> tuple[bool, str]:
@@ -70,6 +846,20 @@ def get_qualified_name(
         return (False, obj.__name__)
 
 
+def get_full_name(obj: Any) -> str:
+    """Gets the fully qualified (``<module>.<qualname>``) name of an object.
+
+    Class and static method objects are looked through (to the function
+    they wrap).
+    """
+    obj = getattr(obj, '__func__', obj)
+    _qualified, name = get_qualified_name(obj)
+    module = getattr(obj, '__module__', None)
+    if not module:
+        return name
+    return f'{module}.{name}'
+
+
 def generate_message(
     prefix: str,
     postfix: str | None = None,
@@ -97,6 +887,140 @@ def generate_message(
     return ''.join(message_components)
 
 
+class DebtCollectorWarning(Warning):
+    """Base of the (structured) warnings that debtcollector can emit.
+
+    These carry what was deprecated as fields (so that tools can filter and
+    aggregate warnings without parsing their text) and only generate their
+    text (see :func:`.generate_message`) when it is first asked for, so that
+    warnings that end up being ignored (for example by a policy) are never
+    formatted.
+
+    Pass one of the subclasses below as the ``category`` of a deprecation to
+    have these emitted.
+    """
+
+    def __init__(
+        self,
+        kind: str | None,
+        name: str | None,
+        prefix: str | Callable[[], str],
+        postfix: str | None = None,
+        message: str | None = None,
+        version: str | None = None,
+        removal_version: str | None = None,
+        replacement: str | None = None,
+    ):
+        super().__init__()
+        self.kind = kind
+        self.name = name
+        self.prefix = prefix
+        self.postfix = postfix
+        self.message = message
+        self.version = version
+        self.removal_version = removal_version
+        self.replacement = replacement
+        self._text: str | None = None
+
+    @property
+    def deprecation_id(self) -> str | None:
+        """The identifier of the deprecation (see :mod:`.policy`)."""
+        if self.kind is None or self.name is None:
+            return None
+        return get_deprecation_id(self.kind, self.name)
+
+    def __str__(self) -> str:
+        text = self._text
+        if text is None:
+            prefix = self.prefix
+            if not isinstance(prefix, str):
+                prefix = self.prefix = prefix()
+            text = self._text = generate_message(
+                prefix,
+                postfix=self.postfix,
+                message=self.message,
+                version=self.version,
+                removal_version=self.removal_version,
+            )
+        return text
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({str(self)!r})'
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (
+            type(self),
+            (self.kind, self.name, str(self)),
+            {
+                'prefix': str(self),
+                'postfix': None,
+                'message': None,
+                'version': self.version,
+                'removal_version': self.removal_version,
+                'replacement': self.replacement,
+                '_text': str(self),
+            },
+        )
+
+
+class DebtCollectorDeprecationWarning(
+    DebtCollectorWarning, DeprecationWarning
+):
+    """Structured :py:class:`DeprecationWarning`."""
+
+
+class DebtCollectorPendingDeprecationWarning(
+    DebtCollectorWarning, PendingDeprecationWarning
+):
+    """Structured :py:class:`PendingDeprecationWarning`."""
+
+
+class DebtCollectorFutureWarning(DebtCollectorWarning, FutureWarning):
+    """Structured :py:class:`FutureWarning`."""
+
+
+def make_message(
+    prefix: str | Callable[[], str],
+    postfix: str | None = None,
+    message: str | None = None,
+    version: str | None = None,
+    removal_version: str | None = None,
+    category: type[Warning] | None = None,
+    deprecation_id: str | None = None,
+    replacement: str | None = None,
+) -> str | DebtCollectorWarning:
+    """Makes what :func:`.deprecation` should be called with.
+
+    When the category is a :class:`.DebtCollectorWarning` a warning of that
+    category is made (and its text is only generated when needed, the prefix
+    may then be a callable that generates it); otherwise the message is
+    generated (using :func:`.generate_message`).
+    """
+    if category is not None and issubclass(category, DebtCollectorWarning):
+        kind = name = None
+        if deprecation_id is not None:
+            kind, _sep, name = deprecation_id.partition(':')
+        return category(
+            kind,
+            name,
+            prefix,
+            postfix=postfix,
+            message=message,
+            version=version,
+            removal_version=removal_version,
+            replacement=replacement,
+        )
+    if not isinstance(prefix, str):
+        prefix = prefix()
+    return generate_message(
+        prefix,
+        postfix=postfix,
+        message=message,
+        version=version,
+        removal_version=removal_version,
+    )
+
+
 def get_assigned(decorator: Any) -> tuple[str, ...]:
     """Helper to fix/workaround https://bugs.python.org/issue3445"""
     return functools.WRAPPER_ASSIGNMENTS
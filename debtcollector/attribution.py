@@ -0,0 +1,297 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Attribution of deprecation hits to the code that makes them.
+
+When enabled, every hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) is counted against the location that made it,
+that being the module, function and line found using the ``stacklevel`` of
+the deprecation (the same location the :mod:`warnings` module reports). This
+is done whatever happens to the warning afterwards (so hits of deprecations
+that are ignored by a policy, or by a warnings filter, are counted too).
+
+Memory use is bounded: at most ``capacity`` locations are tracked, and when
+that many are tracked the least counted location is replaced by a new one
+(so the most frequent callers are always kept, although the counts of
+locations that replaced others may be over-estimated by up to their
+``error``).
+
+When a single calling location does not tell enough (for example when the
+deprecated thing is used from deep inside a framework) the call stacks that
+hit deprecations can be sampled too (see :func:`.enable_stacks`); this keeps
+a bounded number of truncated stacks (the first ones, then one in every
+``every`` hits) per deprecation.
+
+Hits can also raise the ``debtcollector.deprecation`` audit event (see
+:func:`sys.audit` and :func:`.enable_audit`), for audit hooks to observe.
+That is off by default (or enabled by setting the ``DEBTCOLLECTOR_AUDIT``
+environment variable), so hits made while nothing observes them do not
+even look up their caller.
+"""
+
+from __future__ import annotations
+
+import os
+import traceback
+
+from debtcollector import _utils
+
+#: Environment variable that enables the audit event on import (when set).
+AUDIT_ENV = 'DEBTCOLLECTOR_AUDIT'
+
+#: Default maximum number of caller locations tracked.
+DEFAULT_CAPACITY = 1024
+
+#: Defaults of the stack sampling options (see :func:`.enable_stacks`).
+DEFAULT_STACK_DEPTH = 8
+DEFAULT_STACK_FIRST = 10
+DEFAULT_STACK_EVERY = 100
+DEFAULT_STACK_LIMIT = 32
+
+
+class Caller:
+    """Hits of a deprecation made by some calling location."""
+
+    __slots__ = (
+        'deprecation_id',
+        'module',
+        'function',
+        'line',
+        'count',
+        'error',
+    )
+
+    def __init__(
+        self,
+        deprecation_id: str,
+        module: str,
+        function: str,
+        line: int,
+        count: int,
+        error: int = 0,
+    ):
+        self.deprecation_id = deprecation_id
+        self.module = module
+        self.function = function
+        self.line = line
+        self.count = count
+        self.error = error
+
+    @property
+    def package(self) -> str:
+        """The top-level package of the calling module."""
+        return self.module.partition('.')[0]
+
+    def __repr__(self) -> str:
+        return (
+            f'<Caller {self.deprecation_id!r} from '
+            f'{self.module}:{self.function}:{self.line} '
+            f'(count={self.count}, error={self.error})>'
+        )
+
+
+class Stack:
+    """A (truncated) call stack that hit a deprecation.
+
+    The frames are :class:`traceback.FrameSummary` objects, innermost (the
+    caller of the deprecated thing) first.
+    """
+
+    __slots__ = ('deprecation_id', 'frames', 'count')
+
+    def __init__(
+        self,
+        deprecation_id: str,
+        frames: tuple[traceback.FrameSummary, ...],
+        count: int,
+    ):
+        self.deprecation_id = deprecation_id
+        self.frames = frames
+        self.count = count
+
+    def format(self) -> list[str]:
+        """Formats the stack (outermost frame first, like tracebacks)."""
+        return traceback.format_list(list(reversed(self.frames)))
+
+    def __repr__(self) -> str:
+        return (
+            f'<Stack {self.deprecation_id!r} ({len(self.frames)} frames, '
+            f'count={self.count})>'
+        )
+
+
+def enable(capacity: int = DEFAULT_CAPACITY) -> None:
+    """Starts attributing deprecation hits to their callers.
+
+    Any counts recorded so far are discarded.
+
+    :param capacity: maximum number of caller locations tracked
+    """
+    _set_attribution(_utils.CallerCounts(capacity))
+
+
+def _set_attribution(attribution: _utils.CallerCounts | None) -> None:
+    previous = _utils._attribution
+    if previous is not None:
+        _utils.remove_observer(previous.record)
+    _utils._attribution = attribution
+    if attribution is not None:
+        _utils.add_observer(attribution.record)
+
+
+def disable() -> None:
+    """Stops attributing deprecation hits (discarding any counts)."""
+    _set_attribution(None)
+
+
+def is_enabled() -> bool:
+    """Tells if deprecation hits are being attributed to their callers."""
+    return _utils._attribution is not None
+
+
+def enable_audit() -> None:
+    """Starts raising the audit event for deprecation hits.
+
+    Every hit of a deprecation (that has an identifier) then raises the
+    ``debtcollector.deprecation`` audit event (see :func:`sys.audit`) with
+    the deprecation identifier, the code object of the caller and the line
+    of the caller as arguments (before any policy is applied).
+    """
+    _utils._audit = True
+
+
+def disable_audit() -> None:
+    """Stops raising the audit event for deprecation hits."""
+    _utils._audit = False
+
+
+def is_audit_enabled() -> bool:
+    """Tells if deprecation hits raise the audit event."""
+    return _utils._audit
+
+
+def reset() -> None:
+    """Discards the counts and stacks recorded so far (if enabled)."""
+    attribution = _utils._attribution
+    if attribution is not None:
+        _set_attribution(_utils.CallerCounts(attribution.capacity))
+    samples = _utils._stack_samples
+    if samples is not None:
+        _set_stack_samples(
+            _utils.StackSamples(
+                samples.depth, samples.first, samples.every, samples.limit
+            )
+        )
+
+
+def get_callers(
+    deprecation_id: str | None = None, limit: int | None = None
+) -> list[Caller]:
+    """Gets the callers of deprecated things (most frequent first).
+
+    :param deprecation_id: only get the callers of this deprecation
+    :param limit: maximum number of callers to get
+    """
+    attribution = _utils._attribution
+    if attribution is None:
+        return []
+    callers = [
+        Caller(*item)
+        for item in attribution.snapshot()
+        if deprecation_id is None or item[0] == deprecation_id
+    ]
+    callers.sort(key=lambda caller: caller.count, reverse=True)
+    if limit is not None:
+        del callers[limit:]
+    return callers
+
+
+def get_caller_packages(
+    deprecation_id: str | None = None,
+) -> dict[str, dict[str, int]]:
+    """Gets the hits per deprecation made by each calling package.
+
+    :param deprecation_id: only get the callers of this deprecation
+    :returns: top-level package -> deprecation identifier -> hits
+    """
+    packages: dict[str, dict[str, int]] = {}
+    for caller in get_callers(deprecation_id=deprecation_id):
+        counts = packages.setdefault(caller.package, {})
+        counts[caller.deprecation_id] = (
+            counts.get(caller.deprecation_id, 0) + caller.count
+        )
+    return packages
+
+
+def _set_stack_samples(samples: _utils.StackSamples | None) -> None:
+    previous = _utils._stack_samples
+    if previous is not None:
+        _utils.remove_observer(previous.record)
+    _utils._stack_samples = samples
+    if samples is not None:
+        _utils.add_observer(samples.record)
+
+
+def enable_stacks(
+    depth: int = DEFAULT_STACK_DEPTH,
+    first: int = DEFAULT_STACK_FIRST,
+    every: int = DEFAULT_STACK_EVERY,
+    limit: int = DEFAULT_STACK_LIMIT,
+) -> None:
+    """Starts sampling the call stacks that hit deprecations.
+
+    Any stacks sampled so far are discarded.
+
+    :param depth: maximum number of frames kept per stack
+    :param first: number of hits (of each deprecation) whose stack is always
+                  captured
+    :param every: after the first hits, capture the stack of one in every
+                  this many hits
+    :param limit: maximum number of distinct stacks kept per deprecation
+                  (hits with other stacks are then only counted)
+    """
+    _set_stack_samples(_utils.StackSamples(depth, first, every, limit))
+
+
+def disable_stacks() -> None:
+    """Stops sampling call stacks (discarding the stacks sampled)."""
+    _set_stack_samples(None)
+
+
+def get_stacks(deprecation_id: str | None = None) -> list[Stack]:
+    """Gets the sampled stacks (most frequently sampled first).
+
+    :param deprecation_id: only get the stacks that hit this deprecation
+    """
+    samples = _utils._stack_samples
+    if samples is None:
+        return []
+    stacks = [
+        Stack(*item)
+        for item in samples.snapshot()
+        if deprecation_id is None or item[0] == deprecation_id
+    ]
+    stacks.sort(key=lambda stack: stack.count, reverse=True)
+    return stacks
+
+
+def get_stack_hits(deprecation_id: str) -> int:
+    """Gets the hits of a deprecation seen since stacks were sampled."""
+    samples = _utils._stack_samples
+    if samples is None:
+        return 0
+    return samples.get_hits(deprecation_id)
+
+
+def _load_from_environment() -> None:
+    if os.environ.get(AUDIT_ENV):
+        enable_audit()
@@ -0,0 +1,357 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Logging of deprecation hits to a (JSON lines) event log file.
+
+When enabled, every hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) is written as one JSON object per line to an
+event log file. Each object has the ``time`` and ``pid`` of the hit, the
+``id`` of the deprecation (along with its ``kind``, ``name``, ``version``
+and ``removal_version``) and the ``module``, ``function``, ``file`` and
+``line`` of the caller.
+
+Hits are buffered in memory (nothing is formatted and no system call is
+made when a hit is recorded) and are written when the buffer is full, when
+the oldest buffered hit is older than the flush interval (which is checked
+when hits are recorded, so hits are otherwise written with the next one),
+when :func:`.flush` is called, when the process exits and before the process
+forks (so that child processes never write the events of their parent).
+The file is rotated (like :py:class:`logging.handlers.RotatingFileHandler`
+does) once it would grow past ``max_bytes``.
+
+Any number of processes (like the forked workers of a server) can write to
+the same file: hits are appended and the file is only rotated while holding
+a lock (on a ``.lock`` file next to it, on platforms with :mod:`fcntl`),
+after which the other processes notice the file was rotated (by comparing
+it to the file they have open) and reopen it before writing. On platforms
+without :mod:`fcntl` each process should be given its own file instead.
+
+The event log file named by the ``DEBTCOLLECTOR_EVENT_LOG`` environment
+variable (if set) is enabled when debtcollector is first imported.
+"""
+
+from __future__ import annotations
+
+import atexit
+from collections.abc import Iterator
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import types
+from typing import Any, BinaryIO
+
+from debtcollector import _utils
+
+_lockf: Any
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (platforms without fcntl)
+    _lockf = None
+else:
+    _lockf = fcntl.lockf
+
+LOG = logging.getLogger(__name__)
+
+#: Environment variable naming the event log file to enable on import.
+EVENT_LOG_ENV = 'DEBTCOLLECTOR_EVENT_LOG'
+
+#: Default number of hits buffered before they are written.
+DEFAULT_BUFFER_SIZE = 1024
+
+#: Default size (in bytes) at which the event log file is rotated.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+#: Default number of rotated event log files kept.
+DEFAULT_BACKUP_COUNT = 5
+
+#: Default age (in seconds) of the oldest buffered hit past which the
+#: buffered hits are written (when the next hit is recorded).
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+
+class EventLog:
+    """Buffered, rotating writer of deprecation hits (as JSON lines).
+
+    :param path: path of the event log file (appended to)
+    :param buffer_size: number of hits buffered before they are written
+    :param max_bytes: size at which the file is rotated (zero to never
+                      rotate it)
+    :param backup_count: number of rotated files kept (named like the file
+                         with a ``.1``, ``.2``... suffix)
+    :param flush_interval: age (in seconds) of the oldest buffered hit past
+                           which the buffered hits are written when the
+                           next hit is recorded (none to only write them
+                           once the buffer is full)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        flush_interval: float | None = DEFAULT_FLUSH_INTERVAL,
+    ):
+        if buffer_size < 1:
+            raise ValueError(
+                f"Buffer size must be greater than zero (not {buffer_size})"
+            )
+        if flush_interval is not None and flush_interval < 0:
+            raise ValueError(
+                f"Flush interval must not be negative (not {flush_interval})"
+            )
+        self.path = path
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # (time, deprecation id, module, function, file, line)
+        self._buffer: list[tuple[float, str, str, str, str, int]] = []
+        # Monotonic time past which the buffered hits are written.
+        self._flush_at = 0.0
+        self._file: BinaryIO | None = None
+        self._lock_fd: int | None = None
+        self._pid = os.getpid()
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        code = frame.f_code
+        buffer = self._buffer
+        flush_interval = self.flush_interval
+        overdue = False
+        if flush_interval is not None:
+            now = time.monotonic()
+            if buffer:
+                overdue = now >= self._flush_at
+            else:
+                self._flush_at = now + flush_interval
+        buffer.append(
+            (
+                time.time(),
+                deprecation_id,
+                frame.f_globals.get('__name__') or '?',
+                code.co_name,
+                code.co_filename,
+                frame.f_lineno,
+            )
+        )
+        if overdue or len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def _format(self, events: list[tuple[Any, ...]]) -> bytes:
+        lines = []
+        deprecations = _utils._deprecations
+        for when, deprecation_id, module, function, filename, line in events:
+            event: dict[str, Any] = {
+                'time': when,
+                'pid': self._pid,
+                'id': deprecation_id,
+            }
+            deprecation = deprecations.get(deprecation_id)
+            if deprecation is not None:
+                event['kind'] = deprecation.kind
+                event['name'] = deprecation.name
+                event['version'] = deprecation.version
+                event['removal_version'] = deprecation.removal_version
+            event['module'] = module
+            event['function'] = function
+            event['file'] = filename
+            event['line'] = line
+            lines.append(json.dumps(event, separators=(',', ':')))
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+    def _open(self) -> BinaryIO:
+        stream = self._file
+        if stream is not None:
+            # Reopen the file when another process rotated it.
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                rotated = True
+            else:
+                opened = os.fstat(stream.fileno())
+                rotated = (stat.st_dev, stat.st_ino) != (
+                    opened.st_dev,
+                    opened.st_ino,
+                )
+            if not rotated:
+                return stream
+            stream.close()
+        stream = self._file = open(self.path, 'ab')
+        return stream
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Record locks are held per process, the (thread) lock of this event
+        # log is held already.
+        if _lockf is None:  # pragma: no cover (platforms without fcntl)
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(
+                f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o644
+            )
+        _lockf(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            _lockf(self._lock_fd, fcntl.LOCK_UN)
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f'{self.path}.{i}'
+                if os.path.exists(source):
+                    os.replace(source, f'{self.path}.{i + 1}')
+            if os.path.exists(self.path):
+                os.replace(self.path, f'{self.path}.1')
+        else:
+            open(self.path, 'wb').close()
+
+    def flush(self) -> None:
+        """Writes the buffered hits (rotating the file if needed)."""
+        with self._lock:
+            # Copy then trim (instead of swapping lists) so that hits being
+            # recorded (by other threads) meanwhile are never lost.
+            buffer = self._buffer
+            events = buffer[:]
+            if not events:
+                return
+            del buffer[: len(events)]
+            data = self._format(events)
+            with self._locked():
+                stream = self._open()
+                # The size of the file (which other processes may append
+                # to as well).
+                size = os.fstat(stream.fileno()).st_size
+                if (
+                    self.max_bytes > 0
+                    and size
+                    and size + len(data) > self.max_bytes
+                ):
+                    self._rotate()
+                    stream = self._open()
+                stream.write(data)
+                stream.flush()
+
+    def close(self) -> None:
+        """Writes the buffered hits and closes the file."""
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def _after_fork_in_child(self) -> None:
+        # The parent flushed before forking (and keeps its files), so start
+        # over with a fresh lock and buffer and our own file objects.
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._file = None
+        if self._lock_fd is not None:
+            # Closing it does not release the locks of the parent.
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self._pid = os.getpid()
+
+
+_event_log: EventLog | None = None
+
+
+def enable(
+    path: str,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    flush_interval: float | None = DEFAULT_FLUSH_INTERVAL,
+) -> EventLog:
+    """Starts logging deprecation hits to an event log file.
+
+    Any event log file already enabled is closed first (see
+    :class:`.EventLog` for the parameters).
+    """
+    global _event_log
+    disable()
+    event_log = EventLog(
+        path,
+        buffer_size=buffer_size,
+        max_bytes=max_bytes,
+        backup_count=backup_count,
+        flush_interval=flush_interval,
+    )
+    _event_log = event_log
+    _utils.add_observer(event_log.record)
+    return event_log
+
+
+def disable() -> None:
+    """Stops logging deprecation hits (writing any buffered hits)."""
+    global _event_log
+    event_log = _event_log
+    if event_log is None:
+        return
+    _event_log = None
+    _utils.remove_observer(event_log.record)
+    event_log.close()
+
+
+def flush() -> None:
+    """Writes the buffered hits of the enabled event log file (if any)."""
+    event_log = _event_log
+    if event_log is not None:
+        event_log.flush()
+
+
+def _before_fork() -> None:
+    try:
+        flush()
+    except Exception:
+        LOG.exception("Failed writing deprecation hits before forking")
+
+
+def _after_fork_in_child() -> None:
+    event_log = _event_log
+    if event_log is not None:
+        event_log._after_fork_in_child()
+
+
+def _at_exit() -> None:
+    try:
+        disable()
+    except Exception:
+        LOG.exception("Failed writing deprecation hits at exit")
+
+
+atexit.register(_at_exit)
+_utils.register_at_fork(
+    before=_before_fork, after_in_child=_after_fork_in_child
+)
+
+
+def _load_from_environment() -> None:
+    path = os.environ.get(EVENT_LOG_ENV)
+    if not path:
+        return
+    try:
+        enable(path)
+    except Exception:
+        LOG.exception("Failed enabling event log file '%s'", path)
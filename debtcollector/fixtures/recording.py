@@ -0,0 +1,270 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Recording of deprecation hits (for tests) without the warnings module.
+
+Unlike :func:`warnings.catch_warnings` (which replaces the filters of the
+warnings module, for every thread, and has to be paired with filters that
+make sure warnings already shown are shown again) the recorders here are
+told about every deprecation hit directly by debtcollector, before any
+policy (see :mod:`debtcollector.policy`) is applied, and leave the filters
+of the warnings module untouched.
+
+Recorders are quiet by default: what they record is not passed on to the
+warnings module at all (policies still apply, so hits of deprecations that
+are errors by policy still raise), which also leaves its registries (like
+the ``__warningregistry__`` of the calling modules) untouched. Recorders
+that are not quiet pass the hits on to :func:`warnings.warn`, which does
+update those registries (warnings shown once may then not be shown again
+outside of the recorder).
+
+Recorders are added for the whole process (not for the current thread or
+context): hits made by any thread while recording are recorded, so tests
+run concurrently (in threads of the same process) see the hits of each
+other. Hits of callers inside the package a deprecation belongs to, when
+those are ignored, are not recorded.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import contextlib
+import types
+
+import fixtures
+
+from debtcollector import _utils
+
+
+class RecordedDeprecation:
+    """A deprecation hit (recorded by a :class:`.Recorder`)."""
+
+    __slots__ = (
+        'deprecation_id',
+        'kind',
+        'name',
+        'message',
+        'category',
+        'module',
+        'function',
+        'filename',
+        'line',
+    )
+
+    def __init__(
+        self,
+        deprecation_id: str | None,
+        message: str,
+        category: type[Warning],
+        module: str | None = None,
+        function: str | None = None,
+        filename: str | None = None,
+        line: int | None = None,
+    ):
+        self.deprecation_id = deprecation_id
+        if deprecation_id is not None:
+            kind, _sep, name = deprecation_id.partition(':')
+            self.kind: str | None = kind
+            self.name: str | None = name
+        else:
+            self.kind = self.name = None
+        self.message = message
+        self.category = category
+        self.module = module
+        self.function = function
+        self.filename = filename
+        self.line = line
+
+    def __repr__(self) -> str:
+        return (
+            f'<RecordedDeprecation {self.deprecation_id!r} from '
+            f'{self.module}:{self.function}:{self.line}>'
+        )
+
+
+class _Assertions:
+    # Queries of (and assertions about) the recorded deprecation hits.
+
+    events: list[RecordedDeprecation]
+
+    def get_events(
+        self,
+        deprecation_id: str | None = None,
+        kind: str | None = None,
+        name: str | None = None,
+    ) -> list[RecordedDeprecation]:
+        """Gets the recorded hits (matching all of the criteria given)."""
+        return [
+            event
+            for event in list(self.events)
+            if (
+                deprecation_id is None
+                or event.deprecation_id == deprecation_id
+            )
+            and (kind is None or event.kind == kind)
+            and (name is None or event.name == name)
+        ]
+
+    def clear(self) -> None:
+        """Forgets the recorded hits."""
+        self.events.clear()
+
+    def _describe(self) -> str:
+        hit = sorted({str(event.deprecation_id) for event in self.events})
+        return f"(recorded: {', '.join(hit) or 'nothing'})"
+
+    def assert_deprecated(
+        self,
+        deprecation_id: str | None = None,
+        kind: str | None = None,
+        name: str | None = None,
+        message: str | None = None,
+        count: int | None = None,
+    ) -> list[RecordedDeprecation]:
+        """Asserts that a deprecation was hit (and returns its hits).
+
+        :param deprecation_id: identifier of the deprecation
+        :param kind: kind of the deprecation
+        :param name: name of the deprecated thing
+        :param message: text the message of (one of) the hits must contain
+        :param count: exact number of hits expected (any number but zero
+                      when not provided)
+        """
+        events = self.get_events(
+            deprecation_id=deprecation_id, kind=kind, name=name
+        )
+        if message is not None and not any(
+            message in event.message for event in events
+        ):
+            raise AssertionError(
+                f"No deprecation hit has a message containing {message!r} "
+                f"{self._describe()}"
+            )
+        if count is None:
+            if not events:
+                raise AssertionError(
+                    f"No matching deprecation was hit {self._describe()}"
+                )
+        elif len(events) != count:
+            raise AssertionError(
+                f"Expected {count} matching deprecation hit(s) but got "
+                f"{len(events)} {self._describe()}"
+            )
+        return events
+
+    def assert_not_deprecated(
+        self,
+        deprecation_id: str | None = None,
+        kind: str | None = None,
+        name: str | None = None,
+    ) -> None:
+        """Asserts that no (matching) deprecation was hit."""
+        events = self.get_events(
+            deprecation_id=deprecation_id, kind=kind, name=name
+        )
+        if events:
+            raise AssertionError(
+                f"Expected no matching deprecation hit but got {len(events)} "
+                f"{self._describe()}"
+            )
+
+
+class Recorder(_Assertions):
+    """Records deprecation hits (once added, see :func:`.recording`).
+
+    :param quiet: whether the hits are not passed on to the warnings module
+                  (when they are, its registries are updated)
+    """
+
+    def __init__(self, quiet: bool = True):
+        self.quiet = quiet
+        #: The recorded hits (oldest first).
+        self.events: list[RecordedDeprecation] = []
+
+    def __call__(
+        self,
+        deprecation_id: str | None,
+        frame: types.FrameType | None,
+        message: str | Warning,
+        category: type[Warning],
+    ) -> bool:
+        if isinstance(message, Warning):
+            category = type(message)
+        if frame is not None:
+            code = frame.f_code
+            event = RecordedDeprecation(
+                deprecation_id,
+                str(message),
+                category,
+                module=frame.f_globals.get('__name__'),
+                function=getattr(code, 'co_qualname', code.co_name),
+                filename=code.co_filename,
+                line=frame.f_lineno,
+            )
+        else:
+            event = RecordedDeprecation(deprecation_id, str(message), category)
+        self.events.append(event)
+        return self.quiet
+
+
+@contextlib.contextmanager
+def recording(quiet: bool = True) -> Iterator[Recorder]:
+    """Records the deprecation hits made while active (by any thread).
+
+    :param quiet: whether the hits are not passed on to the warnings module
+                  (when they are, its registries are updated)
+
+    This can be used like::
+
+        from debtcollector.fixtures import recording
+
+        with recording.recording() as recorder:
+            <some code that calls into deprecated code>
+        recorder.assert_deprecated('function:mymodule.old_thing')
+    """
+    recorder = Recorder(quiet=quiet)
+    _utils.add_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        _utils.remove_recorder(recorder)
+
+
+class RecordingFixture(fixtures.Fixture, _Assertions):
+    """Fixture that records the deprecation hits made while it is set up.
+
+    Hits made by any thread are recorded (see :func:`.recording`).
+
+    :param quiet: whether the hits are not passed on to the warnings module
+                  (when they are, its registries are updated)
+
+    This can be used like::
+
+        from debtcollector.fixtures import recording
+
+        def test_old_thing(self):
+            recorder = self.useFixture(recording.RecordingFixture())
+            <some code that calls into deprecated code>
+            recorder.assert_deprecated('function:mymodule.old_thing')
+    """
+
+    def __init__(self, quiet: bool = True):
+        super().__init__()
+        self.quiet = quiet
+        #: The recorded hits (oldest first).
+        self.events: list[RecordedDeprecation] = []
+
+    def _setUp(self) -> None:
+        recorder = Recorder(quiet=self.quiet)
+        _utils.add_recorder(recorder)
+        self.addCleanup(_utils.remove_recorder, recorder)
+        self.events = recorder.events
@@ -0,0 +1,360 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Accounting of the deprecations hit while serving (web) requests.
+
+The :class:`.WSGIMiddleware` and :class:`.ASGIMiddleware` wrap an
+application so that the identifiers of the deprecations (that have one, see
+:mod:`debtcollector.policy`) hit while serving each request are collected
+(in a set kept in a :class:`contextvars.ContextVar`, so that concurrent
+requests, be they served by threads or by asyncio tasks, never mix their
+hits) and, once the request is done, counted per route in a
+:class:`.RouteStats`. The identifiers can also be sent back as a response
+header (which is meant for debugging, as it tells clients about internals).
+
+Requests that hit no deprecation only cost setting (and resetting) the
+context variable; the :func:`.recording` context manager does the same for
+any other unit of work (like RPC calls or periodic tasks).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+import contextlib
+import contextvars
+import functools
+import threading
+import types
+from typing import Any
+import weakref
+
+from debtcollector import _utils
+
+#: Name of the (debugging) response header that lists the deprecations hit.
+DEFAULT_HEADER = 'X-Debtcollector-Deprecations'
+
+#: Default number of routes counted (see :class:`.RouteStats`).
+DEFAULT_MAX_ROUTES = 1000
+
+#: Route the requests to routes past the maximum number are counted under.
+OTHER_ROUTE = '<other>'
+
+# Identifiers of the deprecations hit in the current recording scope (none
+# when not in one).
+_hits: contextvars.ContextVar[set[str] | None] = contextvars.ContextVar(
+    'debtcollector_hits', default=None
+)
+
+
+def _record(deprecation_id: str, frame: types.FrameType) -> None:
+    hits = _hits.get()
+    if hits is not None:
+        hits.add(deprecation_id)
+
+
+_recording_users = 0
+_recording_lock = threading.Lock()
+
+
+def _start_observing() -> None:
+    global _recording_users
+    with _recording_lock:
+        if not _recording_users:
+            _utils.add_observer(_record)
+        _recording_users += 1
+
+
+def _stop_observing() -> None:
+    global _recording_users
+    with _recording_lock:
+        _recording_users -= 1
+        if not _recording_users:
+            _utils.remove_observer(_record)
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[set[str]]:
+    """Collects the identifiers of the deprecations hit (in this context).
+
+    The set yielded is filled while the context manager is active (hits
+    made by threads, or asyncio tasks, started from within the block are
+    collected too only when they run in a copy of this context).
+    """
+    hits: set[str] = set()
+    _start_observing()
+    token = _hits.set(hits)
+    try:
+        yield hits
+    finally:
+        _hits.reset(token)
+        _stop_observing()
+
+
+def get_request_deprecations() -> frozenset[str]:
+    """Gets the deprecations hit so far in the current recording scope."""
+    hits = _hits.get()
+    if hits is None:
+        return frozenset()
+    return frozenset(hits)
+
+
+# Every route stats, so that their locks (which a thread of the parent may
+# have held while forking) are replaced in children.
+_all_route_stats: weakref.WeakSet[RouteStats] = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    global _recording_lock
+    _recording_lock = threading.Lock()
+    for route_stats in list(_all_route_stats):
+        route_stats._lock = threading.Lock()
+
+
+_utils.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class RouteStats:
+    """Counts of the requests (per route) that hit each deprecation.
+
+    :param max_routes: number of routes counted; requests to other routes
+                       (once that many were counted) are counted under
+                       :data:`.OTHER_ROUTE` (so that routes made of the
+                       paths of requests can not grow without bounds)
+    """
+
+    def __init__(self, max_routes: int = DEFAULT_MAX_ROUTES):
+        if max_routes < 1:
+            raise ValueError(
+                f"Maximum routes must be greater than zero (not {max_routes})"
+            )
+        self.max_routes = max_routes
+        self._lock = threading.Lock()
+        # Route -> deprecation id -> requests
+        self._counts: dict[str, dict[str, int]] = {}
+        _all_route_stats.add(self)
+
+    def record(self, route: str, deprecation_ids: Iterable[str]) -> None:
+        """Counts a request (to some route) that hit some deprecations."""
+        with self._lock:
+            counts = self._counts.get(route)
+            if counts is None:
+                if len(self._counts) >= self.max_routes:
+                    route = OTHER_ROUTE
+                counts = self._counts.setdefault(route, {})
+            for deprecation_id in deprecation_ids:
+                counts[deprecation_id] = counts.get(deprecation_id, 0) + 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Gets route -> deprecation identifier -> requests."""
+        with self._lock:
+            return {
+                route: dict(counts) for route, counts in self._counts.items()
+            }
+
+    def reset(self) -> None:
+        """Forgets all the requests counted."""
+        with self._lock:
+            self._counts = {}
+
+
+def _format_header(hits: set[str]) -> str:
+    return ', '.join(sorted(hits))
+
+
+def _get_wsgi_route(environ: dict[str, Any]) -> str:
+    path: str = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+    return path or '/'
+
+
+class _WSGIResponse:
+    # Iterates the response of the application (in the context the request
+    # was started in, so that hits made while making the body are collected
+    # too) then counts the hits of the request once it is closed.
+
+    def __init__(
+        self,
+        middleware: WSGIMiddleware,
+        context: contextvars.Context,
+        route: str,
+        result: Iterable[bytes],
+    ):
+        self._middleware = middleware
+        self._context = context
+        self._route = route
+        self._result = result
+        self._iterator: Iterator[bytes] | None = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        if self._iterator is None:
+            self._iterator = self._context.run(iter, self._result)
+        return self._context.run(next, self._iterator)
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._result, 'close', None)
+            if close is not None:
+                self._context.run(close)
+        finally:
+            self._middleware._done(self._context, self._route)
+
+
+class WSGIMiddleware:
+    """WSGI middleware accounting the deprecations hit by each request.
+
+    :param application: the WSGI application to wrap
+    :param stats: where the requests that hit deprecations are counted
+                  (a new :class:`.RouteStats` when not provided)
+    :param route: callable getting the route (typically the path template)
+                  of a request from its WSGI environment; the script name
+                  and path are used when not provided (which makes one route
+                  per distinct path, past the maximum number of routes of
+                  the stats those are counted as :data:`.OTHER_ROUTE`)
+    :param header: name of a response header to list the deprecations hit
+                   in (for debugging); only the deprecations hit before the
+                   application started the response can be listed
+    """
+
+    def __init__(
+        self,
+        application: Callable[..., Iterable[bytes]],
+        stats: RouteStats | None = None,
+        route: Callable[[dict[str, Any]], str] | None = None,
+        header: str | None = None,
+    ):
+        self.application = application
+        self.stats = stats if stats is not None else RouteStats()
+        self._route = route if route is not None else _get_wsgi_route
+        self.header = header
+        _start_observing()
+        weakref.finalize(self, _stop_observing)
+
+    def _call(
+        self,
+        environ: dict[str, Any],
+        start_response: Callable[..., Any],
+    ) -> Iterable[bytes]:
+        hits: set[str] = set()
+        _hits.set(hits)
+        if self.header is not None:
+            start_response = functools.partial(
+                self._start_response, start_response, hits
+            )
+        return self.application(environ, start_response)
+
+    def _start_response(
+        self,
+        start_response: Callable[..., Any],
+        hits: set[str],
+        status: str,
+        headers: list[tuple[str, str]],
+        exc_info: Any = None,
+    ) -> Any:
+        if hits and self.header is not None:
+            headers = headers + [(self.header, _format_header(hits))]
+        return start_response(status, headers, exc_info)
+
+    def _done(self, context: contextvars.Context, route: str) -> None:
+        hits = context.get(_hits)
+        if hits:
+            self.stats.record(route, hits)
+
+    def __call__(
+        self,
+        environ: dict[str, Any],
+        start_response: Callable[..., Any],
+    ) -> Iterable[bytes]:
+        context = contextvars.copy_context()
+        route = self._route(environ)
+        try:
+            result = context.run(self._call, environ, start_response)
+        except BaseException:
+            self._done(context, route)
+            raise
+        return _WSGIResponse(self, context, route, result)
+
+
+def _get_asgi_route(scope: dict[str, Any]) -> str:
+    # Frameworks (like starlette) tell what route matched in the scope.
+    route = scope.get('route')
+    path = getattr(route, 'path', None)
+    if isinstance(path, str):
+        return path
+    return str(scope.get('root_path', '') + scope.get('path', '')) or '/'
+
+
+class ASGIMiddleware:
+    """ASGI middleware accounting the deprecations hit by each request.
+
+    Only HTTP (and websocket) connections are accounted for, see
+    :class:`.WSGIMiddleware` for the parameters (the route callable gets
+    the ASGI scope); the route matched by the framework (as found in the
+    scope) is used when no route callable is provided.
+    """
+
+    def __init__(
+        self,
+        application: Callable[..., Awaitable[None]],
+        stats: RouteStats | None = None,
+        route: Callable[[dict[str, Any]], str] | None = None,
+        header: str | None = None,
+    ):
+        self.application = application
+        self.stats = stats if stats is not None else RouteStats()
+        self._route = route
+        self.header = header.lower().encode('latin-1') if header else None
+        _start_observing()
+        weakref.finalize(self, _stop_observing)
+
+    async def _send(
+        self,
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+        hits: set[str],
+        message: dict[str, Any],
+    ) -> None:
+        if (
+            hits
+            and self.header is not None
+            and message.get('type') == 'http.response.start'
+        ):
+            message = dict(message)
+            message['headers'] = list(message.get('headers', ())) + [
+                (self.header, _format_header(hits).encode('latin-1'))
+            ]
+        await send(message)
+
+    async def __call__(
+        self,
+        scope: dict[str, Any],
+        receive: Callable[[], Awaitable[dict[str, Any]]],
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        if scope.get('type') not in ('http', 'websocket'):
+            await self.application(scope, receive, send)
+            return
+        hits: set[str] = set()
+        token = _hits.set(hits)
+        if self.header is not None:
+            send = functools.partial(self._send, send, hits)
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            _hits.reset(token)
+            if hits:
+                # The route is only known once the framework matched it.
+                if self._route is not None:
+                    route = self._route(scope)
+                else:
+                    route = _get_asgi_route(scope)
+                self.stats.record(route, hits)
@@ -17,6 +17,7 @@ from __future__ import annotations
 from collections.abc import Callable
 import functools
 import inspect
+import sys
 from typing import Any, ParamSpec, TypeVar
 
 import wrapt
@@ -42,13 +43,21 @@ def _moved_decorator(
     stacklevel: int = 3,
     attr_postfix: str | None = None,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorates a method/property that was moved to another location."""
+    internal_callers = _utils.get_internal_callers(internal_package)
 
     def decorator(f: Callable[P, R]) -> Callable[P, R]:
         fully_qualified, old_attribute_name = _utils.get_qualified_name(f)
         if attr_postfix:
             old_attribute_name += attr_postfix
+        deprecation_id = _utils.register_deprecation(
+            f'moved-{kind.lower()}',
+            _utils.get_full_name(f),
+            version=version,
+            removal_version=removal_version,
+        )
 
         @wrapt.decorator
         def wrapper(
@@ -57,21 +66,32 @@ def _moved_decorator(
             args: tuple[Any, ...],
             kwargs: dict[str, Any],
         ) -> R:
-            base_name = _utils.get_class_name(wrapped, fully_qualified=False)
-            if fully_qualified:
-                old_name = old_attribute_name
-            else:
-                old_name = ".".join((base_name, old_attribute_name))
-            new_name = ".".join((base_name, new_attribute_name))
-            prefix = _KIND_MOVED_PREFIX_TPL % (kind, old_name, new_name)
-            out_message = _utils.generate_message(
+            def prefix() -> str:
+                base_name = _utils.get_class_name(
+                    wrapped, fully_qualified=False
+                )
+                if fully_qualified:
+                    old_name = old_attribute_name
+                else:
+                    old_name = ".".join((base_name, old_attribute_name))
+                new_name = ".".join((base_name, new_attribute_name))
+                return _KIND_MOVED_PREFIX_TPL % (kind, old_name, new_name)
+
+            out_message = _utils.make_message(
                 prefix,
                 message=message,
                 version=version,
                 removal_version=removal_version,
+                category=category,
+                deprecation_id=deprecation_id,
+                replacement=new_attribute_name,
             )
             _utils.deprecation(
-                out_message, stacklevel=stacklevel, category=category
+                out_message,
+                stacklevel=stacklevel,
+                category=category,
+                deprecation_id=deprecation_id,
+                internal_callers=internal_callers,
             )
             return wrapped(*args, **kwargs)
 
@@ -89,37 +109,123 @@ def moved_function(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
+    monitoring: bool = False,
 ) -> Callable[P, R]:
     """Deprecates a function that was moved to another location.
 
     This generates a wrapper around ``new_func`` that will emit a deprecation
     warning when called. The warning message will include the new location
     to obtain the function from.
+
+    When ``monitoring`` is true (and when running on python 3.12 or newer)
+    only the first call of the wrapper is warned about (using
+    :mod:`sys.monitoring`), after which calling it costs no more than calling
+    a plain wrapper does. That is the first call made by the process, not
+    the first one made from each calling location (like the warnings module
+    shows by default), and later calls are not seen at all: the policies
+    that apply to the deprecation, the observers and recorders of its hits
+    (like the pytest plugin, attribution and event logs) and its audit event
+    can then only see that first call.
     """
     new_func_full_name = _utils.get_callable_name(new_func)
     new_func_full_name += _MOVED_CALLABLE_POSTFIX
     old_func_full_name = ".".join([old_module_name, old_func_name])
     old_func_full_name += _MOVED_CALLABLE_POSTFIX
     prefix = _FUNC_MOVED_PREFIX_TPL % (old_func_full_name, new_func_full_name)
-    out_message = _utils.generate_message(
+    deprecation_id = _utils.register_deprecation(
+        'moved-function',
+        ".".join([old_module_name, old_func_name]),
+        version=version,
+        removal_version=removal_version,
+    )
+    out_message = _utils.make_message(
         prefix,
         message=message,
         version=version,
         removal_version=removal_version,
+        category=category,
+        deprecation_id=deprecation_id,
+        replacement=_utils.get_callable_name(new_func),
     )
+    internal_callers = _utils.get_internal_callers(internal_package)
+
+    old_new_func: Callable[P, R] | None = None
+    if monitoring:
+
+        def monitored_func(*args: P.args, **kwargs: P.kwargs) -> R:
+            return new_func(*args, **kwargs)
+
+        # Each moved function needs its own code object to be monitored (the
+        # code of the function above is otherwise shared by all of them),
+        # named after the old function (and telling it apart from the ones
+        # moved from other modules).
+        code = monitored_func.__code__
+        if sys.version_info >= (3, 11):
+            code = code.replace(
+                co_name=old_func_name,
+                co_qualname=f'{old_module_name}.{old_func_name}',
+            )
+        else:
+            code = code.replace(co_name=old_func_name)
+        monitored_func.__code__ = code
+        if _utils.monitor_first_call(
+            monitored_func.__code__,
+            out_message,
+            stacklevel=stacklevel,
+            category=category,
+            deprecation_id=deprecation_id,
+            internal_callers=internal_callers,
+        ):
+            old_new_func = monitored_func
+    if old_new_func is None:
+
+        def wrapped_func(*args: P.args, **kwargs: P.kwargs) -> R:
+            _utils.deprecation(
+                out_message,
+                stacklevel=stacklevel,
+                category=category,
+                deprecation_id=deprecation_id,
+                internal_callers=internal_callers,
+            )
+            return new_func(*args, **kwargs)
 
-    @functools.wraps(new_func, assigned=_utils.get_assigned(new_func))
-    def old_new_func(*args: P.args, **kwargs: P.kwargs) -> R:
-        _utils.deprecation(
-            out_message, stacklevel=stacklevel, category=category
-        )
-        return new_func(*args, **kwargs)
-
+        old_new_func = wrapped_func
+    functools.update_wrapper(
+        old_new_func, new_func, assigned=_utils.get_assigned(new_func)
+    )
     old_new_func.__name__ = old_func_name
     old_new_func.__module__ = old_module_name
     return old_new_func
 
 
+_MISSING = object()
+
+
+def _find_class_attribute(owner: type, name: str) -> Any:
+    """Finds the raw (non-bound) attribute ``name`` in the owners mro."""
+    for klass in owner.__mro__:
+        try:
+            return vars(klass)[name]
+        except KeyError:
+            pass
+    return _MISSING
+
+
+class _moved_alias:
+    """Descriptor that forwards reads to another attribute."""
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is not None:
+            return getattr(instance, self._name)
+        return getattr(owner, self._name)
+
+
 class moved_read_only_property:
     """Descriptor for read-only properties moved to another location.
 
@@ -142,6 +248,21 @@ class moved_read_only_property:
                        deprecation call (the default being 3)
     :param category: the :mod:`warnings` category to use, defaults to
                      :py:class:`DeprecationWarning` if not provided
+    :param resolve_once: when true the deprecation is only warned about on
+                         the first access made through each owner class,
+                         after which an alias forwarding to the new
+                         attribute is installed on that class (so that
+                         later reads, including the ones made through its
+                         subclasses, are not warned about and cost little
+                         more than reading the new attribute directly);
+                         the new attribute must then exist on the class
+                         when the class is created
+    :param internal_package: when provided, reads made from modules inside
+                             of this package (or module) are not warned
+                             about (this can not be combined with
+                             ``resolve_once``, as an internal read could
+                             then install the alias and silence all later
+                             reads)
     """
 
     def __init__(
@@ -152,24 +273,69 @@ class moved_read_only_property:
         removal_version: str | None = None,
         stacklevel: int = 3,
         category: type[Warning] | None = None,
+        resolve_once: bool = False,
+        internal_package: str | None = None,
     ):
+        if resolve_once and internal_package:
+            raise ValueError(
+                "The 'resolve_once' and 'internal_package' options can "
+                "not be used together"
+            )
         self._old_name = old_name
         self._new_name = new_name
-        self._message = _utils.generate_message(
+        self._resolve_once = resolve_once
+        self._attr_name = old_name
+        self._stacklevel = stacklevel
+        self._category = category
+        self._internal_callers = _utils.get_internal_callers(internal_package)
+        self._version = version
+        self._removal_version = removal_version
+        self._deprecation_id = _utils.get_deprecation_id(
+            'moved-property', old_name
+        )
+        self._message = self._make_message()
+
+    def _make_message(self) -> str | _utils.DebtCollectorWarning:
+        return _utils.make_message(
             f"Read-only property '{self._old_name}' has moved "
             f"to '{self._new_name}'",
-            version=version,
-            removal_version=removal_version,
+            version=self._version,
+            removal_version=self._removal_version,
+            category=self._category,
+            deprecation_id=self._deprecation_id,
+            replacement=self._new_name,
         )
-        self._stacklevel = stacklevel
-        self._category = category
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._attr_name = name
+        self._deprecation_id = _utils.register_deprecation(
+            'moved-property',
+            f'{_utils.get_full_name(owner)}.{name}',
+            version=self._version,
+            removal_version=self._removal_version,
+        )
+        self._message = self._make_message()
+        if not self._resolve_once:
+            return
+        if _find_class_attribute(owner, self._new_name) is _MISSING:
+            raise AttributeError(
+                f"Read-only property '{self._old_name}' can not be moved "
+                f"to '{self._new_name}' (class '{owner.__qualname__}' has "
+                f"no attribute '{self._new_name}')"
+            )
 
     def __get__(self, instance: Any, owner: type | None = None) -> Any:
         _utils.deprecation(
             self._message,
             stacklevel=self._stacklevel,
             category=self._category,
+            deprecation_id=self._deprecation_id,
+            internal_callers=self._internal_callers,
         )
+        if owner is None:
+            owner = type(instance)
+        if self._resolve_once:
+            self._install_alias(owner)
         # This handles the descriptor being applied on a
         # instance or a class and makes both work correctly...
         if instance is not None:
@@ -178,6 +344,14 @@ class moved_read_only_property:
             real_owner = owner
         return getattr(real_owner, self._new_name)
 
+    def _install_alias(self, owner: type) -> None:
+        if _find_class_attribute(owner, self._new_name) is _MISSING:
+            return
+        # Forward reads (instead of copying the new attribute) so that
+        # subclasses overriding the new attribute, even ones made later,
+        # get their own version of it.
+        setattr(owner, self._attr_name, _moved_alias(self._new_name))
+
 
 def moved_method(
     new_method_name: str,
@@ -186,6 +360,7 @@ def moved_method(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorates an *instance* method that was moved to another location."""
     if not new_method_name.endswith(_MOVED_CALLABLE_POSTFIX):
@@ -199,6 +374,7 @@ def moved_method(
         stacklevel=stacklevel,
         attr_postfix=_MOVED_CALLABLE_POSTFIX,
         category=category,
+        internal_package=internal_package,
     )
 
 
@@ -209,6 +385,7 @@ def moved_property(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorates an *instance* property that was moved to another location."""
     return _moved_decorator(
@@ -219,6 +396,7 @@ def moved_property(
         removal_version=removal_version,
         stacklevel=stacklevel,
         category=category,
+        internal_package=internal_package,
     )
 
 
@@ -231,6 +409,7 @@ def moved_class(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
 ) -> type[T]:
     """Deprecates a class that was moved to another location.
 
@@ -249,18 +428,32 @@ def moved_class(
     old_name = ".".join((old_module_name, old_class_name))
     new_name = _utils.get_class_name(new_class)
     prefix = _CLASS_MOVED_PREFIX_TPL % (old_name, new_name)
-    out_message = _utils.generate_message(
+    deprecation_id = _utils.register_deprecation(
+        'moved-class',
+        old_name,
+        version=version,
+        removal_version=removal_version,
+    )
+    out_message = _utils.make_message(
         prefix,
         message=message,
         version=version,
         removal_version=removal_version,
+        category=category,
+        deprecation_id=deprecation_id,
+        replacement=new_name,
     )
+    internal_callers = _utils.get_internal_callers(internal_package)
 
     def decorator(f: Callable[P, R]) -> Callable[P, R]:
         @functools.wraps(f, assigned=_utils.get_assigned(f))
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
             _utils.deprecation(
-                out_message, stacklevel=stacklevel, category=category
+                out_message,
+                stacklevel=stacklevel,
+                category=category,
+                deprecation_id=deprecation_id,
+                internal_callers=internal_callers,
             )
             return f(*args, **kwargs)
 
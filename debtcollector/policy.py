@@ -0,0 +1,525 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Policies that control what happens when a deprecation is hit.
+
+Every deprecation made by debtcollector has a stable identifier of the form
+``<kind>:<name>`` where the name is the fully qualified (dotted) name of the
+deprecated thing, for example ``function:mypackage.mymodule.old_function``
+or ``kwarg:mypackage.mymodule.func(old_arg)``. Policies can be set for a
+specific identifier or for a dotted name prefix (for example
+``mypackage.mymodule``), which then applies to every deprecated thing under
+that name; the policy for a deprecation is resolved once (preferring an
+exact identifier match, then the longest matching prefix) and is applied
+before the :mod:`warnings` module is invoked (so no warnings filter
+matching is done for deprecations that are ignored by a policy).
+
+The following actions are supported:
+
+* ``ignore``: nothing is emitted.
+* ``once``: only the first hit is passed on to the :mod:`warnings` module.
+* ``always``: every hit is passed on to the :mod:`warnings` module (this is
+  the behavior when no policy applies).
+* ``error``: the warning category is raised as an exception.
+* ``sample``: only one in every ``rate`` hits is passed on to the
+  :mod:`warnings` module.
+
+Policies can also be provided by a policy file (which operators can change
+without code changes), see :func:`.load_policy_file`. The file named by the
+``DEBTCOLLECTOR_POLICY_FILE`` environment variable (if set) is loaded when
+debtcollector is first imported; when the
+``DEBTCOLLECTOR_POLICY_RELOAD_ON_SIGHUP`` environment variable is also set
+(to a true value) that file is reloaded whenever the process receives
+``SIGHUP``. Policies set using :func:`.set_policy` take precedence over the
+ones provided by the policy file.
+"""
+
+from __future__ import annotations
+
+import _thread
+import atexit
+from collections.abc import Callable
+import configparser
+import fnmatch
+import json
+import logging
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import types
+from typing import Any
+
+from debtcollector import _utils
+
+LOG = logging.getLogger(__name__)
+
+#: Environment variable naming a policy file to load on import.
+POLICY_FILE_ENV = 'DEBTCOLLECTOR_POLICY_FILE'
+
+#: Environment variable that (when true) reloads that file on ``SIGHUP``.
+POLICY_RELOAD_ENV = 'DEBTCOLLECTOR_POLICY_RELOAD_ON_SIGHUP'
+
+#: Environment variable setting how overdue deprecations are handled.
+ENFORCE_REMOVAL_ENV = 'DEBTCOLLECTOR_ENFORCE_REMOVAL_VERSIONS'
+
+#: Overdue deprecations are logged when they are made.
+ENFORCE_LOG = 'log'
+
+#: Overdue deprecations are raised as errors (when they are used).
+ENFORCE_ERROR = _utils.ERROR
+
+IGNORE = _utils.IGNORE
+ONCE = _utils.ONCE
+ALWAYS = _utils.ALWAYS
+ERROR = _utils.ERROR
+SAMPLE = _utils.SAMPLE
+
+#: All the known policy actions.
+ACTIONS = (IGNORE, ONCE, ALWAYS, ERROR, SAMPLE)
+
+
+def _replace(
+    policies: dict[str, tuple[str, int]],
+    compiled: Callable[[str], tuple[str, int] | None] | None,
+) -> None:
+    # Swap (instead of mutate) so that emitting deprecations never has to
+    # take a lock to see a consistent set of policies. The policies are
+    # published before the (empty) cache of resolved ones, which resolving
+    # reads first: so whatever is resolved (and cached) in the new cache was
+    # resolved using the new policies.
+    _utils._policies = policies
+    _utils._compiled_policy = compiled
+    _utils._resolved_policies = {}
+    _utils._policy_active = (
+        bool(policies)
+        or compiled is not None
+        or any(d.overdue for d in _utils._deprecations.values())
+    )
+
+
+def _validate(action: str, rate: int) -> None:
+    if action not in ACTIONS:
+        raise ValueError(
+            f"Unknown policy action '{action}' (expected one of "
+            f"{', '.join(ACTIONS)})"
+        )
+    if rate < 1:
+        raise ValueError(f"Sample rate must be at least 1 (not {rate})")
+
+
+def set_policy(key: str, action: str, rate: int = 1) -> None:
+    """Sets the policy for a deprecation (or a dotted name prefix).
+
+    :param key: deprecation identifier (``<kind>:<name>``) or dotted name
+                prefix (``<package>[.<module>...]``) the policy applies to
+    :param action: one of :py:data:`.ACTIONS`
+    :param rate: for the ``sample`` action, one in every ``rate`` hits is
+                 passed on to the :mod:`warnings` module
+    """
+    _validate(action, rate)
+    policies = dict(_utils._policies)
+    policies[key] = (action, rate)
+    _replace(policies, _utils._compiled_policy)
+
+
+def remove_policy(key: str) -> None:
+    """Removes the policy for a deprecation (or a dotted name prefix)."""
+    policies = dict(_utils._policies)
+    policies.pop(key, None)
+    _replace(policies, _utils._compiled_policy)
+
+
+def clear_policies() -> None:
+    """Removes all policies (and forgets about prior hits).
+
+    This does not unload the policy file (if any), see
+    :func:`.unload_policy_file` for that.
+    """
+    _replace({}, _utils._compiled_policy)
+    _utils._policy_hits.clear()
+
+
+def get_policy(deprecation_id: str) -> str | None:
+    """Gets the action that applies to a deprecation (if any)."""
+    policy = _utils.resolve_policy(deprecation_id)
+    if policy is None:
+        return None
+    return policy[0]
+
+
+class PolicyRule:
+    """A rule (from a policy file) and the action it applies.
+
+    Exactly one of the ``id``, ``prefix``, ``glob`` or ``removal_version``
+    keys of a rule says what the rule matches: a deprecation identifier, a
+    dotted name prefix, a :mod:`fnmatch` pattern matched against the
+    deprecation identifier, or the version deprecated things will be removed
+    in (``?`` matching things with an unknown removal version).
+    """
+
+    MATCH_KEYS = ('id', 'prefix', 'glob', 'removal_version')
+
+    __slots__ = ('match_key', 'pattern', 'action', 'rate')
+
+    def __init__(
+        self, match_key: str, pattern: str, action: str, rate: int = 1
+    ):
+        if match_key not in self.MATCH_KEYS:
+            raise ValueError(f"Unknown policy rule key '{match_key}'")
+        _validate(action, rate)
+        self.match_key = match_key
+        self.pattern = pattern
+        self.action = action
+        self.rate = rate
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> PolicyRule:
+        """Creates a rule from its (policy file) definition."""
+        data = dict(data)
+        try:
+            action = data.pop('action')
+        except KeyError:
+            raise ValueError(f"Policy rule {data!r} has no action") from None
+        rate = int(data.pop('rate', 1))
+        if len(data) != 1:
+            raise ValueError(
+                f"Policy rule {data!r} must have exactly one of "
+                f"{', '.join(cls.MATCH_KEYS)}"
+            )
+        ((match_key, pattern),) = data.items()
+        return cls(match_key, str(pattern), action, rate=rate)
+
+    def matches(self, deprecation: _utils.Deprecation) -> bool:
+        """Checks if this rule applies to a deprecation."""
+        if self.match_key == 'id':
+            return deprecation.id == self.pattern
+        if self.match_key == 'prefix':
+            name = deprecation.name.partition('(')[0]
+            return name == self.pattern or name.startswith(self.pattern + '.')
+        if self.match_key == 'glob':
+            return fnmatch.fnmatchcase(deprecation.id, self.pattern)
+        return deprecation.removal_version == self.pattern
+
+    def __repr__(self) -> str:
+        return f'<PolicyRule {self.match_key}={self.pattern!r} {self.action}>'
+
+
+class _TrieNode:
+    __slots__ = ('children', 'rule')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.rule: PolicyRule | None = None
+
+
+class CompiledPolicy:
+    """Policy rules compiled for quick lookup.
+
+    Identifier rules are looked up in a dictionary and prefix rules in a
+    trie of dotted name components (so finding the longest matching prefix
+    costs at most the length of the name); glob rules are then tried in
+    order, followed by the removal version rules.
+    """
+
+    def __init__(self, rules: list[PolicyRule]):
+        self.rules = list(rules)
+        self._exact: dict[str, PolicyRule] = {}
+        self._trie = _TrieNode()
+        self._globs: list[tuple[re.Pattern[str], PolicyRule]] = []
+        self._removal_versions: dict[str, PolicyRule] = {}
+        for rule in self.rules:
+            if rule.match_key == 'id':
+                self._exact.setdefault(rule.pattern, rule)
+            elif rule.match_key == 'prefix':
+                node = self._trie
+                for part in rule.pattern.split('.'):
+                    node = node.children.setdefault(part, _TrieNode())
+                if node.rule is None:
+                    node.rule = rule
+            elif rule.match_key == 'glob':
+                regex = re.compile(fnmatch.translate(rule.pattern))
+                self._globs.append((regex, rule))
+            else:
+                self._removal_versions.setdefault(rule.pattern, rule)
+
+    def find_rule(self, deprecation_id: str) -> PolicyRule | None:
+        """Finds the rule that applies to a deprecation (if any)."""
+        rule = self._exact.get(deprecation_id)
+        if rule is not None:
+            return rule
+        node = self._trie
+        name = _utils.get_deprecated_name(deprecation_id).partition('(')[0]
+        for part in name.split('.'):
+            child = node.children.get(part)
+            if child is None:
+                break
+            node = child
+            if node.rule is not None:
+                rule = node.rule
+        if rule is not None:
+            return rule
+        for regex, glob_rule in self._globs:
+            if regex.match(deprecation_id):
+                return glob_rule
+        deprecation = _utils._deprecations.get(deprecation_id)
+        if deprecation is not None and deprecation.removal_version:
+            return self._removal_versions.get(deprecation.removal_version)
+        return None
+
+    def __call__(self, deprecation_id: str) -> tuple[str, int] | None:
+        rule = self.find_rule(deprecation_id)
+        if rule is None:
+            return None
+        return (rule.action, rule.rate)
+
+    def unmatched_rules(self) -> list[PolicyRule]:
+        """Finds the rules that do not match any known deprecation."""
+        deprecations = list(_utils._deprecations.values())
+        return [
+            rule
+            for rule in self.rules
+            if not any(rule.matches(d) for d in deprecations)
+        ]
+
+
+def _read_policy_file(path: str) -> list[dict[str, Any]]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        return list(data.get('rules', []))
+    if ext == '.toml':
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            try:
+                import tomli as tomllib  # type: ignore[import-not-found]
+            except ImportError:
+                raise RuntimeError(
+                    f"Unable to load policy file '{path}' (reading TOML "
+                    f"files requires python 3.11+ or the tomli library)"
+                ) from None
+        with open(path, 'rb') as fh:
+            data = tomllib.load(fh)
+        return list(data.get('rules', []))
+    if ext in ('.ini', '.cfg', '.conf'):
+        parser = configparser.ConfigParser(interpolation=None)
+        with open(path, encoding='utf-8') as fh:
+            parser.read_file(fh)
+        return [dict(parser[section]) for section in parser.sections()]
+    raise ValueError(
+        f"Unable to load policy file '{path}' (unknown file type '{ext}', "
+        f"expected one of .json, .toml, .ini, .cfg or .conf)"
+    )
+
+
+def compile_rules(rules: list[dict[str, Any]]) -> CompiledPolicy:
+    """Compiles policy rule definitions (as found in policy files)."""
+    return CompiledPolicy([PolicyRule.from_dict(rule) for rule in rules])
+
+
+_policy_file: str | None = None
+_policy_file_lock = threading.Lock()
+
+
+# Requests to reload the policy file made by signal handlers, handled by a
+# (daemon) reloader thread so that signal handlers never do I/O nor take
+# locks (which the interrupted code may hold); putting in a simple queue is
+# reentrant, so it is safe to do from signal handlers.
+_reload_requests: queue.SimpleQueue[None] | None = None
+# Process the reloader thread runs in (threads are not forked, so children
+# start their own reloader when first asked to reload).
+_reloader_pid: int | None = None
+
+
+def _reload_in_background(requests: queue.SimpleQueue[None]) -> None:
+    while True:
+        requests.get()
+        try:
+            reload_policy_file()
+        except Exception:
+            LOG.exception("Failed reloading policy file '%s'", _policy_file)
+
+
+def _get_reload_requests() -> queue.SimpleQueue[None]:
+    global _reload_requests, _reloader_pid
+    requests = _reload_requests
+    pid = os.getpid()
+    if requests is None or _reloader_pid != pid:
+        requests = queue.SimpleQueue()
+        # This may be called from signal handlers, and the low-level API
+        # (unlike the threading module) takes no lock the interrupted code
+        # may hold; the thread does not keep the process alive either.
+        _thread.start_new_thread(_reload_in_background, (requests,))
+        _reload_requests = requests
+        _reloader_pid = pid
+    return requests
+
+
+def _after_fork_in_child() -> None:
+    # A thread of the parent may have held it while forking.
+    global _policy_file_lock
+    _policy_file_lock = threading.Lock()
+
+
+_utils.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def load_policy_file(path: str) -> CompiledPolicy:
+    """Loads (and starts using) the policy rules in a policy file.
+
+    The file type is determined by its extension; JSON (``.json``) and TOML
+    (``.toml``) files are expected to contain a ``rules`` list, while each
+    section of an INI (``.ini``, ``.cfg`` or ``.conf``) file is a rule. Each
+    rule has an ``action`` (and an optional sample ``rate``) and one of the
+    :py:attr:`.PolicyRule.MATCH_KEYS`, for example (in TOML)::
+
+        [[rules]]
+        prefix = "mypackage.oldmodule"
+        action = "ignore"
+
+        [[rules]]
+        glob = "kwarg:mypackage.*"
+        action = "sample"
+        rate = 100
+
+    Loading a new file (or reloading the same one) replaces the rules
+    previously loaded; the rules are compiled (see :class:`.CompiledPolicy`)
+    and swapped in as a whole, so emitting deprecations never waits on (or
+    sees a partially) loaded policy file.
+    """
+    global _policy_file
+    with _policy_file_lock:
+        compiled = compile_rules(_read_policy_file(path))
+        _policy_file = path
+        _replace(_utils._policies, compiled)
+    return compiled
+
+
+def reload_policy_file() -> CompiledPolicy | None:
+    """Reloads the last loaded policy file (if any)."""
+    path = _policy_file
+    if path is None:
+        return None
+    return load_policy_file(path)
+
+
+def unload_policy_file() -> None:
+    """Stops using the policy rules of the last loaded policy file."""
+    global _policy_file
+    with _policy_file_lock:
+        _policy_file = None
+        _replace(_utils._policies, None)
+
+
+def unmatched_rules() -> list[PolicyRule]:
+    """Gets the policy file rules that do not match any known deprecation.
+
+    Only deprecations that have been made so far (typically by importing the
+    modules that contain them) are known about.
+    """
+    compiled = _utils._compiled_policy
+    if not isinstance(compiled, CompiledPolicy):
+        return []
+    return compiled.unmatched_rules()
+
+
+def report_unmatched_rules() -> None:
+    """Logs the policy file rules that do not match any known deprecation."""
+    for rule in unmatched_rules():
+        LOG.warning(
+            "Policy file '%s' rule %r does not match any deprecation",
+            _policy_file,
+            rule,
+        )
+
+
+def reload_on_signal(signum: int | None = None) -> None:
+    """Reloads the last loaded policy file whenever a signal is received.
+
+    The signal (``SIGHUP`` when not provided) handler only asks a (daemon)
+    reloader thread to reload the file, so the code it interrupts can hold
+    any lock (even while loading a policy file). Processes forked afterwards
+    (which keep the handler) start their own reloader thread when they first
+    receive the signal. Any previously installed signal handler is called
+    afterwards.
+    """
+    if signum is None:
+        signum = signal.SIGHUP
+    previous = signal.getsignal(signum)
+
+    def handler(signum: int, frame: types.FrameType | None) -> None:
+        _get_reload_requests().put(None)
+        if callable(previous):
+            previous(signum, frame)
+
+    _get_reload_requests()
+    signal.signal(signum, handler)
+
+
+def enforce_removal_versions(mode: str | None) -> None:
+    """Sets how deprecations overdue for removal are handled.
+
+    A deprecation is overdue when the installed version of the distribution
+    providing its (top-level) package is at (or past) the removal version
+    of the deprecation. This is checked when things are deprecated (and
+    when this is called, for the deprecations made so far) and not each
+    time something deprecated is used.
+
+    :param mode: ``None`` to not check removal versions (the default),
+                 ``'log'`` to log overdue deprecations when they are made,
+                 or ``'error'`` to raise the warning category of overdue
+                 deprecations as errors when they are used (unless another
+                 policy applies to them)
+    """
+    if mode not in (None, ENFORCE_LOG, ENFORCE_ERROR):
+        raise ValueError(
+            f"Unknown removal version enforcement mode '{mode}' (expected "
+            f"one of {ENFORCE_LOG} or {ENFORCE_ERROR})"
+        )
+    _utils._removal_enforcement = mode
+    for deprecation in list(_utils._deprecations.values()):
+        deprecation.overdue = False
+        if mode is not None:
+            _utils.check_removal(deprecation)
+    _replace(_utils._policies, _utils._compiled_policy)
+
+
+def _load_from_environment() -> None:
+    mode = os.environ.get(ENFORCE_REMOVAL_ENV)
+    if mode:
+        try:
+            enforce_removal_versions(mode.lower())
+        except ValueError:
+            LOG.exception("Invalid %s value", ENFORCE_REMOVAL_ENV)
+    path = os.environ.get(POLICY_FILE_ENV)
+    if not path:
+        return
+    try:
+        load_policy_file(path)
+    except Exception:
+        LOG.exception("Failed loading policy file '%s'", path)
+        return
+    atexit.register(report_unmatched_rules)
+    if os.environ.get(POLICY_RELOAD_ENV, '').lower() in ('1', 'true', 'yes'):
+        try:
+            reload_on_signal()
+        except ValueError:
+            # Not the main thread (so signals can not be handled).
+            LOG.warning(
+                "Unable to reload policy file '%s' on SIGHUP (debtcollector "
+                "was not imported from the main thread)",
+                path,
+            )
@@ -0,0 +1,294 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Pytest plugin reporting the deprecations hit by a test run.
+
+When enabled (with ``--debtcollector``, or any of the options below) every
+hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) is counted, directly by debtcollector (so
+whatever the warnings filters are), per calling location and per test. A
+table of the deprecations hit (and by which tests) is shown at the end of
+the run and the counts can be written as JSON with
+``--debtcollector-report=<path>``.
+
+With `pytest-xdist`_ each worker only sends its counts (a compact list of
+them, not the hits) back to the controller once done, where they are
+merged.
+
+Usages (a deprecation along with the module and function calling it) can
+be stored with ``--debtcollector-write-baseline=<path>``; runs given that
+file with ``--debtcollector-baseline=<path>`` then fail when deprecations
+are used anywhere else (usages that went away are fine).
+
+The plugin is installed (as ``debtcollector.pytest_plugin``) with
+debtcollector; otherwise enable it with ``-p debtcollector.pytest_plugin``.
+
+.. _pytest-xdist: https://pypi.org/project/pytest-xdist/
+"""
+
+from __future__ import annotations
+
+import json
+import types
+from typing import Any
+
+from debtcollector import _utils
+
+# Key of the counts in the output sent by xdist workers.
+_WORKER_OUTPUT_KEY = 'debtcollector'
+# Exit code of runs that failed (see :class:`pytest.ExitCode`).
+_TESTS_FAILED = 1
+# Name tests are reported as for hits made outside of any test (like while
+# test modules are collected).
+NO_TEST = '<no test>'
+
+
+class HitCounts:
+    """Hits of deprecations counted per calling location and per test."""
+
+    def __init__(self) -> None:
+        #: Node identifier of the test being run (if any).
+        self.nodeid = NO_TEST
+        # (deprecation id, module, function) -> hits
+        self.callers: dict[tuple[str, str, str], int] = {}
+        # (deprecation id, test node id) -> hits
+        self.tests: dict[tuple[str, str], int] = {}
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        code = frame.f_code
+        key = (
+            deprecation_id,
+            str(frame.f_globals.get('__name__', '?')),
+            getattr(code, 'co_qualname', code.co_name),
+        )
+        self.callers[key] = self.callers.get(key, 0) + 1
+        test_key = (deprecation_id, self.nodeid)
+        self.tests[test_key] = self.tests.get(test_key, 0) + 1
+
+    def to_dict(self) -> dict[str, list[list[Any]]]:
+        """Gets the counts (as plain lists, that can be serialized)."""
+        return {
+            'callers': [[*key, hits] for key, hits in self.callers.items()],
+            'tests': [[*key, hits] for key, hits in self.tests.items()],
+        }
+
+    def merge_dict(self, counts: dict[str, list[list[Any]]]) -> None:
+        """Adds counts (as gotten from :meth:`.to_dict`) to these ones."""
+        for deprecation_id, module, function, hits in counts['callers']:
+            key = (deprecation_id, module, function)
+            self.callers[key] = self.callers.get(key, 0) + hits
+        for deprecation_id, nodeid, hits in counts['tests']:
+            test_key = (deprecation_id, nodeid)
+            self.tests[test_key] = self.tests.get(test_key, 0) + hits
+
+    def usages(self) -> set[tuple[str, str, str]]:
+        """Gets the (deprecation id, module, function) usages made."""
+        return set(self.callers)
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Gets the hits per deprecation (most hit first)."""
+        by_id: dict[str, dict[str, Any]] = {}
+        for (deprecation_id, module, function), hits in self.callers.items():
+            row = by_id.setdefault(
+                deprecation_id,
+                {'id': deprecation_id, 'hits': 0, 'callers': [], 'tests': {}},
+            )
+            row['hits'] += hits
+            row['callers'].append(
+                {'module': module, 'function': function, 'hits': hits}
+            )
+        for (deprecation_id, nodeid), hits in self.tests.items():
+            by_id[deprecation_id]['tests'][nodeid] = hits
+        rows = sorted(
+            by_id.values(), key=lambda row: (-row['hits'], row['id'])
+        )
+        for row in rows:
+            row['callers'].sort(
+                key=lambda caller: (
+                    -caller['hits'],
+                    caller['module'],
+                    caller['function'],
+                )
+            )
+        return rows
+
+
+def read_baseline(path: str) -> set[tuple[str, str, str]]:
+    """Reads the usages stored in a baseline file."""
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return {
+        (deprecation_id, module, function)
+        for deprecation_id, module, function in data['usages']
+    }
+
+
+def write_baseline(path: str, usages: set[tuple[str, str, str]]) -> None:
+    """Writes usages to a baseline file."""
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'usages': sorted(usages)}, fh, indent=1)
+        fh.write('\n')
+
+
+class DeprecationsPlugin:
+    """Counts the hits of deprecations made by the tests (and reports them).
+
+    :param config: the pytest configuration
+    """
+
+    def __init__(self, config: Any):
+        self.config = config
+        self.counts = HitCounts()
+        self.new_usages: set[tuple[str, str, str]] = set()
+        # Workers (of pytest-xdist) send their counts back instead.
+        self.is_worker = hasattr(config, 'workerinput')
+        _utils.add_observer(self.counts.record)
+
+    def pytest_runtest_logstart(
+        self, nodeid: str, location: tuple[str, int | None, str]
+    ) -> None:
+        self.counts.nodeid = nodeid
+
+    def pytest_runtest_logfinish(
+        self, nodeid: str, location: tuple[str, int | None, str]
+    ) -> None:
+        self.counts.nodeid = NO_TEST
+
+    def pytest_sessionfinish(self, session: Any, exitstatus: int) -> None:
+        _utils.remove_observer(self.counts.record)
+        if self.is_worker:
+            self.config.workeroutput[_WORKER_OUTPUT_KEY] = (
+                self.counts.to_dict()
+            )
+            return
+        options = self.config.option
+        usages = self.counts.usages()
+        if options.debtcollector_baseline:
+            self.new_usages = usages - read_baseline(
+                options.debtcollector_baseline
+            )
+            if self.new_usages and session.exitstatus == 0:
+                session.exitstatus = _TESTS_FAILED
+        if options.debtcollector_write_baseline:
+            write_baseline(options.debtcollector_write_baseline, usages)
+        if options.debtcollector_report:
+            report = {
+                'deprecations': self.counts.rows(),
+                'new_usages': sorted(self.new_usages),
+            }
+            with open(
+                options.debtcollector_report, 'w', encoding='utf-8'
+            ) as fh:
+                json.dump(report, fh, indent=1)
+                fh.write('\n')
+
+    def pytest_unconfigure(self, config: Any) -> None:
+        _utils.remove_observer(self.counts.record)
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        if self.is_worker:
+            return
+        terminalreporter.write_sep('=', 'debtcollector deprecations')
+        rows = self.counts.rows()
+        if not rows:
+            terminalreporter.write_line('No deprecation hit.')
+        max_tests = self.config.option.debtcollector_max_tests
+        for row in rows:
+            tests = row['tests']
+            terminalreporter.write_line(
+                f"{row['hits']:>8} hit(s) by {len(tests):>6} test(s)  "
+                f"{row['id']}"
+            )
+            top = sorted(tests.items(), key=lambda item: (-item[1], item[0]))
+            for nodeid, hits in top[:max_tests]:
+                terminalreporter.write_line(f'{hits:>8}  {nodeid}')
+            if len(top) > max_tests:
+                terminalreporter.write_line(
+                    f'{"":>8}  ... and {len(top) - max_tests} more test(s)'
+                )
+        if self.new_usages:
+            terminalreporter.write_sep(
+                '-', 'new deprecation usages (not in the baseline)', red=True
+            )
+            for deprecation_id, module, function in sorted(self.new_usages):
+                terminalreporter.write_line(
+                    f'{deprecation_id} used by {module}:{function}', red=True
+                )
+
+
+class _XdistController:
+    # Merges the counts sent by each worker of pytest-xdist (only registered
+    # when it is in use, as pytest rejects hooks it does not know about).
+
+    def __init__(self, plugin: DeprecationsPlugin):
+        self.plugin = plugin
+
+    def pytest_testnodedown(self, node: Any, error: Any) -> None:
+        output = getattr(node, 'workeroutput', {})
+        counts = output.get(_WORKER_OUTPUT_KEY)
+        if counts is not None:
+            self.plugin.counts.merge_dict(counts)
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup(
+        'debtcollector', 'deprecations hit (debtcollector)'
+    )
+    group.addoption(
+        '--debtcollector',
+        action='store_true',
+        default=False,
+        help='Report the deprecations hit by the tests.',
+    )
+    group.addoption(
+        '--debtcollector-report',
+        metavar='PATH',
+        default=None,
+        help='Write the deprecations hit (as JSON) to a file.',
+    )
+    group.addoption(
+        '--debtcollector-baseline',
+        metavar='PATH',
+        default=None,
+        help='Fail when deprecations are used where the baseline file '
+        'does not tell they are.',
+    )
+    group.addoption(
+        '--debtcollector-write-baseline',
+        metavar='PATH',
+        default=None,
+        help='Write the deprecation usages made to a baseline file.',
+    )
+    group.addoption(
+        '--debtcollector-max-tests',
+        metavar='N',
+        type=int,
+        default=5,
+        help='Number of tests shown for each deprecation (default: 5).',
+    )
+
+
+def pytest_configure(config: Any) -> None:
+    options = config.option
+    if not (
+        options.debtcollector
+        or options.debtcollector_report
+        or options.debtcollector_baseline
+        or options.debtcollector_write_baseline
+    ):
+        return
+    plugin = DeprecationsPlugin(config)
+    config.pluginmanager.register(plugin, 'debtcollector-deprecations')
+    if not plugin.is_worker and config.pluginmanager.hasplugin('xdist'):
+        config.pluginmanager.register(
+            _XdistController(plugin), 'debtcollector-xdist'
+        )
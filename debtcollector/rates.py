@@ -0,0 +1,309 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Rates of deprecation hits over sliding time windows.
+
+When enabled, every hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) is counted in a ring of time buckets for each
+of the windows tracked (by default the last minute, five minutes and hour,
+each split in 60 buckets), so that memory use is fixed (per deprecation)
+however many hits are made, and so that whether the use of a deprecated
+thing is going down (or not) can be told.
+
+Counting a hit only takes integer arithmetic: the (monotonic) clock is
+divided by the width of the buckets of each window, which gives the index
+of the bucket (and the slot of the ring it goes in); slots are reused (and
+reset) once their bucket has gone out of the window. Windows are read as
+the sum of their buckets still in them (so the oldest bucket may be partly
+out of the window, and the newest one partly filled).
+
+Each thread counts in rings of its own (so threads never lose each other's
+increments, nor reset each other's slots), which are summed when rates are
+read; the rings of threads that are gone are folded into one set of rings.
+
+The rates can be gotten with :func:`.get_rates` and rendered in the
+Prometheus text format (for example to a file read by the textfile
+collector of the node exporter) with :func:`.render_prometheus` and
+:func:`.write_prometheus`. Rates are per process (and start over in forked
+children).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+import os
+import tempfile
+import threading
+import time
+import types
+from typing import Any
+import weakref
+
+from debtcollector import _utils
+
+#: Default windows (name, length in seconds) rates are tracked over.
+DEFAULT_WINDOWS: tuple[tuple[str, int], ...] = (
+    ('1m', 60),
+    ('5m', 300),
+    ('1h', 3600),
+)
+
+#: Default number of buckets each window is split in.
+DEFAULT_BUCKETS = 60
+
+_NANOSECONDS = 1_000_000_000
+
+
+class WindowedRates:
+    """Hits of deprecations counted in rings of time buckets.
+
+    :param windows: the windows (name, length in seconds) to track
+    :param buckets: number of buckets each window is split in (the length
+                    of each window must be a multiple of it, in nanoseconds)
+    :param clock: monotonic clock (in nanoseconds)
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[tuple[str, int]] = DEFAULT_WINDOWS,
+        buckets: int = DEFAULT_BUCKETS,
+        clock: Callable[[], int] = time.monotonic_ns,
+    ):
+        if buckets < 1:
+            raise ValueError(
+                f"Buckets must be greater than zero (not {buckets})"
+            )
+        widths = []
+        for name, seconds in windows:
+            width, remainder = divmod(seconds * _NANOSECONDS, buckets)
+            if width < 1 or remainder:
+                raise ValueError(
+                    f"Window '{name}' ({seconds} seconds) can not be split "
+                    f"in {buckets} buckets"
+                )
+            widths.append(width)
+        self.windows = tuple(windows)
+        self.buckets = buckets
+        self._widths = tuple(widths)
+        self._clock = clock
+        self.clear()
+
+    def clear(self) -> None:
+        """Forgets all the hits counted."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (thread, deprecation id -> per window (bucket indexes, counts)
+        # rings) of each thread that counted hits
+        self._shards: list[
+            tuple[weakref.ref[threading.Thread], dict[str, list[Any]]]
+        ] = []
+        # Rings of the threads that are gone.
+        self._retired: dict[str, list[tuple[list[int], list[int]]]] = {}
+
+    def _add_shard(self) -> dict[str, list[Any]]:
+        shard: dict[str, list[Any]] = {}
+        with self._lock:
+            self._retire()
+            self._shards.append(
+                (weakref.ref(threading.current_thread()), shard)
+            )
+        self._local.rings = shard
+        return shard
+
+    def _new_rings(self) -> list[tuple[list[int], list[int]]]:
+        return [
+            ([-1] * self.buckets, [0] * self.buckets)
+            for _width in self._widths
+        ]
+
+    def _retire(self) -> None:
+        # Folds the rings of threads that are gone (with our lock held).
+        live = []
+        for shard in self._shards:
+            thread = shard[0]()
+            if thread is not None and thread.is_alive():
+                live.append(shard)
+                continue
+            for deprecation_id, rings in list(shard[1].items()):
+                retired = self._retired.get(deprecation_id)
+                if retired is None:
+                    retired = self._retired[deprecation_id] = self._new_rings()
+                for (indexes, counts), (into_indexes, into_counts) in zip(
+                    rings, retired
+                ):
+                    for slot, index in enumerate(indexes):
+                        # Keep the newest bucket of each slot.
+                        if index == into_indexes[slot]:
+                            into_counts[slot] += counts[slot]
+                        elif index > into_indexes[slot]:
+                            into_indexes[slot] = index
+                            into_counts[slot] = counts[slot]
+        self._shards = live
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        try:
+            shard = self._local.rings
+        except AttributeError:
+            shard = self._add_shard()
+        rings = shard.get(deprecation_id)
+        if rings is None:
+            rings = shard[deprecation_id] = self._new_rings()
+        now = self._clock()
+        buckets = self.buckets
+        for width, (indexes, counts) in zip(self._widths, rings):
+            index = now // width
+            slot = index % buckets
+            if indexes[slot] == index:
+                counts[slot] += 1
+            else:
+                indexes[slot] = index
+                counts[slot] = 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Gets the hits per deprecation in each window (by name)."""
+        with self._lock:
+            self._retire()
+            shards = [self._retired] + [shard for _t, shard in self._shards]
+        now = self._clock()
+        buckets = self.buckets
+        result: dict[str, dict[str, int]] = {}
+        for shard in shards:
+            for deprecation_id, rings in list(shard.items()):
+                hits = result.setdefault(
+                    deprecation_id,
+                    {name: 0 for name, _seconds in self.windows},
+                )
+                for (name, _seconds), width, (indexes, counts) in zip(
+                    self.windows, self._widths, rings
+                ):
+                    oldest = now // width - buckets
+                    hits[name] += sum(
+                        count
+                        for index, count in zip(indexes, counts)
+                        if index > oldest
+                    )
+        return result
+
+
+_rates: WindowedRates | None = None
+
+
+def enable(
+    windows: Sequence[tuple[str, int]] = DEFAULT_WINDOWS,
+    buckets: int = DEFAULT_BUCKETS,
+) -> WindowedRates:
+    """Starts tracking the rates of deprecation hits.
+
+    Any rates tracked so far are discarded (see :class:`.WindowedRates` for
+    the parameters).
+    """
+    global _rates
+    disable()
+    rates = WindowedRates(windows=windows, buckets=buckets)
+    _rates = rates
+    _utils.add_observer(rates.record)
+    return rates
+
+
+def disable() -> None:
+    """Stops tracking the rates of deprecation hits (discarding them)."""
+    global _rates
+    rates = _rates
+    if rates is None:
+        return
+    _rates = None
+    _utils.remove_observer(rates.record)
+
+
+def get_rates() -> dict[str, dict[str, float]]:
+    """Gets the hits per second of each deprecation over each window.
+
+    :returns: deprecation identifier -> window name -> hits per second
+    """
+    rates = _rates
+    if rates is None:
+        return {}
+    seconds = dict(rates.windows)
+    return {
+        deprecation_id: {
+            name: count / seconds[name] for name, count in hits.items()
+        }
+        for deprecation_id, hits in rates.snapshot().items()
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_prometheus(prefix: str = 'debtcollector') -> str:
+    """Renders the rates in the Prometheus text (exposition) format.
+
+    Two gauges are rendered, ``<prefix>_deprecation_hits`` (the hits in
+    each window) and ``<prefix>_deprecation_hits_per_second``, both with
+    ``id`` and ``window`` labels.
+    """
+    rates = _rates
+    if rates is None:
+        return ''
+    seconds = dict(rates.windows)
+    snapshot = sorted(rates.snapshot().items())
+    lines = []
+    for metric, help_text, per_second in (
+        ('deprecation_hits', 'Hits of deprecations in a window', False),
+        (
+            'deprecation_hits_per_second',
+            'Hits per second of deprecations over a window',
+            True,
+        ),
+    ):
+        name = f'{prefix}_{metric}'
+        lines.append(f'# HELP {name} {help_text}.')
+        lines.append(f'# TYPE {name} gauge')
+        for deprecation_id, hits in snapshot:
+            for window, count in hits.items():
+                value = count / seconds[window] if per_second else count
+                lines.append(
+                    f'{name}{{id="{_escape(deprecation_id)}",'
+                    f'window="{_escape(window)}"}} {value}'
+                )
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def write_prometheus(path: str, prefix: str = 'debtcollector') -> None:
+    """Writes the rates (see :func:`.render_prometheus`) to a file.
+
+    The file is replaced atomically (so that readers, like the textfile
+    collector of the node exporter, never read a partly written file).
+    """
+    text = render_prometheus(prefix=prefix)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.debtcollector')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(text)
+        # Readable by others (like the file would be if simply written).
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _after_fork_in_child() -> None:
+    rates = _rates
+    if rates is not None:
+        rates.clear()
+
+
+_utils.register_at_fork(after_in_child=_after_fork_in_child)
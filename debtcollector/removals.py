@@ -18,11 +18,14 @@ import builtins
 from collections.abc import Callable
 import functools
 import inspect
+import sys
+import threading
 import types
 from typing import Any
 from typing import overload
 from typing import ParamSpec
 from typing import TypeVar
+import weakref
 
 import wrapt
 
@@ -54,6 +57,32 @@ def _fetch_first_result(
     return value_not_found
 
 
+class _PropertyMessages:
+    """Precomputed messages shared by copies of a :class:`.removed_property`.
+
+    These are made once (when the owning class is created) so that
+    accessing, setting or deleting the property never has to format (or
+    look up) its deprecation message. They are never changed once made (new
+    ones are swapped in instead) so that threads can read them without
+    locking and never see partially made messages.
+    """
+
+    __slots__ = ('get', 'set', 'delete', 'deprecation_id')
+
+    def __init__(
+        self,
+        get: str | _utils.DebtCollectorWarning = '',
+        set: str | _utils.DebtCollectorWarning = '',
+        delete: str | _utils.DebtCollectorWarning = '',
+        deprecation_id: str = '',
+    ) -> None:
+        # These stay empty until finalized.
+        self.get = get
+        self.set = set
+        self.delete = delete
+        self.deprecation_id = deprecation_id
+
+
 class removed_property(property):
     """Property descriptor that deprecates a property.
 
@@ -87,7 +116,7 @@ class removed_property(property):
     version: str | None
     removal_version: str | None
     message: str | None
-    _message_cache: dict[str, str]
+    _messages: _PropertyMessages
 
     def __init__(
         self,
@@ -109,28 +138,66 @@ class removed_property(property):
         self.version = version
         self.removal_version = removal_version
         self.message = message
-        self._message_cache = {}
+        self._messages = _PropertyMessages()
 
-    def _fetch_message_from_cache(self, kind: str) -> str:
-        try:
-            out_message = self._message_cache[kind]
-        except KeyError:
-            prefix_tpl = self._PROPERTY_GONE_TPLS[kind]
-            prefix = prefix_tpl % _fetch_first_result(
-                self.fget,
-                self.fset,
-                self.fdel,
-                _get_qualified_name,
-                value_not_found="???",
-            )
-            out_message = _utils.generate_message(
-                prefix,
+    def _copy(
+        self,
+        fget: Callable[[Any], Any] | None,
+        fset: Callable[[Any, Any], None] | None,
+        fdel: Callable[[Any], None] | None,
+    ) -> removed_property:
+        prop = type(self)(
+            fget,
+            fset,
+            fdel,
+            self.__doc__,
+            self.stacklevel,
+            self.category,
+            self.version,
+            self.removal_version,
+            self.message,
+        )
+        # The message settings are the same, so the messages can be too.
+        prop._messages = self._messages
+        return prop
+
+    def _finalize(self) -> _PropertyMessages:
+        name = _fetch_first_result(
+            self.fget,
+            self.fset,
+            self.fdel,
+            _get_qualified_name,
+            value_not_found="???",
+        )
+        full_name = _fetch_first_result(
+            self.fget, self.fset, self.fdel, _utils.get_full_name
+        )
+        deprecation_id = _utils.register_deprecation(
+            'property',
+            full_name or "???",
+            version=self.version,
+            removal_version=self.removal_version,
+        )
+        out_messages = {
+            kind: _utils.make_message(
+                prefix_tpl % name,
                 message=self.message,
                 version=self.version,
                 removal_version=self.removal_version,
+                category=self.category,
+                deprecation_id=deprecation_id,
             )
-            self._message_cache[kind] = out_message
-        return out_message
+            for kind, prefix_tpl in self._PROPERTY_GONE_TPLS.items()
+        }
+        # Swapped in as a whole (copies of us made before now, which may
+        # have other functions, finalize their own when used).
+        messages = self._messages = _PropertyMessages(
+            deprecation_id=deprecation_id, **out_messages
+        )
+        return messages
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._finalize()
 
     def __call__(
         self,
@@ -152,18 +219,29 @@ class removed_property(property):
     def __delete__(self, obj: Any) -> None:
         if self.fdel is None:
             raise AttributeError("can't delete attribute")
-        out_message = self._fetch_message_from_cache('delete')
+        messages = self._messages
+        if not messages.deprecation_id:
+            # Not attached to a class via its body (so never finalized).
+            messages = self._finalize()
         _utils.deprecation(
-            out_message, stacklevel=self.stacklevel, category=self.category
+            messages.delete,
+            stacklevel=self.stacklevel,
+            category=self.category,
+            deprecation_id=messages.deprecation_id,
         )
         self.fdel(obj)
 
     def __set__(self, instance: Any, value: Any) -> None:
         if self.fset is None:
             raise AttributeError("can't set attribute")
-        out_message = self._fetch_message_from_cache('set')
+        messages = self._messages
+        if not messages.deprecation_id:
+            messages = self._finalize()
         _utils.deprecation(
-            out_message, stacklevel=self.stacklevel, category=self.category
+            messages.set,
+            stacklevel=self.stacklevel,
+            category=self.category,
+            deprecation_id=messages.deprecation_id,
         )
         self.fset(instance, value)
 
@@ -172,50 +250,303 @@ class removed_property(property):
             return self
         if self.fget is None:
             raise AttributeError("unreadable attribute")
-        out_message = self._fetch_message_from_cache('get')
+        messages = self._messages
+        if not messages.deprecation_id:
+            messages = self._finalize()
         _utils.deprecation(
-            out_message, stacklevel=self.stacklevel, category=self.category
+            messages.get,
+            stacklevel=self.stacklevel,
+            category=self.category,
+            deprecation_id=messages.deprecation_id,
         )
         return self.fget(instance)
 
     def getter(self, fget: Callable[[Any], Any], /) -> removed_property:
-        return type(self)(
-            fget,
-            self.fset,
-            self.fdel,
-            self.__doc__,
-            self.stacklevel,
-            self.category,
-            self.version,
-            self.removal_version,
-            self.message,
-        )
+        return self._copy(fget, self.fset, self.fdel)
 
     def setter(self, fset: Callable[[Any, Any], None], /) -> removed_property:
-        return type(self)(
-            self.fget,
-            fset,
-            self.fdel,
-            self.__doc__,
-            self.stacklevel,
-            self.category,
-            self.version,
-            self.removal_version,
-            self.message,
-        )
+        return self._copy(self.fget, fset, self.fdel)
 
     def deleter(self, fdel: Callable[[Any], None], /) -> removed_property:
+        return self._copy(self.fget, self.fset, fdel)
+
+
+_NOT_FOUND = object()
+
+# Every removed cached property, so that their locks (which a thread of the
+# parent may have held while forking) are replaced in children.
+_cached_properties: weakref.WeakSet[removed_cached_property] = (
+    weakref.WeakSet()
+)
+
+
+def _after_fork_in_child() -> None:
+    for cached_property in list(_cached_properties):
+        cached_property._lock = threading.Lock()
+        cached_property._computing = {}
+
+
+_utils.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class removed_cached_property:
+    """Cached property descriptor that deprecates a (computed) property.
+
+    This works like the :py:func:`functools.cached_property` descriptor but
+    can be used instead to provide the same functionality and also interact
+    with the :mod:`warnings` module to warn when the value of the property
+    is computed (which happens on first access). The computed value is then
+    stored in the instance ``__dict__`` so that later reads never touch this
+    descriptor (and are not warned about); deleting the attribute
+    invalidates the stored value so that it is computed (and warned about)
+    again on the next access.
+
+    The first computation for an instance is done while holding a lock of
+    that instance (so that concurrent first accesses of an instance compute,
+    and warn, only once, without waiting on the computations made for other
+    instances).
+
+    :param message: string used as ending contents of the deprecate message
+    :param version: version string (represents the version this deprecation
+                    was created in)
+    :param removal_version: version string (represents the version this
+                            deprecation will be removed in); a string
+                            of '?' will denote this will be removed in
+                            some future unknown version
+    :param stacklevel: stacklevel used in the :func:`warnings.warn` function
+                       to locate where the users code is when reporting the
+                       deprecation call (the default being 3)
+    :param category: the :mod:`warnings` category to use, defaults to
+                     :py:class:`DeprecationWarning` if not provided
+    :param once_per_class: when true only the first computation done for
+                           each class is warned about (instead of the first
+                           computation done for each instance)
+    """
+
+    _PROPERTY_GONE_TPL = "Reading the '%s' property is deprecated"
+
+    def __init__(
+        self,
+        func: Callable[[Any], Any] | None = None,
+        stacklevel: int = 3,
+        category: type[Warning] = DeprecationWarning,
+        version: str | None = None,
+        removal_version: str | None = None,
+        message: str | None = None,
+        once_per_class: bool = False,
+    ):
+        self.func = func
+        self.stacklevel = stacklevel
+        self.category = category
+        self.version = version
+        self.removal_version = removal_version
+        self.message = message
+        self.once_per_class = once_per_class
+        self.attrname: str | None = None
+        self.__doc__ = getattr(func, '__doc__', None)
+        self._out_message: str | _utils.DebtCollectorWarning | None = None
+        self._deprecation_id: str | None = None
+        # Guards the per instance locks below (and is only held briefly).
+        self._lock = threading.Lock()
+        # Identity of the instances being computed -> [lock, users]; the
+        # instances are alive (so identities are not reused) while in here.
+        self._computing: dict[int, list[Any]] = {}
+        self._warned_classes: weakref.WeakSet[type] = weakref.WeakSet()
+        _cached_properties.add(self)
+
+    def __call__(
+        self,
+        func: Callable[[Any], Any],
+        **kwargs: Any,
+    ) -> removed_cached_property:
         return type(self)(
-            self.fget,
-            self.fset,
-            fdel,
-            self.__doc__,
-            self.stacklevel,
-            self.category,
-            self.version,
-            self.removal_version,
-            self.message,
+            func,
+            kwargs.get('stacklevel', self.stacklevel),
+            kwargs.get('category', self.category),
+            kwargs.get('version', self.version),
+            kwargs.get('removal_version', self.removal_version),
+            kwargs.get('message', self.message),
+            kwargs.get('once_per_class', self.once_per_class),
+        )
+
+    def _finalize(self) -> str | _utils.DebtCollectorWarning:
+        if self.func is None:
+            name = full_name = "???"
+        else:
+            name = _get_qualified_name(self.func)
+            full_name = _utils.get_full_name(self.func)
+        self._deprecation_id = _utils.register_deprecation(
+            'property',
+            full_name,
+            version=self.version,
+            removal_version=self.removal_version,
         )
+        out_message = self._out_message = _utils.make_message(
+            self._PROPERTY_GONE_TPL % name,
+            message=self.message,
+            version=self.version,
+            removal_version=self.removal_version,
+            category=self.category,
+            deprecation_id=self._deprecation_id,
+        )
+        return out_message
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        if self.attrname is None:
+            self.attrname = name
+        elif name != self.attrname:
+            raise TypeError(
+                "Cannot assign the same removed_cached_property to two "
+                f"different names ({self.attrname!r} and {name!r})."
+            )
+        self._finalize()
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        if self.func is None:
+            raise AttributeError("unreadable attribute")
+        if self.attrname is None:
+            raise TypeError(
+                "Cannot use removed_cached_property instance without "
+                "calling __set_name__ on it."
+            )
+        try:
+            cache = instance.__dict__
+        except AttributeError:
+            raise TypeError(
+                f"No '__dict__' attribute on {type(instance).__name__!r} "
+                f"instance to cache {self.attrname!r} property."
+            ) from None
+        key = id(instance)
+        with self._lock:
+            computing = self._computing.get(key)
+            if computing is None:
+                computing = self._computing[key] = [threading.RLock(), 0]
+            computing[1] += 1
+        try:
+            with computing[0]:
+                # Another thread may have filled it in while we waited.
+                value = cache.get(self.attrname, _NOT_FOUND)
+                if value is _NOT_FOUND:
+                    value = self._compute(self.func, instance)
+                    cache[self.attrname] = value
+        finally:
+            with self._lock:
+                computing[1] -= 1
+                if not computing[1]:
+                    del self._computing[key]
+        return value
+
+    def _compute(self, func: Callable[[Any], Any], instance: Any) -> Any:
+        out_message = self._out_message
+        if out_message is None:
+            out_message = self._finalize()
+        if self.once_per_class:
+            cls = type(instance)
+            with self._lock:
+                warn = cls not in self._warned_classes
+                self._warned_classes.add(cls)
+        else:
+            warn = True
+        if warn:
+            _utils.deprecation(
+                out_message,
+                stacklevel=self.stacklevel + 1,
+                category=self.category,
+                deprecation_id=self._deprecation_id,
+            )
+        return func(instance)
+
+
+class removed_attribute:
+    """Descriptor that deprecates a plain (class provided) attribute.
+
+    On the first read of the attribute from an instance the deprecation is
+    warned about and the value is then stored in the instance ``__dict__``,
+    so that later reads of the attribute from that instance are plain
+    attribute lookups (that never touch this descriptor). Reads from the
+    class itself are warned about every time.
+
+    .. note::
+
+        Assignments to the attribute are **not** intercepted (they go
+        directly to the instance ``__dict__``, as they would for any plain
+        attribute) and so are not warned about.
+
+    :param value: the value of the attribute
+    :param message: string used as ending contents of the deprecate message
+    :param version: version string (represents the version this deprecation
+                    was created in)
+    :param removal_version: version string (represents the version this
+                            deprecation will be removed in); a string
+                            of '?' will denote this will be removed in
+                            some future unknown version
+    :param stacklevel: stacklevel used in the :func:`warnings.warn` function
+                       to locate where the users code is when reporting the
+                       deprecation call (the default being 3)
+    :param category: the :mod:`warnings` category to use, defaults to
+                     :py:class:`DeprecationWarning` if not provided
+    """
+
+    _ATTRIBUTE_GONE_TPL = "Reading the '%s' attribute is deprecated"
+
+    def __init__(
+        self,
+        value: Any,
+        message: str | None = None,
+        version: str | None = None,
+        removal_version: str | None = None,
+        stacklevel: int = 3,
+        category: type[Warning] = DeprecationWarning,
+    ):
+        self.value = value
+        self.message = message
+        self.version = version
+        self.removal_version = removal_version
+        self.stacklevel = stacklevel
+        self.category = category
+        self.attrname: str | None = None
+        self._out_message: str | _utils.DebtCollectorWarning | None = None
+        self._deprecation_id: str | None = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attrname = name
+        self._deprecation_id = _utils.register_deprecation(
+            'attribute',
+            f"{_utils.get_full_name(owner)}.{name}",
+            version=self.version,
+            removal_version=self.removal_version,
+        )
+        self._out_message = _utils.make_message(
+            self._ATTRIBUTE_GONE_TPL % f"{owner.__qualname__}.{name}",
+            message=self.message,
+            version=self.version,
+            removal_version=self.removal_version,
+            category=self.category,
+            deprecation_id=self._deprecation_id,
+        )
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if self._out_message is None or self.attrname is None:
+            raise TypeError(
+                "Cannot use removed_attribute instance without "
+                "calling __set_name__ on it."
+            )
+        _utils.deprecation(
+            self._out_message,
+            stacklevel=self.stacklevel,
+            category=self.category,
+            deprecation_id=self._deprecation_id,
+        )
+        if instance is not None:
+            try:
+                instance.__dict__[self.attrname] = self.value
+            except AttributeError:
+                # No instance dictionary (slots or similar), so we will just
+                # have to keep on being used (and warning).
+                pass
+        return self.value
 
 
 @overload
@@ -226,6 +557,8 @@ def remove(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
+    monitoring: bool = False,
 ) -> Callable[P, R]: ...
 
 
@@ -237,6 +570,8 @@ def remove(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
+    monitoring: bool = False,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]: ...
 
 
@@ -247,6 +582,8 @@ def remove(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
+    monitoring: bool = False,
 ) -> Callable[P, R] | Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorates a function, method, or class to emit a deprecation warning
 
@@ -265,6 +602,20 @@ def remove(
                            ignoring
     :param type category: warnings message category (this defaults to
                           ``DeprecationWarning`` when none is provided)
+    :param str internal_package: when provided, calls made from modules
+                                 inside of this package (or module) are not
+                                 warned about (for deprecated things that
+                                 are still used by their own package)
+    :param bool monitoring: when true (and when running on python 3.12 or
+                            newer) functions are not wrapped; instead only
+                            their first call is warned about (using
+                            :mod:`sys.monitoring`), after which calling them
+                            costs nothing extra; that is the first call of
+                            the process (not of each calling location) and
+                            later calls are not seen at all, so policies,
+                            observers and recorders of hits (and the audit
+                            event) only see that first call; classes (and
+                            older pythons) fall back to the usual wrapping
     """
     if f is None:
         return functools.partial(
@@ -274,15 +625,43 @@ def remove(
             removal_version=removal_version,
             stacklevel=stacklevel,
             category=category,
+            internal_package=internal_package,
+            monitoring=monitoring,
         )
 
-    @wrapt.decorator
-    def wrapper(
-        wrapped: Callable[P, R],
-        instance: Any,
-        args: tuple[Any, ...],
-        kwargs: dict[str, Any],
-    ) -> R:
+    internal_callers = _utils.get_internal_callers(internal_package)
+
+    deprecation_id = _utils.register_deprecation(
+        'class' if inspect.isclass(f) else 'function',
+        _utils.get_full_name(f),
+        version=version,
+        removal_version=removal_version,
+    )
+
+    code = getattr(f, '__code__', None)
+    if monitoring and isinstance(code, types.CodeType):
+        # The same message the wrapper below generates for functions (that
+        # always have a qualified name).
+        out_message = _utils.make_message(
+            f"Using function/method '{_get_qualified_name(f)}()' is "
+            f"deprecated",
+            version=version,
+            removal_version=removal_version,
+            message=message,
+            category=category,
+            deprecation_id=deprecation_id,
+        )
+        if _utils.monitor_first_call(
+            code,
+            out_message,
+            stacklevel=stacklevel,
+            category=category,
+            deprecation_id=deprecation_id,
+            internal_callers=internal_callers,
+        ):
+            return f
+
+    def prefix(instance: Any) -> str:
         qualified, f_name = _utils.get_qualified_name(f)
         if qualified:
             if inspect.isclass(f):
@@ -332,15 +711,47 @@ def remove(
             thing_name = f_name
         if thing_post:
             thing_name += thing_post
-        prefix = prefix_pre + f" '{thing_name}' is deprecated"
-        out_message = _utils.generate_message(
-            prefix,
+        return prefix_pre + f" '{thing_name}' is deprecated"
+
+    # The message of qualified things does not depend on the instance, so
+    # it is made once (and shared, it is never changed) unless it is a
+    # (structured) warning, those are made per call as they get raised.
+    static_message: str | None = None
+    if _utils.get_qualified_name(f)[0]:
+        first_message = _utils.make_message(
+            prefix(None),
             version=version,
             removal_version=removal_version,
             message=message,
+            category=category,
+            deprecation_id=deprecation_id,
         )
+        if isinstance(first_message, str):
+            static_message = first_message
+
+    @wrapt.decorator
+    def wrapper(
+        wrapped: Callable[P, R],
+        instance: Any,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> R:
+        out_message: str | Warning | None = static_message
+        if out_message is None:
+            out_message = _utils.make_message(
+                functools.partial(prefix, instance),
+                version=version,
+                removal_version=removal_version,
+                message=message,
+                category=category,
+                deprecation_id=deprecation_id,
+            )
         _utils.deprecation(
-            out_message, stacklevel=stacklevel, category=category
+            out_message,
+            stacklevel=stacklevel,
+            category=category,
+            deprecation_id=deprecation_id,
+            internal_callers=internal_callers,
         )
         return wrapped(*args, **kwargs)
 
@@ -354,31 +765,188 @@ def removed_kwarg(
     removal_version: str | None = None,
     stacklevel: int = 3,
     category: type[Warning] | None = None,
+    internal_package: str | None = None,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorates a kwarg accepting function to deprecate a removed kwarg."""
     prefix = f"Using the '{old_name}' argument is deprecated"
-    out_message = _utils.generate_message(
-        prefix,
-        postfix=None,
-        message=message,
-        version=version,
-        removal_version=removal_version,
-    )
+    internal_callers = _utils.get_internal_callers(internal_package)
 
-    @wrapt.decorator
-    def wrapper(
-        wrapped: Callable[P, R],
-        instance: Any,
-        args: tuple[Any, ...],
-        kwargs: dict[str, Any],
-    ) -> R:
-        if old_name in kwargs:
-            _utils.deprecation(
-                out_message, stacklevel=stacklevel, category=category
+    def decorator(f: Callable[P, R]) -> Callable[P, R]:
+        deprecation_id = _utils.register_deprecation(
+            'kwarg',
+            f'{_utils.get_full_name(f)}({old_name})',
+            version=version,
+            removal_version=removal_version,
+        )
+        out_message = _utils.make_message(
+            prefix,
+            postfix=None,
+            message=message,
+            version=version,
+            removal_version=removal_version,
+            category=category,
+            deprecation_id=deprecation_id,
+        )
+
+        @wrapt.decorator
+        def wrapper(
+            wrapped: Callable[P, R],
+            instance: Any,
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+        ) -> R:
+            if old_name in kwargs:
+                _utils.deprecation(
+                    out_message,
+                    stacklevel=stacklevel,
+                    category=category,
+                    deprecation_id=deprecation_id,
+                    internal_callers=internal_callers,
+                )
+            return wrapped(*args, **kwargs)
+
+        return wrapper(f)
+
+    return decorator
+
+
+def removed_kwarg_values(
+    values: dict[str, dict[Any, Any]],
+    message: str | None = None,
+    version: str | None = None,
+    removal_version: str | None = None,
+    stacklevel: int = 3,
+    category: type[Warning] | None = None,
+    replace: bool = False,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorates a function to deprecate specific values of its arguments.
+
+    :param dict values: A mapping of argument name to a mapping of each of
+                        its deprecated values to the value replacing it (or
+                        ``None`` when there is no replacement), for example
+                        ``{'mode': {'legacy': 'compat'}}``
+    :param str message: A message to include in the deprecation warning
+    :param str version: Specify what version the values were deprecated in
+    :param str removal_version: What version the values will be removed. If
+                                '?' is used this implies an undefined future
+                                version
+    :param int stacklevel: How many entries deep in the call stack before
+                           ignoring
+    :param type category: warnings message category (this defaults to
+                          ``DeprecationWarning`` when none is provided)
+    :param bool replace: When true deprecated values that have a replacement
+                         are replaced with it before calling the function
+    """
+    # Argument name -> old value -> (prefix, postfix, replacement)
+    messages: dict[str, dict[Any, tuple[str, str | None, str | None]]] = {}
+    for name, replacements in values.items():
+        messages[name] = {}
+        for old_value, new_value in replacements.items():
+            prefix = (
+                f"Using the {old_value!r} value for the '{name}' argument "
+                f"is deprecated"
             )
-        return wrapped(*args, **kwargs)
+            replacement: str | None = None
+            postfix: str | None = None
+            if new_value is not None:
+                replacement = repr(new_value)
+                postfix = f", please use {replacement} instead"
+            messages[name][old_value] = (prefix, postfix, replacement)
 
-    return wrapper
+    def decorator(f: Callable[P, R]) -> Callable[P, R]:
+        # Look through any classmethod/staticmethod to the real function.
+        params = list(
+            inspect.signature(getattr(f, '__func__', f)).parameters.values()
+        )
+        checks = []
+        for name in values:
+            for index, param in enumerate(params):
+                if param.name == name:
+                    break
+            else:
+                raise ValueError(
+                    f"Unable to deprecate values of the '{name}' argument "
+                    f"(the '{_get_qualified_name(f)}' callable does not "
+                    f"take that argument)"
+                )
+            if param.kind not in (
+                inspect.Parameter.POSITIONAL_ONLY,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            ):
+                position = None
+            else:
+                position = index
+            full_name = _utils.get_full_name(f)
+            entries = {}
+            for old_value, (prefix, postfix, replacement) in messages[
+                name
+            ].items():
+                deprecation_id = _utils.register_deprecation(
+                    'kwarg-value',
+                    f'{full_name}({name}={old_value!r})',
+                    version=version,
+                    removal_version=removal_version,
+                )
+                out_message = _utils.make_message(
+                    prefix,
+                    postfix=postfix,
+                    message=message,
+                    version=version,
+                    removal_version=removal_version,
+                    category=category,
+                    deprecation_id=deprecation_id,
+                    replacement=replacement,
+                )
+                entries[old_value] = (out_message, deprecation_id)
+            checks.append((name, position, entries, values[name]))
+
+        @wrapt.decorator
+        def wrapper(
+            wrapped: Callable[P, R],
+            instance: Any,
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+        ) -> R:
+            # When bound the instance (or class) is not part of the
+            # arguments, but it is part of the function signature.
+            offset = 0 if instance is None else 1
+            for name, position, entries, replacements in checks:
+                arg_index: int | None = None
+                if name in kwargs:
+                    value = kwargs[name]
+                elif position is not None:
+                    arg_index = position - offset
+                    if not 0 <= arg_index < len(args):
+                        continue
+                    value = args[arg_index]
+                else:
+                    continue
+                try:
+                    entry = entries.get(value)
+                except TypeError:
+                    # Unhashable, so can't be a deprecated value.
+                    continue
+                if entry is None:
+                    continue
+                out_message, deprecation_id = entry
+                _utils.deprecation(
+                    out_message,
+                    stacklevel=stacklevel,
+                    category=category,
+                    deprecation_id=deprecation_id,
+                )
+                if replace and replacements[value] is not None:
+                    if arg_index is None:
+                        kwargs[name] = replacements[value]
+                    else:
+                        new_args = list(args)
+                        new_args[arg_index] = replacements[value]
+                        args = tuple(new_args)
+            return wrapped(*args, **kwargs)
+
+        return wrapper(f)
+
+    return decorator
 
 
 def removed_class(
@@ -392,11 +960,18 @@ def removed_class(
 ) -> Callable[[T], T]:
     """Decorates a class to denote that it will be removed at some point."""
 
-    def _wrap_it(old_init: Any, out_message: str) -> Any:
+    def _wrap_it(
+        old_init: Any,
+        out_message: str | _utils.DebtCollectorWarning,
+        deprecation_id: str,
+    ) -> Any:
         @functools.wraps(old_init, assigned=_utils.get_assigned(old_init))
         def new_init(self: Any, *args: Any, **kwargs: Any) -> Any:
             _utils.deprecation(
-                out_message, stacklevel=stacklevel, category=category
+                out_message,
+                stacklevel=stacklevel,
+                category=category,
+                deprecation_id=deprecation_id,
             )
             return old_init(self, *args, **kwargs)
 
@@ -410,15 +985,23 @@ def removed_class(
                 f"class type only)"
             )
 
-        out_message = _utils.generate_message(
+        deprecation_id = _utils.register_deprecation(
+            'class',
+            _utils.get_full_name(cls),
+            version=version,
+            removal_version=removal_version,
+        )
+        out_message = _utils.make_message(
             f"Using class '{cls_name}' (either directly or via inheritance) "
             f"is deprecated",
             postfix=None,
             message=message,
             version=version,
             removal_version=removal_version,
+            category=category,
+            deprecation_id=deprecation_id,
         )
-        cls.__init__ = _wrap_it(cls.__init__, out_message)
+        cls.__init__ = _wrap_it(cls.__init__, out_message, deprecation_id)
         return cls
 
     return _cls_decorator
@@ -462,11 +1045,158 @@ def removed_module(
         postfix = f", please use {replacement} instead"
     else:
         postfix = None
-    out_message = _utils.generate_message(
+    deprecation_id = _utils.register_deprecation(
+        'module',
+        module_name,
+        version=version,
+        removal_version=removal_version,
+    )
+    out_message = _utils.make_message(
         prefix,
         postfix=postfix,
         message=message,
         version=version,
         removal_version=removal_version,
+        category=category,
+        deprecation_id=deprecation_id,
+        replacement=replacement,
+    )
+    _utils.deprecation(
+        out_message,
+        stacklevel=stacklevel,
+        category=category,
+        deprecation_id=deprecation_id,
+    )
+
+
+# The value, message, stacklevel, category and id of a deprecated constant.
+_ConstantEntry = tuple[
+    Any, 'str | _utils.DebtCollectorWarning', int, 'type[Warning] | None', str
+]
+
+
+class _ModuleConstants:
+    """Module ``__getattr__`` hook that provides deprecated constants.
+
+    The first lookup of a deprecated constant warns and then stores the
+    value in the module ``__dict__``; the module ``__getattr__`` hook is only
+    called for names missing from that dictionary, so later lookups are
+    plain (dictionary backed) module attribute lookups.
+    """
+
+    __slots__ = ('module', 'constants', 'previous')
+
+    def __init__(
+        self,
+        module: types.ModuleType,
+        previous: Callable[[str], Any] | None = None,
+    ):
+        self.module = module
+        self.constants: dict[str, _ConstantEntry] = {}
+        self.previous = previous
+
+    def __call__(self, name: str) -> Any:
+        try:
+            entry = self.constants[name]
+        except KeyError:
+            if self.previous is not None:
+                return self.previous(name)
+            raise AttributeError(
+                f"module {self.module.__name__!r} has no attribute {name!r}"
+            ) from None
+        value, out_message, stacklevel, category, deprecation_id = entry
+        _utils.deprecation(
+            out_message,
+            stacklevel=stacklevel,
+            category=category,
+            deprecation_id=deprecation_id,
+        )
+        self.module.__dict__[name] = value
+        return value
+
+
+def removed_constant(
+    module: types.ModuleType | str,
+    name: str,
+    value: Any = _NOT_FOUND,
+    replacement: str | None = None,
+    message: str | None = None,
+    version: str | None = None,
+    removal_version: str | None = None,
+    stacklevel: int = 3,
+    category: type[Warning] | None = None,
+) -> None:
+    """Helper to be called inside a module to deprecate a module constant
+
+    This removes the constant from the module (if it was already defined)
+    and installs a module level ``__getattr__`` hook (chaining to any
+    existing one) that warns when the constant is first looked up, after
+    which the constant is put back into the module so that later lookups
+    are done at normal (dictionary lookup) speed and are not warned about.
+
+    :param module: the module (or name of the module) the constant is in
+    :param str name: the name of the constant
+    :param value: the value of the constant (if not provided the value
+                  currently assigned to ``name`` in the module is used)
+    :param str replacement: A location (or information about) of any
+                            potential replacement for the removed constant
+                            (if applicable)
+    :param str message: A message to include in the deprecation warning
+    :param str version: Specify what version the removed constant is present
+                        in
+    :param str removal_version: What version the constant will be removed. If
+                                '?' is used this implies an undefined future
+                                version
+    :param int stacklevel: How many entries deep in the call stack before
+                           ignoring
+    :param type category: warnings message category (this defaults to
+                          ``DeprecationWarning`` when none is provided)
+    """
+    if isinstance(module, str):
+        module = sys.modules[module]
+    elif not inspect.ismodule(module):
+        _qual, type_name = _utils.get_qualified_name(type(module))
+        raise TypeError(
+            f"Unexpected module type '{type_name}' (expected string or "
+            f"module type only)"
+        )
+    module_dict = module.__dict__
+    current = module_dict.pop(name, _NOT_FOUND)
+    if value is _NOT_FOUND:
+        value = current
+        if value is _NOT_FOUND:
+            raise AttributeError(
+                f"module {module.__name__!r} has no attribute {name!r}"
+            )
+    hook = module_dict.get('__getattr__')
+    if not isinstance(hook, _ModuleConstants):
+        hook = _ModuleConstants(module, previous=hook)
+        module_dict['__getattr__'] = hook
+    prefix = f"The '{module.__name__}.{name}' constant is deprecated"
+    if replacement:
+        postfix = f", please use {replacement} instead"
+    else:
+        postfix = None
+    deprecation_id = _utils.register_deprecation(
+        'constant',
+        f'{module.__name__}.{name}',
+        version=version,
+        removal_version=removal_version,
+    )
+    out_message = _utils.make_message(
+        prefix,
+        postfix=postfix,
+        message=message,
+        version=version,
+        removal_version=removal_version,
+        category=category,
+        deprecation_id=deprecation_id,
+        replacement=replacement,
+    )
+    hook.constants[name] = (
+        value,
+        out_message,
+        stacklevel,
+        category,
+        deprecation_id,
     )
-    _utils.deprecation(out_message, stacklevel=stacklevel, category=category)
@@ -35,32 +35,51 @@ def renamed_kwarg(
     stacklevel: int = 3,
     category: type[Warning] | None = None,
     replace: bool = False,
+    internal_package: str | None = None,
 ) -> Any:
     """Decorates a kwarg accepting function to deprecate a renamed kwarg."""
 
     prefix = _KWARG_RENAMED_PREFIX_TPL % old_name
     postfix = _KWARG_RENAMED_POSTFIX_TPL % new_name
-    out_message = _utils.generate_message(
-        prefix,
-        postfix=postfix,
-        message=message,
-        version=version,
-        removal_version=removal_version,
-    )
+    internal_callers = _utils.get_internal_callers(internal_package)
 
-    @wrapt.decorator
-    def decorator(
-        wrapped: Callable[..., Any],
-        instance: Any,
-        args: tuple[Any, ...],
-        kwargs: dict[str, Any],
-    ) -> Any:
-        if old_name in kwargs:
-            _utils.deprecation(
-                out_message, stacklevel=stacklevel, category=category
-            )
-            if replace:
-                kwargs.setdefault(new_name, kwargs.pop(old_name))
-        return wrapped(*args, **kwargs)
+    def decorator(f: Callable[..., Any]) -> Callable[..., Any]:
+        deprecation_id = _utils.register_deprecation(
+            'kwarg',
+            f'{_utils.get_full_name(f)}({old_name})',
+            version=version,
+            removal_version=removal_version,
+        )
+        out_message = _utils.make_message(
+            prefix,
+            postfix=postfix,
+            message=message,
+            version=version,
+            removal_version=removal_version,
+            category=category,
+            deprecation_id=deprecation_id,
+            replacement=new_name,
+        )
+
+        @wrapt.decorator
+        def wrapper(
+            wrapped: Callable[..., Any],
+            instance: Any,
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+        ) -> Any:
+            if old_name in kwargs:
+                _utils.deprecation(
+                    out_message,
+                    stacklevel=stacklevel,
+                    category=category,
+                    deprecation_id=deprecation_id,
+                    internal_callers=internal_callers,
+                )
+                if replace:
+                    kwargs.setdefault(new_name, kwargs.pop(old_name))
+            return wrapped(*args, **kwargs)
+
+        return wrapper(f)
 
     return decorator
@@ -0,0 +1,412 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Aggregation of deprecation event logs (see :mod:`debtcollector.eventlog`).
+
+Run with ``python -m debtcollector.report [options] <event log> ...``; event
+logs are streamed (so they can be of any size), may be gzip compressed (as
+rotated logs often are) and can be aggregated by several processes at once
+(one file per process, see ``--jobs``). Hits are counted per deprecation,
+per calling location, per calling package or per version deprecated in (see
+``--by``), optionally per time bucket (see ``--bucket``), and reported as
+text, CSV or JSON, along with the removal version of each deprecation (and
+whether the installed version of the deprecated package has reached it).
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterable, Iterator, Sequence
+import concurrent.futures
+import csv
+import functools
+import gzip
+import json
+import sys
+from typing import Any, TextIO
+
+from debtcollector import _utils
+
+#: What hits can be aggregated by (see :func:`.aggregate`).
+BY_ID = 'id'
+BY_CALLER = 'caller'
+BY_PACKAGE = 'package'
+BY_VERSION = 'version'
+BY = (BY_ID, BY_CALLER, BY_PACKAGE, BY_VERSION)
+
+#: Output formats.
+FORMATS = ('text', 'csv', 'json')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_META_FIELDS = ('kind', 'name', 'version', 'removal_version')
+
+
+def _earliest(first: Any, when: Any) -> Any:
+    if first is None or (when is not None and when < first):
+        return when
+    return first
+
+
+def _latest(last: Any, when: Any) -> Any:
+    if last is None or (when is not None and when > last):
+        return when
+    return last
+
+
+class Aggregate:
+    """Hits aggregated from (some of the) event logs.
+
+    :param by: what to aggregate hits by (one of :data:`.BY`)
+    :param bucket: when provided, hits are also aggregated per time bucket
+                   of that many seconds (each row then has the ``time`` the
+                   bucket starts at)
+    """
+
+    def __init__(self, by: str = BY_ID, bucket: int | None = None):
+        if by not in BY:
+            raise ValueError(f"Unknown aggregation '{by}'")
+        if bucket is not None and bucket < 1:
+            raise ValueError(
+                f"Bucket must be at least one second (not {bucket})"
+            )
+        self.by = by
+        self.bucket = bucket
+        # Key (the deprecation id first, the bucket last) -> [count, first
+        # time, last time]
+        self.counts: dict[tuple[Any, ...], list[Any]] = {}
+        # Deprecation id -> details of that deprecation
+        self.deprecations: dict[str, dict[str, Any]] = {}
+        self.bad_lines = 0
+
+    def _key(self, event: dict[str, Any], when: Any) -> tuple[Any, ...]:
+        deprecation_id = event['id']
+        if not isinstance(deprecation_id, str):
+            raise TypeError("Deprecation ids must be strings")
+        key: tuple[Any, ...]
+        if self.by == BY_CALLER:
+            key = (
+                deprecation_id,
+                event.get('module'),
+                event.get('function'),
+                event.get('line'),
+            )
+        elif self.by == BY_PACKAGE:
+            module = event.get('module') or ''
+            key = (deprecation_id, module.partition('.')[0])
+        elif self.by == BY_VERSION:
+            # Rolled up per version (see :meth:`.rows`).
+            key = (deprecation_id, event.get('version'))
+        else:
+            key = (deprecation_id,)
+        if self.bucket is not None:
+            key += (
+                None if when is None else when // self.bucket * self.bucket,
+            )
+        return key
+
+    def add_lines(self, lines: Iterable[str | bytes]) -> None:
+        """Adds the events of (JSON lines) event log lines.
+
+        Lines that are not valid (UTF-8 encoded) JSON objects with a string
+        ``id`` (and a numeric ``time``, if any) are counted as bad lines.
+        """
+        counts = self.counts
+        for line in lines:
+            try:
+                event = json.loads(line)
+                when = event.get('time')
+                if when is not None and (
+                    isinstance(when, bool)
+                    or not isinstance(when, (int, float))
+                ):
+                    raise TypeError("Times must be numbers")
+                key = self._key(event, when)
+                # Fails for keys that are not hashable (like ones made of
+                # lists).
+                entry = counts.get(key)
+            except (ValueError, TypeError, KeyError, AttributeError):
+                if line.strip():
+                    self.bad_lines += 1
+                continue
+            if entry is None:
+                counts[key] = [1, when, when]
+                deprecation_id = key[0]
+                if deprecation_id not in self.deprecations:
+                    self.deprecations[deprecation_id] = {
+                        field: event.get(field) for field in _META_FIELDS
+                    }
+            else:
+                entry[0] += 1
+                entry[1] = _earliest(entry[1], when)
+                entry[2] = _latest(entry[2], when)
+
+    def merge(self, other: Aggregate) -> None:
+        """Merges the hits aggregated by another aggregate into this one."""
+        for key, (count, first, last) in other.counts.items():
+            entry = self.counts.get(key)
+            if entry is None:
+                self.counts[key] = [count, first, last]
+                continue
+            entry[0] += count
+            entry[1] = _earliest(entry[1], first)
+            entry[2] = _latest(entry[2], last)
+        for deprecation_id, details in other.deprecations.items():
+            self.deprecations.setdefault(deprecation_id, details)
+        self.bad_lines += other.bad_lines
+
+    def _sorted(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # Most hits first (within each bucket, oldest bucket first).
+        def sort_key(row: dict[str, Any]) -> tuple[Any, ...]:
+            if self.by == BY_VERSION:
+                name = str(row['version'] or '')
+            else:
+                name = row['id']
+            if self.bucket is None:
+                return (-row['count'], name)
+            when = row['time']
+            return (when is not None, when or 0, -row['count'], name)
+
+        rows.sort(key=sort_key)
+        return rows
+
+    def _version_rows(self) -> list[dict[str, Any]]:
+        # (version, bucket if any) -> [count, deprecations, first, last]
+        versions: dict[tuple[Any, ...], list[Any]] = {}
+        for key, (count, first, last) in self.counts.items():
+            version_key = key[1:]
+            entry = versions.get(version_key)
+            if entry is None:
+                versions[version_key] = [count, 1, first, last]
+                continue
+            entry[0] += count
+            entry[1] += 1
+            entry[2] = _earliest(entry[2], first)
+            entry[3] = _latest(entry[3], last)
+        rows = []
+        for version_key, (
+            count,
+            deprecations,
+            first,
+            last,
+        ) in versions.items():
+            row: dict[str, Any] = {'version': version_key[0]}
+            if self.bucket is not None:
+                row['time'] = version_key[1]
+            row['count'] = count
+            row['deprecations'] = deprecations
+            row['first'] = first
+            row['last'] = last
+            rows.append(row)
+        return self._sorted(rows)
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Gets the aggregated hits (most hits first) as rows.
+
+        When aggregated by version the rows have the number of hits (and of
+        deprecations hit) per version deprecated in; when aggregated per
+        time bucket the rows are ordered by the time of their bucket first.
+        """
+        if self.by == BY_VERSION:
+            return self._version_rows()
+        rows = []
+        for key, (count, first, last) in self.counts.items():
+            deprecation_id = key[0]
+            details = self.deprecations.get(deprecation_id, {})
+            row: dict[str, Any] = {'id': deprecation_id}
+            if self.by == BY_CALLER:
+                row['module'], row['function'], row['line'] = key[1:4]
+            elif self.by == BY_PACKAGE:
+                row['package'] = key[1]
+            if self.bucket is not None:
+                row['time'] = key[-1]
+            row['count'] = count
+            row['first'] = first
+            row['last'] = last
+            row['version'] = details.get('version')
+            row['removal_version'] = details.get('removal_version')
+            row['overdue'] = _is_overdue(
+                details.get('name'), details.get('removal_version')
+            )
+            rows.append(row)
+        return self._sorted(rows)
+
+
+@functools.cache
+def _is_overdue(name: str | None, removal_version: str | None) -> bool | None:
+    # None when it can not be told (nothing to compare with).
+    if not name or not removal_version or removal_version == '?':
+        return None
+    installed = _utils.get_installed_version(name.partition('.')[0])
+    if installed is None:
+        return None
+    removal = _utils.parse_version(removal_version)
+    current = _utils.parse_version(installed)
+    if removal is None or current is None:
+        return None
+    return current >= removal
+
+
+def _iter_lines(path: str) -> Iterator[bytes]:
+    # Lines are decoded (by the JSON decoder) one by one, so that a line
+    # that is not valid UTF-8 is only one bad line.
+    if path == '-':
+        yield from sys.stdin.buffer
+        return
+    with open(path, 'rb') as raw:
+        if raw.peek(2)[:2] == _GZIP_MAGIC:
+            with gzip.open(raw, 'rb') as stream:
+                yield from stream
+        else:
+            yield from raw
+
+
+def aggregate_file(
+    path: str, by: str = BY_ID, bucket: int | None = None
+) -> Aggregate:
+    """Aggregates the hits of a (possibly gzip compressed) event log.
+
+    :param path: path of the event log (``-`` reads the standard input)
+    :param by: what to aggregate hits by (one of :data:`.BY`)
+    :param bucket: seconds per time bucket (see :class:`.Aggregate`)
+    """
+    result = Aggregate(by=by, bucket=bucket)
+    result.add_lines(_iter_lines(path))
+    return result
+
+
+def aggregate(
+    paths: Sequence[str],
+    by: str = BY_ID,
+    jobs: int = 1,
+    bucket: int | None = None,
+) -> Aggregate:
+    """Aggregates the hits of many event logs.
+
+    :param paths: paths of the event logs
+    :param by: what to aggregate hits by (one of :data:`.BY`)
+    :param jobs: number of processes used (each aggregating whole files)
+    :param bucket: seconds per time bucket (see :class:`.Aggregate`)
+    """
+    result = Aggregate(by=by, bucket=bucket)
+    if jobs > 1 and len(paths) > 1 and '-' not in paths:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(jobs, len(paths))
+        ) as executor:
+            for partial in executor.map(
+                functools.partial(aggregate_file, by=by, bucket=bucket), paths
+            ):
+                result.merge(partial)
+    else:
+        for path in paths:
+            result.merge(aggregate_file(path, by=by, bucket=bucket))
+    return result
+
+
+def _write_text(rows: list[dict[str, Any]], stream: TextIO) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    table = [columns] + [
+        ['' if row[column] is None else str(row[column]) for column in columns]
+        for row in rows
+    ]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        stream.write(
+            '  '.join(
+                cell.ljust(width) for cell, width in zip(line, widths)
+            ).rstrip()
+        )
+        stream.write('\n')
+
+
+def write_rows(
+    rows: list[dict[str, Any]], stream: TextIO, output_format: str = 'text'
+) -> None:
+    """Writes rows (see :meth:`.Aggregate.rows`) in some format."""
+    if output_format == 'json':
+        json.dump(rows, stream, indent=2)
+        stream.write('\n')
+    elif output_format == 'csv':
+        if rows:
+            writer = csv.DictWriter(stream, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    elif output_format == 'text':
+        _write_text(rows, stream)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}'")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m debtcollector.report',
+        description=__doc__.splitlines()[0] if __doc__ else None,
+    )
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        metavar='EVENT_LOG',
+        help="event log files (gzip compressed or not; '-' for stdin)",
+    )
+    parser.add_argument(
+        '--by', choices=BY, default=BY_ID, help="what to count hits by"
+    )
+    parser.add_argument(
+        '--bucket',
+        type=int,
+        default=None,
+        metavar='SECONDS',
+        help="also count hits per time bucket of that many seconds (like "
+        "3600 for hourly counts)",
+    )
+    parser.add_argument(
+        '--format', choices=FORMATS, default='text', dest='output_format'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help="number of processes used to read the event logs",
+    )
+    parser.add_argument(
+        '--limit', type=int, default=None, help="maximum rows reported"
+    )
+    parser.add_argument(
+        '--min-count',
+        type=int,
+        default=1,
+        help="only report rows with at least this many hits",
+    )
+    args = parser.parse_args(argv)
+    if args.bucket is not None and args.bucket < 1:
+        parser.error("--bucket must be at least one second")
+    try:
+        result = aggregate(
+            args.paths, by=args.by, jobs=args.jobs, bucket=args.bucket
+        )
+    except OSError as e:
+        parser.exit(1, f"{parser.prog}: {e}\n")
+    rows = [row for row in result.rows() if row['count'] >= args.min_count]
+    if args.limit is not None:
+        del rows[args.limit :]
+    write_rows(rows, sys.stdout, output_format=args.output_format)
+    if result.bad_lines:
+        print(
+            f"{parser.prog}: skipped {result.bad_lines} malformed line(s)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,525 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Counting of deprecation hits shared by all the processes of a host.
+
+When enabled, every hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) is counted in a memory-mapped file, so that all
+the processes using the same file (for example the forked workers of a
+server, which keep using the file their parent enabled) contribute to the
+same counts. Those can then be read at any time, by any process, without
+signalling (or even knowing about) the processes that count them; run
+``python -m debtcollector.shared [options] <file>`` to dump them.
+
+The file holds a fixed-size (open-addressing) table with one slot per
+deprecation, claimed (under a file lock) the first time a process hits that
+deprecation; counting further hits is then a dictionary lookup and an
+in-place increment of the (8-byte, aligned) counter of that slot. Those
+increments are not atomic across processes (so a few concurrent hits may be
+lost), which is the price of never locking when counting. Once the table is
+full the hits of deprecations that have no slot are counted as ``dropped``.
+
+Warnings can also be emitted once per host (instead of once per process,
+like the ``once`` action of the :mod:`warnings` module does) using another
+file holding a bitmap with one bit per (hash of a) deprecation identifier:
+the first process to hit a deprecation sets its bit (under a file lock) and
+warns, then every process finds that bit set (with no lock taken) and stays
+silent. Deprecations whose identifiers hash to the same bit share it, so
+the bitmap should be kept much larger than the number of deprecations. The
+bits can be cleared (to warn once more) with ``--reset``.
+
+The files named by the ``DEBTCOLLECTOR_SHARED_COUNTS`` and
+``DEBTCOLLECTOR_SHARED_ONCE`` environment variables (if set) are enabled
+when debtcollector is first imported.
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+from collections.abc import Iterator, Sequence
+import contextlib
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import types
+from typing import Any
+
+from debtcollector import _utils
+
+_lockf: Any
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (platforms without fcntl)
+    _lockf = None
+else:
+    _lockf = fcntl.lockf
+
+LOG = logging.getLogger(__name__)
+
+#: Environment variable naming the shared counts file to enable on import.
+SHARED_COUNTS_ENV = 'DEBTCOLLECTOR_SHARED_COUNTS'
+
+#: Environment variable naming the once per host file to enable on import.
+SHARED_ONCE_ENV = 'DEBTCOLLECTOR_SHARED_ONCE'
+
+#: Default number of slots (deprecations that can be counted) of new files.
+DEFAULT_SLOTS = 4096
+
+#: Default number of bits of new once per host files.
+DEFAULT_BITS = 65536
+
+# Layout: a header (magic, number of slots, dropped hits) then the slots,
+# each being the (non-zero) hash of the (whole) deprecation identifier, the
+# count of its hits and the (utf-8, possibly truncated) identifier itself;
+# or (for once per host files) a header (magic, number of bits) then the
+# bitmap. Identifiers too long to be stored whole are told apart by their
+# hash (which is then shown along with them).
+_MAGIC = b'DCSCNT01'
+_ONCE_MAGIC = b'DCSONE01'
+_HEADER = struct.Struct('=8sQQ')
+_HEADER_SIZE = 64
+_DROPPED_WORD = 2
+_SLOT_SIZE = 128
+_ID_OFFSET = 16
+_ID_SIZE = _SLOT_SIZE - _ID_OFFSET
+
+
+def _hash(encoded: bytes) -> int:
+    # Stable across processes (unlike hash()); zero marks empty slots.
+    digest = hashlib.blake2b(encoded, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+# Record locks are held by the process (so they do not exclude the threads
+# of the process holding them from each other), hence this lock taken first.
+_thread_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    # A thread of the parent may have held it while forking.
+    global _thread_lock
+    _thread_lock = threading.Lock()
+
+
+_utils.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+@contextlib.contextmanager
+def _locked(fd: int) -> Iterator[None]:
+    # Record locks (unlike flock) are held per process, so they also
+    # exclude the processes forked from the one holding them.
+    with _thread_lock:
+        if _lockf is None:  # pragma: no cover (platforms without fcntl)
+            yield
+            return
+        _lockf(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            _lockf(fd, fcntl.LOCK_UN)
+
+
+def _scan(data: Any) -> tuple[dict[str, int], int]:
+    _magic, slots, dropped = _HEADER.unpack_from(data, 0)
+    counts: dict[str, int] = {}
+    for slot in range(slots):
+        offset = _HEADER_SIZE + slot * _SLOT_SIZE
+        key, count = struct.unpack_from('=QQ', data, offset)
+        if key:
+            encoded = bytes(
+                data[offset + _ID_OFFSET : offset + _SLOT_SIZE]
+            ).rstrip(b'\0')
+            deprecation_id = encoded.decode('utf-8', errors='replace')
+            if _hash(encoded) != key:
+                # Truncated (so only its hash tells it apart).
+                deprecation_id = f'{deprecation_id}...#{key:016x}'
+            counts[deprecation_id] = count
+    return counts, dropped
+
+
+class _SharedFile(abc.ABC):
+    # A memory-mapped file (created when missing or empty) of some length.
+
+    _magic = b''
+    _description = ''
+
+    def __init__(self, path: str, length: int):
+        if length < 1:
+            raise ValueError(
+                f"Length must be greater than zero (not {length})"
+            )
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with _locked(self._fd):
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, self._get_size(length))
+                    os.pwrite(
+                        self._fd, _HEADER.pack(self._magic, length, 0), 0
+                    )
+            self._map = mmap.mmap(self._fd, 0)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        try:
+            self.length = self._check(self._map, path)
+        except ValueError:
+            self._map.close()
+            os.close(self._fd)
+            raise
+        self._words = memoryview(self._map).cast('Q')
+
+    @staticmethod
+    @abc.abstractmethod
+    def _get_size(length: int) -> int:
+        """Gets the size of files of some length."""
+
+    @classmethod
+    def _check(cls, data: Any, path: str) -> int:
+        if len(data) >= _HEADER_SIZE:
+            magic, length, _extra = _HEADER.unpack_from(data, 0)
+            if magic == cls._magic and len(data) == cls._get_size(length):
+                return int(length)
+        raise ValueError(f"'{path}' is not a {cls._description} file")
+
+    def close(self) -> None:
+        """Unmaps and closes the file."""
+        if self._fd < 0:
+            return
+        self._words.release()
+        self._map.close()
+        os.close(self._fd)
+        self._fd = -1
+
+
+class SharedCounts(_SharedFile):
+    """Counts of deprecation hits kept in a memory-mapped (shared) file.
+
+    :param path: path of the file (created, with ``slots`` slots, if it does
+                 not exist or is empty; otherwise its own number of slots is
+                 used)
+    :param slots: number of deprecations that can be counted
+    """
+
+    _magic = _MAGIC
+    _description = 'shared counts'
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS):
+        super().__init__(path, slots)
+        self.slots = self.length
+        # Deprecation id -> index (in words) of the counter of its slot.
+        self._indexes: dict[str, int] = {}
+
+    @staticmethod
+    def _get_size(length: int) -> int:
+        return _HEADER_SIZE + length * _SLOT_SIZE
+
+    def record(self, deprecation_id: str, frame: types.FrameType) -> None:
+        index = self._indexes.get(deprecation_id)
+        if index is None:
+            index = self._find(deprecation_id)
+        self._words[index] += 1
+
+    def _probe(self, key: int, encoded: bytes, claim: bool) -> int | None:
+        words = self._words
+        start = key % self.slots
+        for i in range(self.slots):
+            offset = _HEADER_SIZE + ((start + i) % self.slots) * _SLOT_SIZE
+            stored = words[offset // 8]
+            if stored == 0:
+                if not claim:
+                    return None
+                # The identifier is written before the hash so that a
+                # slot is never found before it is complete.
+                self._map[offset + _ID_OFFSET : offset + _SLOT_SIZE] = (
+                    encoded.ljust(_ID_SIZE, b'\0')
+                )
+                words[offset // 8] = key
+                return offset // 8 + 1
+            if (
+                stored == key
+                and self._map[
+                    offset + _ID_OFFSET : offset + _SLOT_SIZE
+                ].rstrip(b'\0')
+                == encoded
+            ):
+                return offset // 8 + 1
+        return None
+
+    def _find(self, deprecation_id: str) -> int:
+        encoded = deprecation_id.encode('utf-8')
+        # Hash the whole identifier, so that identifiers that only differ
+        # past what a slot can hold get slots of their own.
+        key = _hash(encoded)
+        encoded = encoded[:_ID_SIZE]
+        index = self._probe(key, encoded, False)
+        if index is None:
+            with _locked(self._fd):
+                index = self._probe(key, encoded, True)
+        if index is None:
+            LOG.warning(
+                "Shared counts file '%s' is full, hits of '%s' are "
+                "counted as dropped",
+                self.path,
+                deprecation_id,
+            )
+            index = _DROPPED_WORD
+        self._indexes[deprecation_id] = index
+        return index
+
+    @property
+    def dropped(self) -> int:
+        """Hits of deprecations that found the table full."""
+        return int(self._words[_DROPPED_WORD])
+
+    def snapshot(self) -> dict[str, int]:
+        """Gets the hits counted (by all processes) per deprecation."""
+        return _scan(self._map)[0]
+
+    def reset(self) -> None:
+        """Zeroes all counts (slots stay claimed by their deprecations)."""
+        words = self._words
+        with _locked(self._fd):
+            words[_DROPPED_WORD] = 0
+            for slot in range(self.slots):
+                words[(_HEADER_SIZE + slot * _SLOT_SIZE) // 8 + 1] = 0
+
+
+class SharedOnce(_SharedFile):
+    """Bitmap (in a memory-mapped file) of deprecations already warned about.
+
+    :param path: path of the file (created, with ``bits`` bits, if it does
+                 not exist or is empty; otherwise its own number of bits is
+                 used)
+    :param bits: number of bits of the bitmap
+    """
+
+    _magic = _ONCE_MAGIC
+    _description = 'once per host'
+
+    def __init__(self, path: str, bits: int = DEFAULT_BITS):
+        super().__init__(path, bits)
+        self.bits = self.length
+        # Deprecation id -> (offset, mask) of its bit.
+        self._bits: dict[str, tuple[int, int]] = {}
+
+    @staticmethod
+    def _get_size(length: int) -> int:
+        return _HEADER_SIZE + (length + 63) // 64 * 8
+
+    def _get_bit(self, deprecation_id: str) -> tuple[int, int]:
+        index = _hash(deprecation_id.encode('utf-8')) % self.bits
+        bit = (_HEADER_SIZE + index // 8, 1 << (index % 8))
+        self._bits[deprecation_id] = bit
+        return bit
+
+    def first(self, deprecation_id: str) -> bool:
+        """Claims the bit of a deprecation, telling if it was not yet set.
+
+        Only one caller (of all the threads of all the processes using the
+        file) is told the bit was not set.
+        """
+        bit = self._bits.get(deprecation_id)
+        if bit is None:
+            bit = self._get_bit(deprecation_id)
+        offset, mask = bit
+        data = self._map
+        if data[offset] & mask:
+            return False
+        with _locked(self._fd):
+            value = data[offset]
+            if value & mask:
+                return False
+            data[offset] = value | mask
+        return True
+
+    def count(self) -> int:
+        """Counts the bits set."""
+        return sum(
+            bin(word).count('1') for word in self._words[_HEADER_SIZE // 8 :]
+        )
+
+    def reset(self) -> None:
+        """Clears all bits (so that every deprecation warns once more)."""
+        words = self._words
+        with _locked(self._fd):
+            for index in range(_HEADER_SIZE // 8, len(words)):
+                words[index] = 0
+
+
+def read(path: str) -> tuple[dict[str, int], int]:
+    """Reads the counts of a shared counts file (without enabling it).
+
+    :returns: the hits per deprecation, and the hits dropped
+    """
+    with open(path, 'rb') as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            SharedCounts._check(data, path)
+            return _scan(data)
+
+
+_shared_counts: SharedCounts | None = None
+
+
+def enable(path: str, slots: int = DEFAULT_SLOTS) -> SharedCounts:
+    """Starts counting deprecation hits in a shared counts file.
+
+    Any shared counts file already enabled is closed first (see
+    :class:`.SharedCounts` for the parameters). Processes forked afterwards
+    keep counting in the same file.
+    """
+    global _shared_counts
+    disable()
+    shared_counts = SharedCounts(path, slots=slots)
+    _shared_counts = shared_counts
+    _utils.add_observer(shared_counts.record)
+    return shared_counts
+
+
+def disable() -> None:
+    """Stops counting deprecation hits in a shared counts file."""
+    global _shared_counts
+    shared_counts = _shared_counts
+    if shared_counts is None:
+        return
+    _shared_counts = None
+    _utils.remove_observer(shared_counts.record)
+    shared_counts.close()
+
+
+def get_counts() -> dict[str, int]:
+    """Gets the hits counted in the enabled shared counts file (if any)."""
+    shared_counts = _shared_counts
+    if shared_counts is None:
+        return {}
+    return shared_counts.snapshot()
+
+
+_shared_once: SharedOnce | None = None
+
+
+def enable_once(path: str, bits: int = DEFAULT_BITS) -> SharedOnce:
+    """Starts warning once per host about each deprecation.
+
+    Hits of deprecations (that have an identifier) whose bit is already set
+    in the once per host file do not warn. Any once per host file already
+    enabled is closed first (see :class:`.SharedOnce` for the parameters).
+    """
+    global _shared_once
+    disable_once()
+    shared_once = SharedOnce(path, bits=bits)
+    _shared_once = shared_once
+    _utils._host_once = shared_once.first
+    return shared_once
+
+
+def disable_once() -> None:
+    """Stops warning once per host about each deprecation."""
+    global _shared_once
+    shared_once = _shared_once
+    if shared_once is None:
+        return
+    _shared_once = None
+    _utils._host_once = None
+    shared_once.close()
+
+
+def _load_from_environment() -> None:
+    path = os.environ.get(SHARED_COUNTS_ENV)
+    if path:
+        try:
+            enable(path)
+        except Exception:
+            LOG.exception("Failed enabling shared counts file '%s'", path)
+    path = os.environ.get(SHARED_ONCE_ENV)
+    if path:
+        try:
+            enable_once(path)
+        except Exception:
+            LOG.exception("Failed enabling once per host file '%s'", path)
+
+
+def _main_once(args: argparse.Namespace) -> None:
+    shared_once = SharedOnce(args.path)
+    try:
+        if args.format == 'json':
+            json.dump(
+                {'set': shared_once.count(), 'bits': shared_once.bits},
+                sys.stdout,
+            )
+            sys.stdout.write('\n')
+        else:
+            print(f'{shared_once.count()} of {shared_once.bits} bits set')
+        if args.reset:
+            shared_once.reset()
+    finally:
+        shared_once.close()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m debtcollector.shared',
+        description=(
+            "Dumps the deprecation hits of a shared counts file (or how "
+            "many bits of a once per host file are set)."
+        ),
+    )
+    parser.add_argument(
+        'path', metavar='FILE', help="shared counts or once per host file"
+    )
+    parser.add_argument(
+        '--format', choices=('text', 'json'), default='text', dest='format'
+    )
+    parser.add_argument(
+        '--reset',
+        action='store_true',
+        help="zero the counts, or clear the bits (after dumping them)",
+    )
+    args = parser.parse_args(argv)
+    try:
+        with open(args.path, 'rb') as fh:
+            if fh.read(len(_ONCE_MAGIC)) == _ONCE_MAGIC:
+                _main_once(args)
+                return 0
+        counts, dropped = read(args.path)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"{parser.prog}: {e}\n")
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    if args.format == 'json':
+        json.dump(
+            {'counts': dict(ordered), 'dropped': dropped},
+            sys.stdout,
+            indent=2,
+        )
+        sys.stdout.write('\n')
+    else:
+        for deprecation_id, count in ordered:
+            print(f'{count:>10}  {deprecation_id}')
+        if dropped:
+            print(f'{dropped:>10}  (dropped, the table is full)')
+    if args.reset:
+        shared_counts = SharedCounts(args.path)
+        try:
+            shared_counts.reset()
+        finally:
+            shared_counts.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
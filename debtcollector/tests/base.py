@@ -14,7 +14,15 @@
 # under the License.
 
 import unittest
+import warnings
 
 
 class TestCase(unittest.TestCase):
     """Test case base class for all unit tests."""
+
+    def ignore_warnings(self):
+        """Ignores all warnings (until the test is done)."""
+        catcher = warnings.catch_warnings()
+        catcher.__enter__()
+        self.addCleanup(catcher.__exit__, None, None, None)
+        warnings.simplefilter('ignore')
@@ -0,0 +1,275 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import inspect
+import os
+import sys
+import threading
+from unittest import mock
+
+from debtcollector import _utils
+from debtcollector import attribution
+from debtcollector import policy
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def orange_comet():
+    return True
+
+
+@removals.removed_kwarg('b')
+def purple_comet(a, b=None):
+    return True
+
+
+ORANGE_COMET_ID = f'function:{__name__}.orange_comet'
+PURPLE_COMET_ID = f'kwarg:{__name__}.purple_comet(b)'
+
+
+def _line():
+    frame = inspect.currentframe()
+    assert frame is not None and frame.f_back is not None  # noqa: S101
+    return frame.f_back.f_lineno
+
+
+class AttributionTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(attribution.disable)
+        self.addCleanup(policy.clear_policies)
+        self.ignore_warnings()
+
+    def test_disabled(self):
+        self.assertFalse(attribution.is_enabled())
+        orange_comet()
+        self.assertEqual([], attribution.get_callers())
+        self.assertEqual({}, attribution.get_caller_packages())
+
+    def test_callers(self):
+        attribution.enable()
+        self.assertTrue(attribution.is_enabled())
+        for _i in range(3):
+            orange_comet()
+            line = _line() - 1
+        purple_comet(1, b=2)
+        purple_comet(1)
+        callers = attribution.get_callers()
+        self.assertEqual(2, len(callers))
+        caller = callers[0]
+        self.assertEqual(ORANGE_COMET_ID, caller.deprecation_id)
+        self.assertEqual(__name__, caller.module)
+        self.assertTrue(caller.function.endswith('test_callers'))
+        self.assertEqual(line, caller.line)
+        self.assertEqual(3, caller.count)
+        self.assertEqual(0, caller.error)
+        self.assertEqual(1, callers[1].count)
+        self.assertEqual(
+            [callers[1].deprecation_id],
+            [
+                c.deprecation_id
+                for c in attribution.get_callers(PURPLE_COMET_ID)
+            ],
+        )
+        self.assertEqual(1, len(attribution.get_callers(limit=1)))
+        self.assertEqual(
+            {'debtcollector': {ORANGE_COMET_ID: 3, PURPLE_COMET_ID: 1}},
+            attribution.get_caller_packages(),
+        )
+        attribution.reset()
+        self.assertEqual([], attribution.get_callers())
+
+    def test_ignored_hits_counted(self):
+        attribution.enable()
+        policy.set_policy(ORANGE_COMET_ID, policy.IGNORE)
+        orange_comet()
+        self.assertEqual(1, attribution.get_callers()[0].count)
+
+    def test_bounded(self):
+        attribution.enable(capacity=2)
+        orange_comet()
+        orange_comet()
+        orange_comet()
+        for _i in range(5):
+            orange_comet()
+        orange_comet()
+        callers = attribution.get_callers()
+        self.assertEqual(2, len(callers))
+        self.assertEqual([6, 3], [caller.count for caller in callers])
+        self.assertEqual([1, 2], [caller.error for caller in callers])
+        self.assertRaises(ValueError, attribution.enable, capacity=0)
+
+    def test_counts(self):
+        counts = _utils.CallerCounts(4)
+        frame = inspect.currentframe()
+        assert frame is not None  # noqa: S101
+        for deprecation_id in ('a', 'a', 'b'):
+            counts.record(deprecation_id, frame)
+            line = _line() - 1
+        self.assertEqual(
+            [('a', __name__, line, 2, 0), ('b', __name__, line, 1, 0)],
+            [(i, m, n, c, e) for (i, m, _f, n, c, e) in counts.snapshot()],
+        )
+
+    def test_churn(self):
+        counts = _utils.CallerCounts(8)
+        frame = inspect.currentframe()
+        assert frame is not None  # noqa: S101
+        hits: dict[str, int] = {}
+        for i in range(2000):
+            # A frequent caller among many (ever changing) rare ones.
+            deprecation_id = 'hot' if i % 2 else f'cold-{i % 97}'
+            hits[deprecation_id] = hits.get(deprecation_id, 0) + 1
+            counts.record(deprecation_id, frame)
+        snapshot = counts.snapshot()
+        self.assertEqual(8, len(snapshot))
+        # Space saving keeps the sum of the counts (and bounds each).
+        self.assertEqual(2000, sum(count for *_r, count, _e in snapshot))
+        for deprecation_id, *_rest, count, error in snapshot:
+            self.assertLessEqual(count - error, hits[deprecation_id])
+            self.assertGreaterEqual(count, hits[deprecation_id])
+        self.assertIn(
+            'hot', [deprecation_id for deprecation_id, *_r in snapshot]
+        )
+
+    def test_threads(self):
+        attribution.enable(capacity=4)
+        barrier = threading.Barrier(8)
+
+        def hit():
+            barrier.wait()
+            for _i in range(1000):
+                orange_comet()
+
+        threads = [threading.Thread(target=hit) for _i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        orange_comet()
+        # Each thread counted in its own shard, none of them is lost (and
+        # the shards of the threads that are gone were folded into one).
+        callers = attribution.get_callers()
+        self.assertEqual(
+            [(8000, 'hit'), (1, 'test_threads')],
+            [
+                (caller.count, caller.function.rpartition('.')[2])
+                for caller in callers
+            ],
+        )
+        counts = _utils._attribution
+        assert counts is not None  # noqa: S101
+        self.assertEqual(1, len(counts._shards))
+
+
+def _nested(depth):
+    if depth:
+        return _nested(depth - 1)
+    return orange_comet()
+
+
+class StackSamplesTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(attribution.disable_stacks)
+        self.ignore_warnings()
+
+    def test_disabled(self):
+        orange_comet()
+        self.assertEqual([], attribution.get_stacks())
+        self.assertEqual(0, attribution.get_stack_hits(ORANGE_COMET_ID))
+
+    def test_stacks(self):
+        attribution.enable_stacks(depth=3, first=2, every=5)
+        for _i in range(12):
+            _nested(4)
+        stacks = attribution.get_stacks(ORANGE_COMET_ID)
+        self.assertEqual(1, len(stacks))
+        stack = stacks[0]
+        # The first two hits, then the 6th and 11th (one in every 5).
+        self.assertEqual(4, stack.count)
+        self.assertEqual(12, attribution.get_stack_hits(ORANGE_COMET_ID))
+        self.assertEqual(3, len(stack.frames))
+        self.assertEqual(['_nested'] * 3, [f.name for f in stack.frames])
+        self.assertEqual(__file__, stack.frames[0].filename)
+        self.assertIn('orange_comet()', stack.format()[-1])
+        attribution.reset()
+        self.assertEqual([], attribution.get_stacks())
+
+    def test_stacks_limited(self):
+        attribution.enable_stacks(depth=2, first=10, limit=2)
+        for depth in range(3):
+            _nested(depth)
+        _nested(0)
+        orange_comet()
+        stacks = attribution.get_stacks()
+        self.assertEqual([2, 1], [stack.count for stack in stacks])
+        self.assertEqual(5, attribution.get_stack_hits(ORANGE_COMET_ID))
+        # Frame summaries are shared between stacks.
+        self.assertIs(stacks[0].frames[0], stacks[1].frames[0])
+        self.assertRaises(ValueError, attribution.enable_stacks, depth=0)
+
+
+# Audit hooks can not be removed, so only one is added (which records the
+# events raised while some test is interested in them).
+_audit_events: list[tuple[object, ...]] | None = None
+
+
+def _audit_hook(event, args):
+    if _audit_events is not None and event == _utils.AUDIT_EVENT:
+        _audit_events.append(args)
+
+
+sys.addaudithook(_audit_hook)
+
+
+class AuditTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        global _audit_events
+        _audit_events = []
+        self.addCleanup(globals().__setitem__, '_audit_events', None)
+        attribution.enable_audit()
+        self.addCleanup(attribution.disable_audit)
+        self.ignore_warnings()
+
+    def test_audit_event(self):
+        orange_comet()
+        line = _line() - 1
+        purple_comet(1)
+        purple_comet(1, b=2)
+        code = inspect.currentframe().f_code  # type: ignore[union-attr]
+        self.assertEqual(
+            [
+                (ORANGE_COMET_ID, code, line),
+                (PURPLE_COMET_ID, code, line + 3),
+            ],
+            _audit_events,
+        )
+
+    def test_audit_event_ignored(self):
+        policy.set_policy(ORANGE_COMET_ID, policy.IGNORE)
+        self.addCleanup(policy.clear_policies)
+        orange_comet()
+        self.assertEqual(1, len(_audit_events or []))
+
+    def test_audit_disabled(self):
+        attribution.disable_audit()
+        self.assertFalse(attribution.is_audit_enabled())
+        orange_comet()
+        self.assertEqual([], _audit_events)
+        with mock.patch.dict(os.environ, {attribution.AUDIT_ENV: '1'}):
+            attribution._load_from_environment()
+        self.assertTrue(attribution.is_audit_enabled())
+        orange_comet()
+        self.assertEqual(1, len(_audit_events or []))
@@ -13,11 +13,18 @@
 #    under the License.
 
 import inspect
+import pickle
+import sys
+import threading
+import types
+import unittest
 import warnings
 
 import debtcollector
+from debtcollector import _utils
 from debtcollector.fixtures import disable
 from debtcollector import moves
+from debtcollector import policy
 from debtcollector import removals
 from debtcollector import renames
 from debtcollector.tests import base as test_base
@@ -97,6 +104,27 @@ class Giraffe:
     heightt = moves.moved_read_only_property('heightt', 'height')
 
 
+class Zebra:
+    color = 'stripes'
+    colour = moves.moved_read_only_property(
+        'colour', 'color', resolve_once=True
+    )
+
+    @property
+    def height(self):
+        return 3
+
+    heightt = moves.moved_read_only_property(
+        'heightt', 'height', resolve_once=True
+    )
+
+
+class BabyZebra(Zebra):
+    @property
+    def height(self):
+        return 1
+
+
 class NewHotness:
     def hot(self):
         return 'cold'
@@ -270,6 +298,64 @@ class MovedPropertyTest(test_base.TestCase):
             self.assertEqual(2, g.heightt)
         self.assertEqual(2, len(capture))
 
+    def test_readonly_move_resolve_once(self):
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            z = Zebra()
+            b = BabyZebra()
+            for _i in range(3):
+                self.assertEqual(3, z.heightt)
+                self.assertEqual(1, b.heightt)
+                self.assertEqual('stripes', Zebra.colour)
+        # The subclass inherits the alias (forwarding to its own height).
+        self.assertEqual(2, len(capture))
+        self.assertIsInstance(Zebra.__dict__['heightt'], moves._moved_alias)
+        self.assertNotIn('heightt', BabyZebra.__dict__)
+
+    def test_readonly_move_resolve_once_later_subclass(self):
+        class Horse:
+            @property
+            def height(self):
+                return 3
+
+            heightt = moves.moved_read_only_property(
+                'heightt', 'height', resolve_once=True
+            )
+
+            def gallop(self):
+                return 'Z'
+
+            galop = moves.moved_read_only_property(
+                'galop', 'gallop', resolve_once=True
+            )
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual(3, Horse().heightt)
+            self.assertEqual('Z', Horse().galop())
+
+            # Made after the aliases were installed on its base class.
+            class Pony(Horse):
+                @property
+                def height(self):
+                    return 1
+
+                def gallop(self):
+                    return 'z'
+
+            self.assertEqual(1, Pony().heightt)
+            self.assertEqual('z', Pony().galop())
+        self.assertEqual(2, len(capture))
+
+    def test_readonly_move_resolve_once_missing_target(self):
+        def make_class():
+            class Broken:
+                colour = moves.moved_read_only_property(
+                    'colour', 'color', resolve_once=True
+                )
+
+        self.assertRaises((AttributeError, RuntimeError), make_class)
+
     def test_warnings_emitted(self):
         dog = WoofWoof()
         with warnings.catch_warnings(record=True) as capture:
@@ -478,6 +564,64 @@ class RemovalTests(test_base.TestCase):
             self.assertEqual(2, f())
         self.assertEqual(0, len(capture))
 
+    def test_removed_kwarg_values(self):
+        @removals.removed_kwarg_values(
+            {'mode': {'legacy': 'compat', 'ancient': None}}, replace=True
+        )
+        def f(a, mode='compat', *, flags=None):
+            return mode
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual('compat', f(1, 'legacy'))
+            self.assertEqual('compat', f(1, mode='legacy'))
+            self.assertEqual('ancient', f(1, mode='ancient'))
+            self.assertEqual('compat', f(1))
+            self.assertEqual('modern', f(1, 'modern'))
+            self.assertEqual(['legacy'], f(1, ['legacy']))
+        self.assertEqual(3, len(capture))
+        self.assertEqual(
+            "Using the 'legacy' value for the 'mode' argument is "
+            "deprecated, please use 'compat' instead",
+            str(capture[0].message),
+        )
+        self.assertEqual(
+            "Using the 'ancient' value for the 'mode' argument is deprecated",
+            str(capture[2].message),
+        )
+
+    def test_removed_kwarg_values_methods(self):
+        class Thing:
+            @removals.removed_kwarg_values({'mode': {'legacy': None}})
+            def method(self, mode=None):
+                return mode
+
+            @removals.removed_kwarg_values({'mode': {'legacy': None}})
+            @classmethod
+            def klassmethod(cls, mode=None):
+                return mode
+
+            @removals.removed_kwarg_values({'mode': {'legacy': None}})
+            @staticmethod
+            def static(mode=None):
+                return mode
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual('legacy', Thing().method('legacy'))
+            self.assertEqual('legacy', Thing.method(Thing(), 'legacy'))
+            self.assertEqual('legacy', Thing.klassmethod('legacy'))
+            self.assertEqual('legacy', Thing.static('legacy'))
+            self.assertEqual('new', Thing().method('new'))
+        self.assertEqual(4, len(capture))
+
+    def test_removed_kwarg_values_unknown_argument(self):
+        def f(a):
+            pass
+
+        decorator = removals.removed_kwarg_values({'b': {1: None}})
+        self.assertRaises(ValueError, decorator, f)
+
     def test_removed_kwarg_keeps_argspec(self):
         @removals.removed_kwarg('b')
         def f(b=2):
@@ -528,6 +672,215 @@ class RemovalTests(test_base.TestCase):
         self.assertIn('stop using me', str(w.message))
         self.assertEqual(DeprecationWarning, w.category)
 
+    def test_property_messages_shared(self):
+        prop = ThingB.__dict__['green_tristars']
+        self.assertEqual(
+            "Reading the 'ThingB.green_tristars' property is deprecated",
+            prop._messages.get,
+        )
+        self.assertEqual(
+            "Setting the 'ThingB.green_tristars' property is deprecated",
+            prop._messages.set,
+        )
+
+        class Thing:
+            @removals.removed_property
+            def blue(self):
+                return 'blue'
+
+            @blue.setter  # type: ignore[no-redef]
+            def blue(self, value):
+                pass
+
+        # The intermediate (getter only) copy shares the same messages.
+        blue = Thing.__dict__['blue']
+        getter_only = blue.getter(blue.fget)
+        self.assertIs(blue._messages, getter_only._messages)
+
+    def test_property_messages_not_attached(self):
+        def red(self):
+            return 'red'
+
+        class Thing:
+            pass
+
+        # Not set via the class body so never finalized up front...
+        Thing.red = removals.removed_property(red)  # type: ignore[attr-defined]
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual('red', Thing().red)  # type: ignore[attr-defined]
+        self.assertEqual(1, len(capture))
+        self.assertEqual(
+            "Reading the 'RemovalTests.test_property_messages_not_attached."
+            "<locals>.red' property is deprecated",
+            str(capture[0].message),
+        )
+
+    def test_cached_property(self):
+        class Thing:
+            computed = 0
+
+            @removals.removed_cached_property(message="stop using me")
+            def purple(self):
+                """Purple."""
+                Thing.computed += 1
+                return 'purple'
+
+        self.assertEqual('Purple.', Thing.purple.__doc__)
+        t = Thing()
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for _i in range(3):
+                self.assertEqual('purple', t.purple)
+        self.assertEqual(1, Thing.computed)
+        self.assertEqual(1, len(capture))
+        self.assertEqual(
+            "Reading the 'RemovalTests.test_cached_property.<locals>."
+            "Thing.purple' property is deprecated: stop using me",
+            str(capture[0].message),
+        )
+        self.assertEqual('purple', t.__dict__['purple'])
+
+        # Deleting invalidates the cached value (and warns again)...
+        del t.purple
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual('purple', t.purple)
+        self.assertEqual(2, Thing.computed)
+        self.assertEqual(1, len(capture))
+        self.assertRaises(AttributeError, delattr, Thing(), 'purple')
+
+    def test_cached_property_once_per_class(self):
+        class Thing:
+            @removals.removed_cached_property(once_per_class=True)
+            def purple(self):
+                return 'purple'
+
+        class SubThing(Thing):
+            pass
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for cls in (Thing, Thing, SubThing, SubThing):
+                self.assertEqual('purple', cls().purple)
+        self.assertEqual(2, len(capture))
+
+    def test_cached_property_threaded(self):
+        barrier = threading.Barrier(8)
+        computed = []
+
+        class Thing:
+            @removals.removed_cached_property
+            def purple(self):
+                computed.append(1)
+                return 'purple'
+
+        t = Thing()
+
+        def reader():
+            barrier.wait()
+            self.assertEqual('purple', t.purple)
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            threads = [threading.Thread(target=reader) for _i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(1, len(computed))
+        self.assertEqual(1, len(capture))
+
+    def test_cached_property_other_instances_not_blocked(self):
+        entered = threading.Event()
+        release = threading.Event()
+
+        class Thing:
+            @removals.removed_cached_property
+            def slow(self):
+                # Only the first computation waits (on the test).
+                if not entered.is_set():
+                    entered.set()
+                    release.wait(30)
+                return 'slow'
+
+        first = Thing()
+        values = []
+        blocked = threading.Thread(target=lambda: values.append(first.slow))
+        other = threading.Thread(target=lambda: values.append(Thing().slow))
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            blocked.start()
+            try:
+                self.assertTrue(entered.wait(30))
+                other.start()
+                other.join(10)
+                self.assertFalse(other.is_alive())
+                self.assertEqual(['slow'], values)
+            finally:
+                release.set()
+                blocked.join()
+                other.join()
+        self.assertEqual(['slow', 'slow'], values)
+
+    def test_removed_attribute(self):
+        class Thing:
+            shade = removals.removed_attribute('navy', version='1.0')
+
+        t = Thing()
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for _i in range(3):
+                self.assertEqual('navy', t.shade)
+            self.assertEqual('navy', Thing.shade)
+        self.assertEqual(2, len(capture))
+        self.assertEqual(
+            "Reading the 'RemovalTests.test_removed_attribute.<locals>."
+            "Thing.shade' attribute is deprecated in version '1.0'",
+            str(capture[0].message),
+        )
+        self.assertEqual('navy', t.__dict__['shade'])
+
+    def test_removed_constant(self):
+        module = types.ModuleType('debtcollector_constants')
+        module.OLD = 1  # type: ignore[attr-defined]
+        module.NEW = 2  # type: ignore[attr-defined]
+        sys.modules[module.__name__] = module
+        self.addCleanup(sys.modules.pop, module.__name__)
+        removals.removed_constant(module.__name__, 'OLD', replacement='NEW')
+        removals.removed_constant(module, 'OLDER', value=0)
+        self.assertNotIn('OLD', module.__dict__)
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for _i in range(3):
+                self.assertEqual(1, module.OLD)
+            from debtcollector_constants import OLDER  # type: ignore
+
+            self.assertEqual(0, OLDER)
+        self.assertEqual(2, len(capture))
+        self.assertEqual(
+            "The 'debtcollector_constants.OLD' constant is deprecated, "
+            "please use NEW instead",
+            str(capture[0].message),
+        )
+        self.assertEqual(__file__, capture[0].filename)
+        self.assertEqual(1, module.__dict__['OLD'])
+        self.assertRaises(AttributeError, getattr, module, 'OLDEST')
+        self.assertRaises(
+            AttributeError, removals.removed_constant, module, 'OLDEST'
+        )
+
+    def test_removed_constant_chains_getattr(self):
+        module = types.ModuleType('debtcollector_constants')
+        module.__getattr__ = lambda name: name.lower()  # type: ignore
+        removals.removed_constant(module, 'OLD', value=1)
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            self.assertEqual(1, module.OLD)
+            self.assertEqual('other', module.OTHER)
+        self.assertEqual(1, len(capture))
+
     def test_warnings_emitted_function_args(self):
         with warnings.catch_warnings(record=True) as capture:
             warnings.simplefilter("always")
@@ -668,3 +1021,282 @@ class RemovalTests(test_base.TestCase):
 
     def test_removed_module_bad_type(self):
         self.assertRaises(TypeError, removals.removed_module, 2)
+
+
+def _call(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+class InternalCallersTest(test_base.TestCase):
+    def _external_caller(self, module_name, func, *args, **kwargs):
+        # Calls the given callable from a function that looks like it lives
+        # in another module (code objects compare by value, so the name of
+        # the code object is changed too).
+        code = _call.__code__.replace(co_name=module_name.replace('.', '_'))
+        call = types.FunctionType(code, {'__name__': module_name})
+        return call(func, *args, **kwargs)
+
+    def _check(self, func, *args, **kwargs):
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            func(*args, **kwargs)
+            func(*args, **kwargs)
+            self._external_caller(
+                'debtcollector.testsuite', func, *args, **kwargs
+            )
+            self._external_caller(
+                'debtcollector.tests.x', func, *args, **kwargs
+            )
+        self.assertEqual(1, len(capture))
+        self.assertEqual(__file__, capture[0].filename)
+
+    def test_remove(self):
+        @removals.remove(internal_package='debtcollector.tests')
+        def old_thing():
+            pass
+
+        self._check(old_thing)
+
+    def test_removed_kwarg(self):
+        @removals.removed_kwarg('b', internal_package='debtcollector.tests')
+        def f(b=2):
+            return b
+
+        self._check(f, b=3)
+
+    def test_renamed_kwarg(self):
+        @renames.renamed_kwarg(
+            'b', 'c', replace=True, internal_package='debtcollector.tests'
+        )
+        def f(c=2):
+            return c
+
+        self._check(f, b=3)
+
+    def test_moved_function(self):
+        old_yellow = moves.moved_function(
+            yellow_sun,
+            'yellow_sun',
+            __name__,
+            internal_package='debtcollector.tests',
+        )
+        self._check(old_yellow)
+
+    def test_moved_read_only_property(self):
+        class Thing:
+            new = 1
+            old = moves.moved_read_only_property(
+                'old', 'new', internal_package='debtcollector.tests'
+            )
+
+        self._check(getattr, Thing, 'old')
+        self.assertRaises(
+            ValueError,
+            moves.moved_read_only_property,
+            'old',
+            'new',
+            resolve_once=True,
+            internal_package='debtcollector',
+        )
+
+
+class StructuredWarningTest(test_base.TestCase):
+    def _structured(self, w):
+        message = w.message
+        if not isinstance(message, debtcollector.DebtCollectorWarning):
+            self.fail(f"{message!r} is not a structured warning")
+        return message
+
+    def test_remove(self):
+        @removals.remove(
+            version='1.0',
+            removal_version='2.0',
+            category=debtcollector.DebtCollectorDeprecationWarning,
+        )
+        def old_thing():
+            pass
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            old_thing()
+        self.assertEqual(1, len(capture))
+        w = self._structured(capture[0])
+        self.assertIsInstance(w, DeprecationWarning)
+        self.assertEqual('function', w.kind)
+        self.assertEqual(
+            f'{__name__}.StructuredWarningTest.test_remove.<locals>.old_thing',
+            w.name,
+        )
+        self.assertEqual(f'function:{w.name}', w.deprecation_id)
+        self.assertEqual('1.0', w.version)
+        self.assertEqual('2.0', w.removal_version)
+        self.assertIsNone(w.replacement)
+        self.assertEqual(
+            "Using function/method 'StructuredWarningTest.test_remove."
+            "<locals>.old_thing()' is deprecated in version '1.0' and will "
+            "be removed in version '2.0'",
+            str(w),
+        )
+
+    def test_moved_and_renamed(self):
+        old_yellow = moves.moved_function(
+            yellow_sun,
+            'old_yellow_sun',
+            __name__,
+            category=debtcollector.DebtCollectorPendingDeprecationWarning,
+        )
+
+        @renames.renamed_kwarg(
+            'b',
+            'c',
+            replace=True,
+            category=debtcollector.DebtCollectorFutureWarning,
+        )
+        def f(c=None):
+            return c
+
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            old_yellow()
+            f(b=1)
+        self.assertEqual(2, len(capture))
+        self.assertEqual(
+            debtcollector.DebtCollectorPendingDeprecationWarning,
+            capture[0].category,
+        )
+        self.assertEqual(
+            f'{__name__}.yellow_sun', self._structured(capture[0]).replacement
+        )
+        self.assertEqual(
+            f'moved-function:{__name__}.old_yellow_sun',
+            self._structured(capture[0]).deprecation_id,
+        )
+        self.assertEqual(
+            debtcollector.DebtCollectorFutureWarning, capture[1].category
+        )
+        self.assertEqual('c', self._structured(capture[1]).replacement)
+        self.assertEqual(
+            "Using the 'b' argument is deprecated, please use the 'c' "
+            "argument instead",
+            str(capture[1].message),
+        )
+
+    def test_lazily_formatted(self):
+        calls = []
+
+        def prefix():
+            calls.append(1)
+            return 'Old thing is deprecated'
+
+        w = _utils.make_message(
+            prefix,
+            version='1.0',
+            category=debtcollector.DebtCollectorDeprecationWarning,
+            deprecation_id='function:a.b',
+        )
+        self.assertEqual([], calls)
+        self.assertEqual("Old thing is deprecated in version '1.0'", str(w))
+        self.assertEqual("Old thing is deprecated in version '1.0'", str(w))
+        self.assertEqual(1, len(calls))
+        self.assertEqual(
+            "Old thing is deprecated in version '1.0'",
+            _utils.make_message(prefix, version='1.0'),
+        )
+
+        copy = pickle.loads(pickle.dumps(w))  # noqa: S301
+        self.assertEqual(str(w), str(copy))
+        self.assertEqual(('function', 'a.b'), (copy.kind, copy.name))
+        self.assertEqual('1.0', copy.version)
+
+    def test_policy_error(self):
+        @removals.remove(
+            category=debtcollector.DebtCollectorDeprecationWarning
+        )
+        def old_thing():
+            pass
+
+        deprecation_id = _utils.get_deprecation_id(
+            'function', _utils.get_full_name(old_thing)
+        )
+        policy.set_policy(deprecation_id, policy.ERROR)
+        self.addCleanup(policy.clear_policies)
+        with self.assertRaises(
+            debtcollector.DebtCollectorDeprecationWarning
+        ) as ctx:
+            old_thing()
+        self.assertEqual(deprecation_id, ctx.exception.deprecation_id)
+
+
+class MonitoringTest(test_base.TestCase):
+    def _check(self, func, expected_message):
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for _i in range(3):
+                self.assertTrue(func())
+        if _utils._monitoring is None:
+            # Falls back to wrapping (so every call warns).
+            self.assertEqual(3, len(capture))
+        else:
+            self.assertEqual(1, len(capture))
+        self.assertEqual(expected_message, str(capture[0].message))
+        self.assertEqual(__file__, capture[0].filename)
+
+    def test_remove(self):
+        def sun():
+            return True
+
+        old_sun = removals.remove(sun, monitoring=True)
+        if _utils._monitoring is not None:
+            self.assertIs(sun, old_sun)
+        self._check(
+            old_sun,
+            "Using function/method 'MonitoringTest.test_remove.<locals>."
+            "sun()' is deprecated",
+        )
+
+    def test_moved_function(self):
+        old_yellow = moves.moved_function(
+            yellow_sun, 'old_yellow_sun', __name__, monitoring=True
+        )
+        self.assertEqual('old_yellow_sun', old_yellow.__name__)
+        self._check(
+            old_yellow,
+            f"Function '{__name__}.old_yellow_sun()' has moved to "
+            f"'{__name__}.yellow_sun()'",
+        )
+
+    def test_moved_functions_same_name(self):
+        old_a = moves.moved_function(
+            yellow_sun, 'helper', 'pkg.mod_a', monitoring=True
+        )
+        old_b = moves.moved_function(
+            yellow_sun, 'helper', 'pkg.mod_b', monitoring=True
+        )
+        if _utils._monitoring is not None:
+            self.assertIsNot(old_a.__code__, old_b.__code__)
+        self._check(
+            old_a,
+            f"Function 'pkg.mod_a.helper()' has moved to "
+            f"'{__name__}.yellow_sun()'",
+        )
+        self._check(
+            old_b,
+            f"Function 'pkg.mod_b.helper()' has moved to "
+            f"'{__name__}.yellow_sun()'",
+        )
+
+    @unittest.skipIf(_utils._monitoring is None, 'requires sys.monitoring')
+    def test_internal_callers(self):
+        @removals.remove(monitoring=True, internal_package='debtcollector')
+        def sun():
+            return True
+
+        code = _call.__code__.replace(co_name='external_call')
+        external_call = types.FunctionType(code, {'__name__': 'other'})
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            sun()
+            self.assertEqual(0, len(capture))
+            external_call(sun)
+            external_call(sun)
+            self.assertEqual(1, len(capture))
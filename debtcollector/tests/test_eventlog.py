@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from debtcollector import eventlog
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove(version='1.0', removal_version='2.0')
+def grey_comet():
+    return True
+
+
+GREY_COMET_ID = f'function:{__name__}.grey_comet'
+
+
+def _read_events(path):
+    with open(path, encoding='utf-8') as fh:
+        return [json.loads(line) for line in fh]
+
+
+class EventLogTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'events.jsonl')
+        self.addCleanup(eventlog.disable)
+        self.ignore_warnings()
+
+    def test_buffered(self):
+        eventlog.enable(self.path, buffer_size=3)
+        grey_comet()
+        grey_comet()
+        # Nothing is written until the buffer is full.
+        self.assertFalse(os.path.exists(self.path))
+        grey_comet()
+        events = _read_events(self.path)
+        self.assertEqual(3, len(events))
+        event = events[0]
+        self.assertEqual(GREY_COMET_ID, event['id'])
+        self.assertEqual('function', event['kind'])
+        self.assertEqual(f'{__name__}.grey_comet', event['name'])
+        self.assertEqual('1.0', event['version'])
+        self.assertEqual('2.0', event['removal_version'])
+        self.assertEqual(__name__, event['module'])
+        self.assertEqual('test_buffered', event['function'])
+        self.assertEqual(__file__, event['file'])
+        self.assertEqual(os.getpid(), event['pid'])
+        grey_comet()
+        eventlog.flush()
+        self.assertEqual(4, len(_read_events(self.path)))
+        grey_comet()
+        eventlog.disable()
+        self.assertEqual(5, len(_read_events(self.path)))
+        grey_comet()
+        self.assertEqual(5, len(_read_events(self.path)))
+
+    def test_rotated(self):
+        event_log = eventlog.enable(
+            self.path, buffer_size=1, max_bytes=1, backup_count=2
+        )
+        for _i in range(4):
+            grey_comet()
+        event_log.close()
+        self.assertEqual(1, len(_read_events(self.path)))
+        self.assertEqual(1, len(_read_events(self.path + '.1')))
+        self.assertEqual(1, len(_read_events(self.path + '.2')))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+
+    def test_flush_interval(self):
+        eventlog.enable(self.path, buffer_size=100, flush_interval=0)
+        grey_comet()
+        self.assertFalse(os.path.exists(self.path))
+        # The first hit is overdue once the next one is recorded.
+        grey_comet()
+        self.assertEqual(2, len(_read_events(self.path)))
+        eventlog.enable(self.path, buffer_size=100, flush_interval=None)
+        for _i in range(3):
+            grey_comet()
+        self.assertEqual(2, len(_read_events(self.path)))
+        self.assertRaises(
+            ValueError, eventlog.EventLog, self.path, flush_interval=-1
+        )
+
+    def test_rotated_by_others(self):
+        # Like the event logs of two processes writing to the same file.
+        first, second = (
+            eventlog.EventLog(self.path, buffer_size=1, backup_count=5)
+            for _i in range(2)
+        )
+        for event_log in (first, second):
+            self.addCleanup(event_log.close)
+        first.record(GREY_COMET_ID, sys._getframe())
+        # Room for two (and a half) hits.
+        first.max_bytes = second.max_bytes = (
+            os.path.getsize(self.path) * 5 // 2
+        )
+        second.record(GREY_COMET_ID, sys._getframe())
+        # The size includes what the other wrote (so this rotates).
+        first.record(GREY_COMET_ID, sys._getframe())
+        self.assertEqual(1, len(_read_events(self.path)))
+        self.assertEqual(2, len(_read_events(self.path + '.1')))
+        # This notices the file it had open got rotated (and reopens it).
+        second.record(GREY_COMET_ID, sys._getframe())
+        second.max_bytes = 1
+        second.record(GREY_COMET_ID, sys._getframe())
+        self.assertEqual(1, len(_read_events(self.path)))
+        self.assertEqual(2, len(_read_events(self.path + '.1')))
+        self.assertEqual(2, len(_read_events(self.path + '.2')))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_fork(self):
+        eventlog.enable(self.path, buffer_size=100)
+        grey_comet()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                grey_comet()
+                eventlog.disable()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        eventlog.disable()
+        pids = sorted(event['pid'] for event in _read_events(self.path))
+        # The hit buffered before forking is written once (by the parent).
+        self.assertEqual(sorted([os.getpid(), pid]), pids)
@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from debtcollector import _utils
+from debtcollector import attribution
+from debtcollector import eventlog
+from debtcollector import policy
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def green_star():
+    return True
+
+
+GREEN_STAR_ID = f'function:{__name__}.green_star'
+
+
+def _fork(child):
+    # Runs the child (which must return true) in a forked process; children
+    # that deadlock are killed (by an alarm) and fail too.
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            signal.alarm(10)
+            if child():
+                status = 0
+        finally:
+            os._exit(status)
+    return pid
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+class ForkTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'events.jsonl')
+        self.policy_path = os.path.join(tmp_dir.name, 'policy.json')
+        self.addCleanup(eventlog.disable)
+        self.addCleanup(attribution.disable)
+        self.addCleanup(attribution.disable_stacks)
+        self.addCleanup(policy.clear_policies)
+        self.ignore_warnings()
+
+    def _wait(self, pids):
+        for pid in pids:
+            _pid, status = os.waitpid(pid, 0)
+            self.assertEqual(0, os.waitstatus_to_exitcode(status))
+
+    def test_fork_under_load(self):
+        attribution.enable()
+        attribution.enable_stacks()
+        eventlog.enable(self.path, buffer_size=64)
+        policy.set_policy(GREEN_STAR_ID, policy.ONCE)
+        stop = threading.Event()
+        hits: collections.Counter[int] = collections.Counter()
+
+        def hammer(index):
+            while not stop.is_set():
+                green_star()
+                hits[index] += 1
+
+        threads = [
+            threading.Thread(target=hammer, args=(i,)) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+
+        def child():
+            # Nothing of the parent is counted (or buffered) here, but what
+            # it warned about (once) is still known.
+            if attribution.get_callers() or attribution.get_stacks():
+                return False
+            green_star()
+            callers = attribution.get_callers()
+            eventlog.disable()
+            return len(callers) == 1 and callers[0].count == 1
+
+        try:
+            pids = [_fork(child) for _i in range(8)]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self._wait(pids)
+        eventlog.disable()
+        with open(self.path, encoding='utf-8') as fh:
+            events = collections.Counter(
+                json.loads(line)['pid'] for line in fh
+            )
+        # Every hit is written once, by the process that made it.
+        self.assertEqual(sum(hits.values()), events.pop(os.getpid()))
+        self.assertEqual(dict.fromkeys(pids, 1), dict(events))
+
+    def test_reload_on_signal(self):
+        with open(self.policy_path, 'w') as fh:
+            json.dump({'rules': [{'prefix': 'a', 'action': 'ignore'}]}, fh)
+        policy.load_policy_file(self.policy_path)
+        self.addCleanup(policy.unload_policy_file)
+        self.addCleanup(
+            signal.signal, signal.SIGHUP, signal.getsignal(signal.SIGHUP)
+        )
+        policy.reload_on_signal()
+
+        def child():
+            # The reloader thread is only started once asked to reload.
+            if policy._reloader_pid == os.getpid():
+                return False
+            compiled = _utils._compiled_policy
+            os.kill(os.getpid(), signal.SIGHUP)
+            for _i in range(500):
+                if _utils._compiled_policy is not compiled:
+                    return policy._reloader_pid == os.getpid()
+                time.sleep(0.01)
+            return False
+
+        self._wait([_fork(child)])
+
+    def test_locks_held_while_forking(self):
+        entered = threading.Event()
+        release = threading.Event()
+
+        class Thing:
+            @removals.removed_cached_property
+            def slow(self):
+                if not entered.is_set():
+                    entered.set()
+                    release.wait()
+                return 1
+
+        def child():
+            # Neither waits on a lock held by a thread of the parent.
+            policy.unload_policy_file()
+            return Thing().slow == 1
+
+        holder = threading.Thread(target=lambda: Thing().slow)
+        holder.start()
+        try:
+            entered.wait()
+            with policy._policy_file_lock:
+                pid = _fork(child)
+        finally:
+            release.set()
+            holder.join()
+        self._wait([pid])
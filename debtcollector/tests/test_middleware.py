@@ -0,0 +1,210 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+import threading
+from wsgiref import util as wsgi_util
+
+from debtcollector import middleware
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def old_handler():
+    return True
+
+
+@removals.remove()
+def old_renderer():
+    return True
+
+
+OLD_HANDLER_ID = f'function:{__name__}.old_handler'
+OLD_RENDERER_ID = f'function:{__name__}.old_renderer'
+
+
+def wsgi_app(environ, start_response):
+    if environ['PATH_INFO'] == '/old':
+        old_handler()
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+
+    def body():
+        # Hit while the body is made (so after the response was started).
+        if environ['PATH_INFO'] == '/old':
+            old_renderer()
+        yield b'ok'
+
+    return body()
+
+
+def _call_wsgi(app, path):
+    environ: dict[str, object] = {}
+    wsgi_util.setup_testing_defaults(environ)
+    environ['PATH_INFO'] = path
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started.append(dict(headers))
+
+    result = app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        result.close()
+    return started[0], body
+
+
+async def asgi_app(scope, receive, send):
+    if scope['path'] == '/old':
+        old_handler()
+    # Let concurrent requests interleave with this one.
+    await asyncio.sleep(0)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    if scope['path'] == '/old':
+        old_renderer()
+    await send({'type': 'http.response.body', 'body': b'ok'})
+
+
+async def _call_asgi(app, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'path': path, 'root_path': ''}
+    await app(scope, receive, send)
+    return dict(messages[0]['headers'])
+
+
+class MiddlewareTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ignore_warnings()
+
+    def test_recording(self):
+        self.assertEqual(frozenset(), middleware.get_request_deprecations())
+        with middleware.recording() as hits:
+            old_handler()
+            self.assertEqual(
+                frozenset([OLD_HANDLER_ID]),
+                middleware.get_request_deprecations(),
+            )
+        old_renderer()
+        self.assertEqual({OLD_HANDLER_ID}, hits)
+
+    def test_wsgi(self):
+        app = middleware.WSGIMiddleware(
+            wsgi_app, header=middleware.DEFAULT_HEADER
+        )
+        headers, body = _call_wsgi(app, '/old')
+        self.assertEqual(b'ok', body)
+        # Only what was hit before the response started can be listed.
+        self.assertEqual(OLD_HANDLER_ID, headers[middleware.DEFAULT_HEADER])
+        headers, body = _call_wsgi(app, '/new')
+        self.assertNotIn(middleware.DEFAULT_HEADER, headers)
+        self.assertEqual(
+            {'/old': {OLD_HANDLER_ID: 1, OLD_RENDERER_ID: 1}},
+            app.stats.snapshot(),
+        )
+        app.stats.reset()
+        self.assertEqual({}, app.stats.snapshot())
+
+    def test_wsgi_many_paths(self):
+        def items_app(environ, start_response):
+            old_handler()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        stats = middleware.RouteStats(max_routes=3)
+        app = middleware.WSGIMiddleware(items_app, stats=stats)
+        for i in range(50):
+            _call_wsgi(app, f'/items/{i}')
+        _call_wsgi(app, '/items/0')
+        self.assertEqual(
+            {
+                '/items/0': {OLD_HANDLER_ID: 2},
+                '/items/1': {OLD_HANDLER_ID: 1},
+                '/items/2': {OLD_HANDLER_ID: 1},
+                middleware.OTHER_ROUTE: {OLD_HANDLER_ID: 47},
+            },
+            stats.snapshot(),
+        )
+        self.assertRaises(ValueError, middleware.RouteStats, max_routes=0)
+
+    def test_wsgi_threads(self):
+        stats = middleware.RouteStats()
+        app = middleware.WSGIMiddleware(
+            wsgi_app,
+            stats=stats,
+            route=lambda environ: 'r' + environ['PATH_INFO'],
+        )
+        barrier = threading.Barrier(8)
+
+        def serve(path):
+            barrier.wait()
+            for _i in range(25):
+                _call_wsgi(app, path)
+
+        threads = [
+            threading.Thread(target=serve, args=('/old' if i % 2 else '/new',))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            {'r/old': {OLD_HANDLER_ID: 100, OLD_RENDERER_ID: 100}},
+            stats.snapshot(),
+        )
+
+    def test_asgi(self):
+        app = middleware.ASGIMiddleware(
+            asgi_app, header=middleware.DEFAULT_HEADER
+        )
+
+        async def serve():
+            return await asyncio.gather(
+                *[_call_asgi(app, path) for path in ('/old', '/new') * 10]
+            )
+
+        results = asyncio.run(serve())
+        header = middleware.DEFAULT_HEADER.lower().encode('latin-1')
+        self.assertEqual(
+            [OLD_HANDLER_ID.encode('latin-1'), None] * 10,
+            [headers.get(header) for headers in results],
+        )
+        self.assertEqual(
+            {'/old': {OLD_HANDLER_ID: 10, OLD_RENDERER_ID: 10}},
+            app.stats.snapshot(),
+        )
+
+    def test_asgi_lifespan(self):
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope['type'])
+
+        async def receive():
+            return {'type': 'lifespan.startup'}
+
+        async def send(message):
+            pass
+
+        wrapped = middleware.ASGIMiddleware(app)
+        asyncio.run(wrapped({'type': 'lifespan'}, receive, send))
+        self.assertEqual(['lifespan'], calls)
+        self.assertEqual({}, wrapped.stats.snapshot())
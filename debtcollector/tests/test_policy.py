@@ -0,0 +1,390 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from unittest import mock
+import warnings
+
+import debtcollector
+from debtcollector import _utils
+from debtcollector import moves
+from debtcollector import policy
+from debtcollector import removals
+from debtcollector import renames
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def red_comet():
+    return True
+
+
+@removals.remove()
+def blue_comet():
+    return True
+
+
+@removals.remove(removal_version='3.0')
+def green_comet():
+    return True
+
+
+@renames.renamed_kwarg('blip', 'blop')
+def blip_blop(blip=1, blop=1):
+    return (blip, blop)
+
+
+class Giraffe:
+    color = 'orange'
+    colour = moves.moved_read_only_property('colour', 'color')
+
+    @removals.removed_property
+    def spots(self):
+        return 5
+
+
+class PolicyTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(policy.clear_policies)
+
+    def _capture(self, func, times=1):
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            for _i in range(times):
+                func()
+        return capture
+
+    def test_ids(self):
+        ids = []
+        for key in (
+            f'function:{__name__}.red_comet',
+            f'kwarg:{__name__}.blip_blop(blip)',
+            f'moved-property:{__name__}.Giraffe.colour',
+            f'property:{__name__}.Giraffe.spots',
+        ):
+            policy.set_policy(key, policy.IGNORE)
+            ids.append(key)
+        capture = self._capture(red_comet)
+        capture.extend(self._capture(lambda: blip_blop(blip=2)))
+        capture.extend(self._capture(lambda: Giraffe.colour))
+        capture.extend(self._capture(lambda: Giraffe().spots))
+        self.assertEqual([], capture)
+        for key in ids:
+            self.assertEqual(policy.IGNORE, policy.get_policy(key))
+
+    def test_prefix(self):
+        policy.set_policy(__name__, policy.IGNORE)
+        self.assertEqual([], self._capture(red_comet))
+        self.assertEqual([], self._capture(lambda: blip_blop(blip=2)))
+        # The more specific policy wins.
+        policy.set_policy(f'{__name__}.blue_comet', policy.ALWAYS)
+        self.assertEqual([], self._capture(red_comet))
+        self.assertEqual(1, len(self._capture(blue_comet)))
+        self.assertIsNone(policy.get_policy('function:other.blue_comet'))
+
+    def test_once(self):
+        policy.set_policy(f'function:{__name__}.red_comet', policy.ONCE)
+        self.assertEqual(1, len(self._capture(red_comet, times=5)))
+        self.assertEqual(0, len(self._capture(red_comet, times=5)))
+        self.assertEqual(5, len(self._capture(blue_comet, times=5)))
+
+    def test_once_threads(self):
+        policy.set_policy(f'function:{__name__}.red_comet', policy.ONCE)
+        barrier = threading.Barrier(8)
+
+        def hit():
+            barrier.wait()
+            for _i in range(100):
+                red_comet()
+
+        def hit_from_threads():
+            threads = [threading.Thread(target=hit) for _i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, len(self._capture(hit_from_threads)))
+
+    def test_sample(self):
+        policy.set_policy(__name__, policy.SAMPLE, rate=4)
+        self.assertEqual(3, len(self._capture(red_comet, times=9)))
+
+    def test_error(self):
+        policy.set_policy(f'function:{__name__}.red_comet', policy.ERROR)
+        self.assertRaises(DeprecationWarning, red_comet)
+        self.assertTrue(blue_comet())
+
+    def test_error_structured(self):
+        class Zebra:
+            @removals.removed_cached_property(
+                category=debtcollector.DebtCollectorDeprecationWarning
+            )
+            def stripes(self):
+                return 40
+
+        policy.set_policy(__name__, policy.ERROR)
+        raised = []
+        for _i in range(2):
+            try:
+                Zebra().stripes
+            except debtcollector.DebtCollectorDeprecationWarning as e:
+                raised.append(e)
+        self.assertEqual(2, len(raised))
+        self.assertIsNot(raised[0], raised[1])
+        self.assertEqual(str(raised[0]), str(raised[1]))
+        # The warning shared by the hits is left untouched.
+        shared = Zebra.stripes._out_message
+        self.assertNotIn(shared, raised)
+        self.assertIsNone(shared.__traceback__)
+
+    def test_remove_policy(self):
+        policy.set_policy(__name__, policy.IGNORE)
+        self.assertEqual(0, len(self._capture(red_comet)))
+        policy.remove_policy(__name__)
+        self.assertEqual(1, len(self._capture(red_comet)))
+
+    def test_deprecate(self):
+        policy.set_policy('custom:thing', policy.IGNORE)
+        capture = self._capture(
+            lambda: debtcollector.deprecate(
+                "Its broken", deprecation_id='custom:thing'
+            )
+        )
+        self.assertEqual(0, len(capture))
+        capture = self._capture(lambda: debtcollector.deprecate("Its broken"))
+        self.assertEqual(1, len(capture))
+
+    def test_bad_policy(self):
+        self.assertRaises(ValueError, policy.set_policy, 'a', 'explode')
+        self.assertRaises(
+            ValueError, policy.set_policy, 'a', policy.SAMPLE, rate=0
+        )
+
+
+class PolicyFileTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(policy.unload_policy_file)
+        self.addCleanup(policy.clear_policies)
+
+    def _write(self, name, contents):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, name)
+        with open(path, 'w') as fh:
+            fh.write(contents)
+        return path
+
+    def _capture(self, func):
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            func()
+        return len(capture)
+
+    def test_json(self):
+        rules = [
+            {'id': f'function:{__name__}.red_comet', 'action': 'ignore'},
+            {'prefix': 'not.a.module', 'action': 'error'},
+        ]
+        path = self._write('policy.json', json.dumps({'rules': rules}))
+        compiled = policy.load_policy_file(path)
+        self.assertEqual(0, self._capture(red_comet))
+        self.assertEqual(1, self._capture(blue_comet))
+        self.assertEqual(
+            ['prefix'], [r.match_key for r in policy.unmatched_rules()]
+        )
+        self.assertEqual(2, len(compiled.rules))
+
+    def test_ini(self):
+        path = self._write(
+            'policy.ini',
+            f"""
+[comets]
+prefix = {__name__}.red_comet
+action = ignore
+
+[kwargs]
+glob = kwarg:{__name__}.*
+action = error
+""",
+        )
+        policy.load_policy_file(path)
+        self.assertEqual(0, self._capture(red_comet))
+        self.assertRaises(DeprecationWarning, blip_blop, blip=2)
+
+    def test_toml(self):
+        path = self._write(
+            'policy.toml',
+            """
+[[rules]]
+removal_version = "3.0"
+action = "error"
+""",
+        )
+        policy.load_policy_file(path)
+        self.assertRaises(DeprecationWarning, green_comet)
+        self.assertEqual(1, self._capture(red_comet))
+
+    def test_precedence(self):
+        rules = [
+            {'glob': '*comet', 'action': 'error'},
+            {'prefix': __name__, 'action': 'sample', 'rate': 1000},
+            {'prefix': f'{__name__}.red_comet', 'action': 'always'},
+        ]
+        path = self._write('policy.json', json.dumps({'rules': rules}))
+        policy.load_policy_file(path)
+        self.assertEqual(
+            policy.ALWAYS, policy.get_policy(f'function:{__name__}.red_comet')
+        )
+        self.assertEqual(
+            policy.SAMPLE, policy.get_policy(f'function:{__name__}.blue_comet')
+        )
+        self.assertEqual(
+            policy.ERROR, policy.get_policy('function:other.comet')
+        )
+        # Policies set in code win over the file.
+        policy.set_policy(__name__, policy.IGNORE)
+        self.assertEqual(
+            policy.IGNORE, policy.get_policy(f'function:{__name__}.red_comet')
+        )
+
+    def test_reload(self):
+        path = self._write(
+            'policy.json',
+            json.dumps({'rules': [{'prefix': __name__, 'action': 'ignore'}]}),
+        )
+        policy.load_policy_file(path)
+        self.assertEqual(0, self._capture(red_comet))
+        with open(path, 'w') as fh:
+            json.dump({'rules': []}, fh)
+        self.addCleanup(
+            signal.signal, signal.SIGHUP, signal.getsignal(signal.SIGHUP)
+        )
+        policy.reload_on_signal()
+        compiled = _utils._compiled_policy
+        # Signals that interrupt a load (which holds the policy file lock)
+        # never wait on it.
+        with policy._policy_file_lock:
+            os.kill(os.getpid(), signal.SIGHUP)
+        for _i in range(1000):
+            if _utils._compiled_policy is not compiled:
+                break
+            time.sleep(0.01)
+        self.assertEqual(1, self._capture(red_comet))
+
+    def test_environment(self):
+        path = self._write(
+            'policy.json',
+            json.dumps({'rules': [{'prefix': __name__, 'action': 'ignore'}]}),
+        )
+        env = {policy.POLICY_FILE_ENV: path}
+        with mock.patch.dict(os.environ, env):
+            with mock.patch('atexit.register') as register:
+                policy._load_from_environment()
+        register.assert_called_once_with(policy.report_unmatched_rules)
+        self.assertEqual(0, self._capture(red_comet))
+
+    def test_bad_rules(self):
+        self.assertRaises(ValueError, policy.compile_rules, [{'prefix': 'a'}])
+        self.assertRaises(
+            ValueError,
+            policy.compile_rules,
+            [{'prefix': 'a', 'id': 'b', 'action': 'ignore'}],
+        )
+        self.assertRaises(
+            ValueError,
+            policy.compile_rules,
+            [{'module': 'a', 'action': 'ignore'}],
+        )
+        path = self._write('policy.yaml', '')
+        self.assertRaises(ValueError, policy.load_policy_file, path)
+
+
+class RemovalEnforcementTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(policy.enforce_removal_versions, None)
+        patcher = mock.patch.object(
+            _utils, 'get_installed_version', return_value='3.1.0.dev4'
+        )
+        self.installed_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parse_version(self):
+        self.assertEqual(((3,), 1), _utils.parse_version('3.0.0'))
+        self.assertEqual(((3, 1), 0), _utils.parse_version('v3.1rc1'))
+        self.assertEqual(((3, 1, 2), 1), _utils.parse_version('3.1.2.post1'))
+        self.assertIsNone(_utils.parse_version('zed'))
+        self.assertEqual(((3,), 0), _utils.parse_version('3.0.0.dev1'))
+
+    def test_error(self):
+        policy.enforce_removal_versions(policy.ENFORCE_ERROR)
+
+        @removals.remove(removal_version='3.0')
+        def overdue():
+            pass
+
+        @removals.remove(removal_version='3.2')
+        def not_overdue():
+            pass
+
+        self.assertRaises(DeprecationWarning, overdue)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            not_overdue()
+        self.installed_version.assert_called_with(__name__.split('.')[0])
+        # Explicit policies still win.
+        policy.set_policy(__name__, policy.IGNORE)
+        self.addCleanup(policy.clear_policies)
+        overdue()
+
+    def test_error_existing(self):
+        # Deprecations made before enforcement was enabled are checked too.
+        policy.enforce_removal_versions(policy.ENFORCE_ERROR)
+        self.assertRaises(DeprecationWarning, green_comet)
+        policy.enforce_removal_versions(None)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            green_comet()
+
+    def test_log(self):
+        policy.enforce_removal_versions(policy.ENFORCE_LOG)
+        with self.assertLogs(_utils.LOG) as logs:
+
+            @removals.remove(removal_version='3.0')
+            def overdue():
+                pass
+
+        self.assertEqual(1, len(logs.output))
+        self.assertIn("version '3.1.0.dev4'", logs.output[0])
+        # A pre-release of the removal version is not overdue.
+        with mock.patch.object(_utils.LOG, 'warning') as warning:
+
+            @removals.remove(removal_version='3.1')
+            def not_overdue():
+                pass
+
+        warning.assert_not_called()
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter("always")
+            overdue()
+        self.assertEqual(1, len(capture))
+
+    def test_bad_mode(self):
+        self.assertRaises(ValueError, policy.enforce_removal_versions, 'boom')
@@ -0,0 +1,208 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+import debtcollector
+from debtcollector import pytest_plugin
+from debtcollector.tests import base as test_base
+
+TEST_MODULE = textwrap.dedent(
+    """\
+    from debtcollector import removals
+
+
+    @removals.remove()
+    def old_thing():
+        return True
+
+
+    def test_once():
+        assert old_thing()
+
+
+    def test_twice():
+        assert old_thing()
+        assert old_thing()
+
+
+    def test_none():
+        pass
+    """
+)
+OLD_THING_ID = 'function:test_old.old_thing'
+NEW_USAGE = textwrap.dedent(
+    """\
+
+
+    def test_new():
+        assert (lambda: old_thing())()
+    """
+)
+
+
+class HitCountsTest(test_base.TestCase):
+    def test_merge(self):
+        counts = pytest_plugin.HitCounts()
+        frame = sys._getframe()
+        counts.record('a', frame)
+        counts.nodeid = 'test_b'
+        counts.record('a', frame)
+        counts.record('b', frame)
+        # What workers send has to survive being serialized.
+        worker_counts = json.loads(json.dumps(counts.to_dict()))
+        merged = pytest_plugin.HitCounts()
+        merged.merge_dict(worker_counts)
+        merged.merge_dict(worker_counts)
+        caller = (__name__, f'{type(self).__qualname__}.test_merge')
+        self.assertEqual(
+            {('a', *caller), ('b', *caller)},
+            merged.usages(),
+        )
+        self.assertEqual(
+            [
+                {
+                    'id': 'a',
+                    'hits': 4,
+                    'callers': [
+                        {
+                            'module': caller[0],
+                            'function': caller[1],
+                            'hits': 4,
+                        }
+                    ],
+                    'tests': {pytest_plugin.NO_TEST: 2, 'test_b': 2},
+                },
+                {
+                    'id': 'b',
+                    'hits': 2,
+                    'callers': [
+                        {
+                            'module': caller[0],
+                            'function': caller[1],
+                            'hits': 2,
+                        }
+                    ],
+                    'tests': {'test_b': 2},
+                },
+            ],
+            merged.rows(),
+        )
+
+
+@unittest.skipUnless(importlib.util.find_spec('pytest'), 'requires pytest')
+class PluginTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.test_path = os.path.join(self.tmp_dir, 'test_old.py')
+        with open(self.test_path, 'w', encoding='utf-8') as fh:
+            fh.write(TEST_MODULE)
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def _pytest(self, *args):
+        root = os.path.dirname(os.path.dirname(debtcollector.__file__))
+        env = dict(os.environ, PYTHONPATH=root)
+        return subprocess.run(  # noqa: S603
+            [
+                sys.executable,
+                '-m',
+                'pytest',
+                '-p',
+                'debtcollector.pytest_plugin',
+                '-p',
+                'no:cacheprovider',
+                # Warnings are shown (once) as usual, but hits are counted
+                # whatever the warnings filters.
+                '-W',
+                'ignore::DeprecationWarning',
+                *args,
+                self.test_path,
+            ],
+            cwd=self.tmp_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    def _read_report(self):
+        with open(self._path('report.json'), encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def test_report(self):
+        result = self._pytest(
+            '--debtcollector-report',
+            'report.json',
+            '--debtcollector-write-baseline',
+            'baseline.json',
+        )
+        self.assertEqual(0, result.returncode, result.stdout)
+        self.assertIn('debtcollector deprecations', result.stdout)
+        self.assertIn(
+            f'3 hit(s) by      2 test(s)  {OLD_THING_ID}', result.stdout
+        )
+        (row,) = self._read_report()['deprecations']
+        self.assertEqual(OLD_THING_ID, row['id'])
+        self.assertEqual(
+            {'test_old.py::test_once': 1, 'test_old.py::test_twice': 2},
+            row['tests'],
+        )
+        # Nothing new is used, so the run passes.
+        result = self._pytest('--debtcollector-baseline', 'baseline.json')
+        self.assertEqual(0, result.returncode, result.stdout)
+        with open(self.test_path, 'a', encoding='utf-8') as fh:
+            fh.write(NEW_USAGE)
+        result = self._pytest(
+            '--debtcollector-baseline',
+            'baseline.json',
+            '--debtcollector-report',
+            'report.json',
+        )
+        self.assertEqual(1, result.returncode, result.stdout)
+        self.assertIn('4 passed', result.stdout)
+        self.assertIn('new deprecation usages', result.stdout)
+        self.assertEqual(
+            [[OLD_THING_ID, 'test_old', 'test_new.<locals>.<lambda>']],
+            self._read_report()['new_usages'],
+        )
+
+    def test_disabled(self):
+        result = self._pytest()
+        self.assertEqual(0, result.returncode, result.stdout)
+        self.assertNotIn('debtcollector deprecations', result.stdout)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec('xdist'), 'requires pytest-xdist'
+    )
+    def test_xdist(self):
+        result = self._pytest(
+            '-n', '2', '--debtcollector-report', 'report.json'
+        )
+        self.assertEqual(0, result.returncode, result.stdout)
+        (row,) = self._read_report()['deprecations']
+        self.assertEqual(3, row['hits'])
+        self.assertEqual(
+            {'test_old.py::test_once': 1, 'test_old.py::test_twice': 2},
+            row['tests'],
+        )
@@ -0,0 +1,145 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import sys
+import tempfile
+import threading
+
+from debtcollector import rates
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def black_hole():
+    return True
+
+
+BLACK_HOLE_ID = f'function:{__name__}.black_hole'
+SECOND = 1_000_000_000
+
+
+class WindowedRatesTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = 0
+        self.rates = rates.WindowedRates(
+            windows=(('10s', 10), ('1m', 60)), buckets=10, clock=self._clock
+        )
+        self.frame = sys._getframe()
+
+    def _clock(self):
+        return self.now
+
+    def _hit(self, times=1):
+        for _i in range(times):
+            self.rates.record('a', self.frame)
+
+    def test_windows(self):
+        self._hit(3)
+        self.now = 5 * SECOND
+        self._hit(2)
+        self.assertEqual({'a': {'10s': 5, '1m': 5}}, self.rates.snapshot())
+        self.now = 12 * SECOND
+        self._hit()
+        # The first three hits went out of the short window.
+        self.assertEqual({'a': {'10s': 3, '1m': 6}}, self.rates.snapshot())
+        # The hits of the first six seconds (one bucket) went out of the long
+        # window.
+        self.now = 65 * SECOND
+        self.assertEqual({'a': {'10s': 0, '1m': 1}}, self.rates.snapshot())
+        self.now = 1000 * SECOND
+        self.assertEqual({'a': {'10s': 0, '1m': 0}}, self.rates.snapshot())
+        # Slots of buckets that went out of the window are reused.
+        self._hit()
+        self.assertEqual({'a': {'10s': 1, '1m': 1}}, self.rates.snapshot())
+        self.rates.clear()
+        self.assertEqual({}, self.rates.snapshot())
+
+    def test_threads(self):
+        self._hit()
+        barrier = threading.Barrier(8)
+
+        def hit():
+            barrier.wait()
+            self._hit(1000)
+            # While the other threads may still be counting.
+            self.rates.snapshot()
+
+        threads = [threading.Thread(target=hit) for _i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            {'a': {'10s': 8001, '1m': 8001}}, self.rates.snapshot()
+        )
+        # The rings of the threads that are gone were folded into one.
+        self.assertEqual(1, len(self.rates._shards))
+        self.now = 12 * SECOND
+        self._hit()
+        self.assertEqual({'a': {'10s': 1, '1m': 8002}}, self.rates.snapshot())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, rates.WindowedRates, buckets=0)
+        self.assertRaises(
+            ValueError, rates.WindowedRates, windows=(('x', 0),), buckets=2
+        )
+
+
+class RatesTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(rates.disable)
+        self.ignore_warnings()
+
+    def test_rates(self):
+        self.assertEqual({}, rates.get_rates())
+        self.assertEqual('', rates.render_prometheus())
+        rates.enable()
+        for _i in range(6):
+            black_hole()
+        self.assertEqual(
+            {BLACK_HOLE_ID: {'1m': 0.1, '5m': 0.02, '1h': 6 / 3600}},
+            rates.get_rates(),
+        )
+        rates.disable()
+        black_hole()
+        self.assertEqual({}, rates.get_rates())
+
+    def test_prometheus(self):
+        rates.enable(windows=(('1m', 60),))
+        black_hole()
+        black_hole()
+        expected = (
+            '# HELP debtcollector_deprecation_hits Hits of deprecations in '
+            'a window.\n'
+            '# TYPE debtcollector_deprecation_hits gauge\n'
+            f'debtcollector_deprecation_hits{{id="{BLACK_HOLE_ID}",'
+            'window="1m"} 2\n'
+            '# HELP debtcollector_deprecation_hits_per_second Hits per '
+            'second of deprecations over a window.\n'
+            '# TYPE debtcollector_deprecation_hits_per_second gauge\n'
+            'debtcollector_deprecation_hits_per_second'
+            f'{{id="{BLACK_HOLE_ID}",window="1m"}} {2 / 60}\n'
+        )
+        self.assertEqual(expected, rates.render_prometheus())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'debtcollector.prom')
+            rates.write_prometheus(path)
+            with open(path, encoding='utf-8') as fh:
+                self.assertEqual(expected, fh.read())
+            self.assertEqual(['debtcollector.prom'], os.listdir(tmp_dir))
+
+    def test_escape(self):
+        self.assertEqual('a\\"b\\\\c\\n', rates._escape('a"b\\c\n'))
@@ -0,0 +1,130 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import warnings
+
+import debtcollector
+from debtcollector import _utils
+from debtcollector.fixtures import recording
+from debtcollector import policy
+from debtcollector import removals
+from debtcollector.tests import base as test_base
+
+
+@removals.remove(version='1.0')
+def purple_moon():
+    return True
+
+
+PURPLE_MOON_ID = f'function:{__name__}.purple_moon'
+
+
+class RecordingTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(policy.clear_policies)
+
+    def test_fixture(self):
+        filters = list(warnings.filters)
+        recorder = recording.RecordingFixture(quiet=False)
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter('always')
+            with recorder:
+                purple_moon()
+        self.assertEqual(1, len(capture))
+        self.assertEqual(filters, warnings.filters)
+        (event,) = recorder.assert_deprecated(
+            PURPLE_MOON_ID, message="in version '1.0'", count=1
+        )
+        self.assertEqual('function', event.kind)
+        self.assertEqual(f'{__name__}.purple_moon', event.name)
+        self.assertEqual(DeprecationWarning, event.category)
+        self.assertEqual(__name__, event.module)
+        self.assertEqual(
+            'test_fixture', str(event.function).rpartition('.')[2]
+        )
+        self.assertEqual(__file__, event.filename)
+        recorder.assert_deprecated(kind='function')
+        recorder.assert_not_deprecated(kind='property')
+        recorder.clear()
+        recorder.assert_not_deprecated()
+
+    def test_quiet(self):
+        # Hits are recorded whatever the policy (and the warnings module is
+        # not told about them), but errors still are.
+        policy.set_policy(PURPLE_MOON_ID, policy.ONCE)
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter('always')
+            with recording.recording() as recorder:
+                purple_moon()
+                purple_moon()
+                policy.set_policy(PURPLE_MOON_ID, policy.ERROR)
+                self.assertRaises(DeprecationWarning, purple_moon)
+        self.assertEqual([], capture)
+        recorder.assert_deprecated(PURPLE_MOON_ID, count=3)
+        purple_moon_hits = len(recorder.events)
+        self.assertRaises(DeprecationWarning, purple_moon)
+        self.assertEqual(purple_moon_hits, len(recorder.events))
+
+    def test_without_identifier(self):
+        with recording.recording() as recorder:
+            debtcollector.deprecate('Old', category=PendingDeprecationWarning)
+        (event,) = recorder.events
+        self.assertIsNone(event.deprecation_id)
+        self.assertIsNone(event.kind)
+        self.assertEqual('Old', event.message)
+        self.assertEqual(PendingDeprecationWarning, event.category)
+        self.assertEqual(
+            'test_without_identifier', str(event.function).rpartition('.')[2]
+        )
+
+    def test_threads(self):
+        with recording.recording() as recorder:
+            threads = [
+                threading.Thread(
+                    target=lambda: [purple_moon() for _i in range(100)]
+                )
+                for _i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        recorder.assert_deprecated(PURPLE_MOON_ID, count=400)
+
+    def test_assertions(self):
+        fixture = recording.RecordingFixture()
+        self.assertEqual([], fixture.events)
+        with fixture:
+            purple_moon()
+        with self.assertRaises(AssertionError):
+            fixture.assert_deprecated('function:other')
+        with self.assertRaises(AssertionError):
+            fixture.assert_deprecated(PURPLE_MOON_ID, count=2)
+        with self.assertRaises(AssertionError):
+            fixture.assert_deprecated(PURPLE_MOON_ID, message='nope')
+        with self.assertRaises(AssertionError):
+            fixture.assert_not_deprecated(PURPLE_MOON_ID)
+        fixture.assert_deprecated(PURPLE_MOON_ID)
+
+    def test_default_stacklevel(self):
+        # Without a stacklevel the hit is attributed to the same frame the
+        # warnings module attributes it to.
+        with warnings.catch_warnings(record=True) as capture:
+            warnings.simplefilter('always')
+            with recording.recording(quiet=False) as recorder:
+                _utils.deprecation('Old', deprecation_id='function:old')
+        (warning,) = capture
+        (event,) = recorder.events
+        self.assertEqual(warning.filename, event.filename)
+        self.assertEqual('deprecation', event.function)
@@ -0,0 +1,229 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from debtcollector import _utils
+from debtcollector import report
+from debtcollector.tests import base as test_base
+
+
+def _event(deprecation_id, when, module='user.mod', line=1, **kwargs):
+    event = {
+        'time': when,
+        'pid': 1,
+        'id': deprecation_id,
+        'kind': 'function',
+        'name': deprecation_id.partition(':')[2],
+        'version': '1.0',
+        'removal_version': '2.0',
+        'module': module,
+        'function': 'func',
+        'file': 'mod.py',
+        'line': line,
+    }
+    event.update(kwargs)
+    return json.dumps(event) + '\n'
+
+
+class ReportTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.first = os.path.join(tmp_dir.name, 'events.jsonl')
+        with open(self.first, 'w', encoding='utf-8') as fh:
+            fh.write(_event('function:pkg.old', 10))
+            fh.write(_event('function:pkg.old', 12, line=2))
+            fh.write(_event('function:pkg.older', 11))
+            fh.write('not json\n')
+            fh.write('\n')
+        self.second = os.path.join(tmp_dir.name, 'events.jsonl.1.gz')
+        with gzip.open(self.second, 'wt', encoding='utf-8') as fh:
+            fh.write(_event('function:pkg.old', 5, module='other.mod'))
+        # Nothing is installed for the made up 'pkg' package.
+        patcher = mock.patch.object(
+            _utils, 'get_installed_version', return_value=None
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        report._is_overdue.cache_clear()
+        self.addCleanup(report._is_overdue.cache_clear)
+
+    def _main(self, *args):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(0, report.main(list(args)))
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_aggregate(self):
+        result = report.aggregate([self.first, self.second])
+        self.assertEqual(1, result.bad_lines)
+        rows = result.rows()
+        self.assertEqual(
+            [
+                {
+                    'id': 'function:pkg.old',
+                    'count': 3,
+                    'first': 5,
+                    'last': 12,
+                    'version': '1.0',
+                    'removal_version': '2.0',
+                    'overdue': None,
+                },
+                {
+                    'id': 'function:pkg.older',
+                    'count': 1,
+                    'first': 11,
+                    'last': 11,
+                    'version': '1.0',
+                    'removal_version': '2.0',
+                    'overdue': None,
+                },
+            ],
+            rows,
+        )
+
+    def test_aggregate_by(self):
+        result = report.aggregate(
+            [self.first, self.second], by=report.BY_PACKAGE
+        )
+        self.assertEqual(
+            [
+                ('function:pkg.old', 'user', 2),
+                ('function:pkg.old', 'other', 1),
+                ('function:pkg.older', 'user', 1),
+            ],
+            [(r['id'], r['package'], r['count']) for r in result.rows()],
+        )
+        result = report.aggregate([self.first], by=report.BY_CALLER)
+        self.assertEqual(
+            [
+                ('function:pkg.old', 'user.mod', 'func', 1),
+                ('function:pkg.old', 'user.mod', 'func', 2),
+                ('function:pkg.older', 'user.mod', 'func', 1),
+            ],
+            sorted(
+                (r['id'], r['module'], r['function'], r['line'])
+                for r in result.rows()
+            ),
+        )
+        self.assertRaises(ValueError, report.Aggregate, by='nope')
+
+    def test_aggregate_by_version(self):
+        result = report.aggregate(
+            [self.first, self.second], by=report.BY_VERSION
+        )
+        self.assertEqual(
+            [
+                {
+                    'version': '1.0',
+                    'count': 4,
+                    'deprecations': 2,
+                    'first': 5,
+                    'last': 12,
+                }
+            ],
+            result.rows(),
+        )
+
+    def test_aggregate_bucket(self):
+        result = report.aggregate([self.first, self.second], bucket=10)
+        self.assertEqual(
+            [
+                (0, 'function:pkg.old', 1),
+                (10, 'function:pkg.old', 2),
+                (10, 'function:pkg.older', 1),
+            ],
+            [(r['time'], r['id'], r['count']) for r in result.rows()],
+        )
+        result = report.aggregate(
+            [self.first, self.second], by=report.BY_VERSION, bucket=10
+        )
+        self.assertEqual(
+            [(0, 1, 1), (10, 3, 2)],
+            [
+                (r['time'], r['count'], r['deprecations'])
+                for r in result.rows()
+            ],
+        )
+        self.assertRaises(ValueError, report.Aggregate, bucket=0)
+
+    def test_bad_lines(self):
+        result = report.Aggregate(by=report.BY_CALLER)
+        result.add_lines(
+            [
+                _event('function:pkg.old', 1).encode('utf-8'),
+                b'{"id": "function:pkg.\xff\xfe"}\n',
+                b'\xff\xfe{}\n',
+                json.dumps({'id': ['function:pkg.old']}),
+                json.dumps({'id': 'function:pkg.old', 'module': ['user']}),
+                json.dumps({'id': 'function:pkg.old', 'time': 'noon'}),
+                json.dumps(['function:pkg.old']),
+                '3',
+                b'\n',
+            ]
+        )
+        self.assertEqual(7, result.bad_lines)
+        self.assertEqual(1, sum(row['count'] for row in result.rows()))
+
+    def test_aggregate_jobs(self):
+        serial = report.aggregate([self.first, self.second])
+        parallel = report.aggregate([self.first, self.second], jobs=2)
+        self.assertEqual(serial.rows(), parallel.rows())
+        self.assertEqual(serial.bad_lines, parallel.bad_lines)
+
+    def test_overdue(self):
+        with mock.patch.object(
+            _utils, 'get_installed_version', return_value='2.1'
+        ):
+            rows = report.aggregate([self.second]).rows()
+        self.assertTrue(rows[0]['overdue'])
+
+    def test_main_formats(self):
+        out, err = self._main(self.first, self.second, '--format', 'json')
+        rows = json.loads(out)
+        self.assertEqual(
+            ['function:pkg.old', 'function:pkg.older'],
+            [row['id'] for row in rows],
+        )
+        self.assertIn('skipped 1 malformed line', err)
+
+        out, _err = self._main(
+            self.first, '--format', 'csv', '--min-count', '2'
+        )
+        rows = list(csv.DictReader(io.StringIO(out)))
+        self.assertEqual(1, len(rows))
+        self.assertEqual('2', rows[0]['count'])
+        self.assertEqual('2.0', rows[0]['removal_version'])
+
+        out, _err = self._main(
+            self.first, '--bucket', '3600', '--format', 'json'
+        )
+        self.assertEqual([0, 0], [row['time'] for row in json.loads(out)])
+
+        out, _err = self._main(self.first, '--limit', '1', '--by', 'caller')
+        lines = out.splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertEqual(
+            ['id', 'module', 'function', 'line', 'count'],
+            lines[0].split()[:5],
+        )
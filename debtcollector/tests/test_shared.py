@@ -0,0 +1,287 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import warnings
+
+from debtcollector import removals
+from debtcollector import shared
+from debtcollector.tests import base as test_base
+
+
+@removals.remove()
+def red_moon():
+    return True
+
+
+@removals.remove()
+def blue_moon():
+    return True
+
+
+RED_MOON_ID = f'function:{__name__}.red_moon'
+BLUE_MOON_ID = f'function:{__name__}.blue_moon'
+
+
+class SharedCountsTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'counts')
+        self.addCleanup(shared.disable)
+        self.ignore_warnings()
+
+    def test_counts(self):
+        self.assertEqual({}, shared.get_counts())
+        shared_counts = shared.enable(self.path, slots=8)
+        red_moon()
+        red_moon()
+        blue_moon()
+        self.assertEqual(
+            {RED_MOON_ID: 2, BLUE_MOON_ID: 1}, shared.get_counts()
+        )
+        # Another process (or a reader) opening the file sees the same.
+        other = shared.SharedCounts(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(8, other.slots)
+        other.record(RED_MOON_ID, sys._getframe())
+        self.assertEqual(
+            ({RED_MOON_ID: 3, BLUE_MOON_ID: 1}, 0), shared.read(self.path)
+        )
+        shared_counts.reset()
+        self.assertEqual(
+            ({RED_MOON_ID: 0, BLUE_MOON_ID: 0}, 0), shared.read(self.path)
+        )
+        shared.disable()
+        red_moon()
+        self.assertEqual({}, shared.get_counts())
+        self.assertEqual(0, shared.read(self.path)[0][RED_MOON_ID])
+
+    def test_full(self):
+        shared_counts = shared.enable(self.path, slots=1)
+        red_moon()
+        with self.assertLogs(shared.LOG, 'WARNING'):
+            blue_moon()
+        blue_moon()
+        self.assertEqual({RED_MOON_ID: 1}, shared_counts.snapshot())
+        self.assertEqual(2, shared_counts.dropped)
+        self.assertEqual(({RED_MOON_ID: 1}, 2), shared.read(self.path))
+
+    def test_long_ids(self):
+        shared_counts = shared.SharedCounts(self.path, slots=8)
+        self.addCleanup(shared_counts.close)
+        # Only differing past what a slot holds of them.
+        prefix = 'function:' + 'a' * shared._ID_SIZE
+        frame = sys._getframe()
+        shared_counts.record(prefix + '.old', frame)
+        shared_counts.record(prefix + '.older', frame)
+        shared_counts.record(prefix + '.older', frame)
+        counts = shared_counts.snapshot()
+        self.assertEqual([1, 2], sorted(counts.values()))
+        for deprecation_id in counts:
+            self.assertTrue(
+                deprecation_id.startswith(prefix[: shared._ID_SIZE] + '...#')
+            )
+
+    def test_threads(self):
+        # Each thread has its own view of the file (like processes have),
+        # and claims slots for the same deprecations at the same time.
+        views = [shared.SharedCounts(self.path, slots=256) for _i in range(8)]
+        for view in views:
+            self.addCleanup(view.close)
+        ids = [f'function:thing_{i}' for i in range(50)]
+        barrier = threading.Barrier(len(views))
+        frame = sys._getframe()
+
+        def claim(view):
+            barrier.wait()
+            for deprecation_id in ids:
+                view.record(deprecation_id, frame)
+
+        threads = [
+            threading.Thread(target=claim, args=(view,)) for view in views
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        words = views[0]._words
+        claimed = sum(
+            1
+            for slot in range(256)
+            if words[(shared._HEADER_SIZE + slot * shared._SLOT_SIZE) // 8]
+        )
+        # One (complete) slot per deprecation.
+        self.assertEqual(len(ids), claimed)
+        self.assertEqual(set(ids), set(views[0].snapshot()))
+
+    def test_invalid(self):
+        with open(self.path, 'wb') as fh:
+            fh.write(b'not a shared counts file')
+        self.assertRaises(ValueError, shared.SharedCounts, self.path)
+        self.assertRaises(ValueError, shared.read, self.path)
+        self.assertRaises(ValueError, shared.SharedCounts, self.path, 0)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_fork(self):
+        shared.enable(self.path)
+        red_moon()
+        pids = []
+        for _i in range(4):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    for _j in range(10):
+                        red_moon()
+                    blue_moon()
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        counts = shared.get_counts()
+        # Children claiming the same slot concurrently must all find it.
+        self.assertEqual(4, counts[BLUE_MOON_ID])
+        self.assertLessEqual(counts[RED_MOON_ID], 41)
+        self.assertGreater(counts[RED_MOON_ID], 1)
+
+    def test_main(self):
+        shared.enable(self.path)
+        red_moon()
+        red_moon()
+        blue_moon()
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(
+                0, shared.main([self.path, '--format', 'json', '--reset'])
+            )
+        self.assertEqual(
+            {'counts': {RED_MOON_ID: 2, BLUE_MOON_ID: 1}, 'dropped': 0},
+            json.loads(stdout.getvalue()),
+        )
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(0, shared.main([self.path]))
+        self.assertEqual(
+            [['0', BLUE_MOON_ID], ['0', RED_MOON_ID]],
+            [line.split() for line in stdout.getvalue().splitlines()],
+        )
+
+
+class SharedOnceTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'once')
+        self.addCleanup(shared.disable_once)
+        catcher = warnings.catch_warnings(record=True)
+        self.captured = catcher.__enter__()
+        self.addCleanup(catcher.__exit__, None, None, None)
+        warnings.simplefilter('always')
+
+    def test_once(self):
+        shared_once = shared.enable_once(self.path, bits=64)
+        red_moon()
+        red_moon()
+        blue_moon()
+        self.assertEqual(2, len(self.captured))
+        self.assertEqual(2, shared_once.count())
+        # Other processes (opening the same file) see the bits set.
+        other = shared.SharedOnce(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(64, other.bits)
+        self.assertFalse(other.first(RED_MOON_ID))
+        self.assertTrue(other.first('function:some.other.thing'))
+        self.assertEqual(3, shared_once.count())
+        other.reset()
+        self.assertEqual(0, shared_once.count())
+        red_moon()
+        self.assertEqual(3, len(self.captured))
+        shared.disable_once()
+        red_moon()
+        self.assertEqual(4, len(self.captured))
+
+    def test_threads(self):
+        views = [shared.SharedOnce(self.path, bits=64) for _i in range(8)]
+        for view in views:
+            self.addCleanup(view.close)
+        barrier = threading.Barrier(len(views))
+        firsts = []
+
+        def claim(view):
+            barrier.wait()
+            firsts.append(view.first(RED_MOON_ID))
+
+        threads = [
+            threading.Thread(target=claim, args=(view,)) for view in views
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Only one of the threads (of this process) was first.
+        self.assertEqual(1, firsts.count(True))
+
+    def test_invalid(self):
+        shared.SharedCounts(self.path).close()
+        self.assertRaises(ValueError, shared.SharedOnce, self.path)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_fork(self):
+        shared_once = shared.enable_once(self.path)
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        pids = []
+        for _i in range(8):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    os.close(read_fd)
+                    warnings.simplefilter('always')
+                    with warnings.catch_warnings(record=True) as captured:
+                        for _j in range(5):
+                            red_moon()
+                    os.write(write_fd, str(len(captured)).encode())
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        os.close(write_fd)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        with os.fdopen(os.dup(read_fd), 'rb') as fh:
+            emitted = sum(int(digit) for digit in fh.read().decode())
+        # Only the first of all the children warned.
+        self.assertEqual(1, emitted)
+        self.assertFalse(shared_once.first(RED_MOON_ID))
+
+    def test_main_reset(self):
+        shared.enable_once(self.path, bits=128)
+        red_moon()
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(0, shared.main([self.path, '--reset']))
+        self.assertEqual('1 of 128 bits set\n', stdout.getvalue())
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(0, shared.main([self.path, '--format', 'json']))
+        self.assertEqual(
+            {'set': 0, 'bits': 128}, json.loads(stdout.getvalue())
+        )
@@ -0,0 +1,83 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sys
+from unittest import mock
+
+from debtcollector import policy
+from debtcollector import removals
+from debtcollector import tracing
+from debtcollector.tests import base as test_base
+
+
+@removals.remove(version='1.0', removal_version='2.0')
+def white_dwarf():
+    return True
+
+
+WHITE_DWARF_ID = f'function:{__name__}.white_dwarf'
+
+
+class TracingTest(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(tracing.disable)
+        self.addCleanup(policy.clear_policies)
+        self.ignore_warnings()
+
+    def test_events(self):
+        span = tracing.InMemorySpan()
+        self.assertFalse(tracing.is_enabled())
+        white_dwarf()
+        tracing.enable(lambda: span)
+        self.assertTrue(tracing.is_enabled())
+        # Ignored hits are still hits (and so are traced).
+        policy.set_policy(WHITE_DWARF_ID, policy.IGNORE)
+        white_dwarf()
+        line = sys._getframe().f_lineno - 1
+        self.assertEqual(1, len(span.events))
+        name, attributes = span.events[0]
+        self.assertEqual(tracing.EVENT_NAME, name)
+        self.assertEqual(
+            {
+                'debtcollector.deprecation.id': WHITE_DWARF_ID,
+                'debtcollector.deprecation.message': (
+                    "Using function/method 'white_dwarf()' is deprecated in "
+                    "version '1.0' and will be removed in version '2.0'"
+                ),
+                'debtcollector.deprecation.version': '1.0',
+                'debtcollector.deprecation.removal_version': '2.0',
+                'code.function': 'test_events',
+                'code.filepath': __file__,
+                'code.lineno': line,
+                'code.namespace': __name__,
+            },
+            attributes,
+        )
+        tracing.disable()
+        white_dwarf()
+        self.assertEqual(1, len(span.events))
+
+    def test_not_recording(self):
+        span = mock.Mock()
+        span.is_recording.return_value = False
+        tracing.enable(lambda: span)
+        white_dwarf()
+        span.add_event.assert_not_called()
+        # No active span at all.
+        tracing.enable(lambda: None)
+        white_dwarf()
+
+    def test_opentelemetry_missing(self):
+        with mock.patch.dict(sys.modules, {'opentelemetry': None}):
+            self.assertRaises(RuntimeError, tracing.enable)
+        self.assertFalse(tracing.is_enabled())
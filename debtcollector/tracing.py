@@ -0,0 +1,140 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Reporting of deprecation hits as events of the active tracing span.
+
+When enabled, every hit of a deprecation (that has an identifier, see
+:mod:`debtcollector.policy`) adds a ``debtcollector.deprecation`` event to
+the span that is active when it is hit, with the identifier (and versions)
+of the deprecation, its message and the location of the caller as
+attributes (named like the OpenTelemetry semantic conventions name them).
+
+Spans are gotten from a callable returning the active span (if any); spans
+only need an ``is_recording()`` and an ``add_event(name, attributes)``
+method (like OpenTelemetry spans have), so any tracing library can be
+integrated. Nothing (not even the attributes) is made for spans that are
+not recording, and when not enabled hits only cost checking that.
+
+The :class:`.InMemorySpan` keeps the events added to it (instead of
+exporting them anywhere) so that tests can check them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import types
+from typing import Any
+
+from debtcollector import _utils
+
+#: Name of the span events added for deprecation hits.
+EVENT_NAME = 'debtcollector.deprecation'
+
+
+class InMemorySpan:
+    """Span that keeps the events added to it (for tests).
+
+    :param recording: whether the span is recording (events added to spans
+                      that are not are dropped)
+    """
+
+    def __init__(self, recording: bool = True):
+        self.recording = recording
+        #: The ``(name, attributes)`` of the events added.
+        self.events: list[tuple[str, dict[str, Any]]] = []
+
+    def is_recording(self) -> bool:
+        return self.recording
+
+    def add_event(
+        self, name: str, attributes: dict[str, Any] | None = None
+    ) -> None:
+        if self.recording:
+            self.events.append((name, dict(attributes or {})))
+
+
+class SpanEvents:
+    """Adds an event to the active span for every deprecation hit.
+
+    :param get_current_span: callable returning the active span (or none)
+    """
+
+    def __init__(self, get_current_span: Callable[[], Any]):
+        self.get_current_span = get_current_span
+
+    def __call__(
+        self,
+        deprecation_id: str,
+        frame: types.FrameType,
+        message: str | Warning,
+    ) -> None:
+        span = self.get_current_span()
+        if span is None or not span.is_recording():
+            return
+        code = frame.f_code
+        attributes: dict[str, Any] = {
+            'debtcollector.deprecation.id': deprecation_id,
+            'debtcollector.deprecation.message': str(message),
+            'code.function': code.co_name,
+            'code.filepath': code.co_filename,
+            'code.lineno': frame.f_lineno,
+        }
+        module = frame.f_globals.get('__name__')
+        if module:
+            attributes['code.namespace'] = module
+        deprecation = _utils._deprecations.get(deprecation_id)
+        if deprecation is not None:
+            if deprecation.version:
+                attributes['debtcollector.deprecation.version'] = (
+                    deprecation.version
+                )
+            if deprecation.removal_version:
+                attributes['debtcollector.deprecation.removal_version'] = (
+                    deprecation.removal_version
+                )
+        span.add_event(EVENT_NAME, attributes)
+
+
+def _get_opentelemetry_span() -> Callable[[], Any]:
+    try:
+        from opentelemetry import trace  # type: ignore[import-not-found]
+    except ImportError:
+        raise RuntimeError(
+            "Unable to enable tracing (no span getter was provided and the "
+            "opentelemetry library is not installed)"
+        ) from None
+    get_current_span: Callable[[], Any] = trace.get_current_span
+    return get_current_span
+
+
+def enable(get_current_span: Callable[[], Any] | None = None) -> SpanEvents:
+    """Starts adding events to the active span for deprecation hits.
+
+    :param get_current_span: callable returning the active span (or none);
+                             the OpenTelemetry one is used when none is
+                             provided (which then must be installed)
+    """
+    if get_current_span is None:
+        get_current_span = _get_opentelemetry_span()
+    span_events = SpanEvents(get_current_span)
+    _utils._tracing = span_events
+    return span_events
+
+
+def disable() -> None:
+    """Stops adding events to spans for deprecation hits."""
+    _utils._tracing = None
+
+
+def is_enabled() -> bool:
+    """Tells if events are added to spans for deprecation hits."""
+    return _utils._tracing is not None
@@ -44,13 +44,24 @@ def updated_kwarg_default_value(
 
     prefix = _KWARG_UPDATED_PREFIX_TPL % (name, new_value)
     postfix = _KWARG_UPDATED_POSTFIX_TPL % old_value
-    out_message = _utils.generate_message(
-        prefix, postfix=postfix, message=message, version=version
-    )
 
     def decorator(f: Callable[..., Any]) -> Callable[..., Any]:
         sig = signature(f)
         varnames = list(sig.parameters.keys())
+        deprecation_id = _utils.register_deprecation(
+            'kwarg-default',
+            f'{_utils.get_full_name(f)}({name})',
+            version=version,
+        )
+        out_message = _utils.make_message(
+            prefix,
+            postfix=postfix,
+            message=message,
+            version=version,
+            category=category,
+            deprecation_id=deprecation_id,
+            replacement=repr(new_value),
+        )
 
         @wrapt.decorator
         def wrapper(
@@ -64,7 +75,10 @@ def updated_kwarg_default_value(
             default_params = set(allparams - explicit_params)
             if name in default_params:
                 _utils.deprecation(
-                    out_message, stacklevel=stacklevel, category=category
+                    out_message,
+                    stacklevel=stacklevel,
+                    category=category,
+                    deprecation_id=deprecation_id,
                 )
             return wrapped(*args, **kwargs)
 
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Micro-benchmarks for the overhead debtcollector adds to the call path.
+
+Run with ``python tools/benchmark.py [name ...]``; with no names given all
+benchmarks are run. Warnings are ignored (as they typically are in
+production) so that the numbers show the cost of debtcollector itself and
+not the cost of printing warnings.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import traceback
+import warnings
+
+from debtcollector import _utils
+from debtcollector import attribution
+from debtcollector import middleware
+from debtcollector import policy
+from debtcollector import rates
+from debtcollector import removals
+from debtcollector import shared
+from debtcollector import tracing
+
+
+def _report(name, timings, number):
+    best = min(timings)
+    print(f"  {name:<32} {best / number * 1e9:10.1f} ns/op")
+
+
+def _run(name, stmt, number, repeat, namespace):
+    timings = timeit.repeat(
+        stmt, globals=namespace, number=number, repeat=repeat
+    )
+    _report(name, timings, number)
+
+
+def bench_property(number, repeat):
+    """Property read overhead (``removed_property`` vs ``property``)."""
+
+    class Thing:
+        @property
+        def plain(self):
+            return 1
+
+        @removals.removed_property
+        def removed(self):
+            return 1
+
+    namespace = {'thing': Thing()}
+    _run('property', 'thing.plain', number, repeat, namespace)
+    _run('removed_property', 'thing.removed', number, repeat, namespace)
+
+
+def bench_attribution(number, repeat):
+    """Hit overhead of attribution (steady and churning) and stack sampling."""
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    namespace = {'old_thing': old_thing, 'traceback': traceback}
+    _run('remove', 'old_thing()', number, repeat, namespace)
+    attribution.enable()
+    try:
+        _run('remove+callers', 'old_thing()', number, repeat, namespace)
+    finally:
+        attribution.disable()
+    # Four times more (rarely hit) locations than tracked ones, so that
+    # nearly every hit evicts one.
+    counts = _utils.CallerCounts(attribution.DEFAULT_CAPACITY)
+    ids = itertools.cycle(
+        [f'function:churn{i}' for i in range(4 * counts.capacity)]
+    )
+    _run(
+        'callers (churn)',
+        'record(next(ids), frame)',
+        number,
+        repeat,
+        {'record': counts.record, 'ids': ids, 'frame': sys._getframe()},
+    )
+    attribution.enable_stacks()
+    try:
+        _run('remove+stacks', 'old_thing()', number, repeat, namespace)
+    finally:
+        attribution.disable_stacks()
+    _run(
+        'remove+extract_stack',
+        'old_thing(); traceback.extract_stack(limit=8)',
+        number,
+        repeat,
+        namespace,
+    )
+
+
+# Audit hooks can not be removed, so the benchmark toggles this instead.
+_audit_hook_active = False
+
+
+def _audit_hook(event, args):
+    if _audit_hook_active and event == _utils.AUDIT_EVENT:
+        pass
+
+
+def bench_audit(number, repeat):
+    """Hit overhead of the deprecation audit event (off, on, with a hook)."""
+    global _audit_hook_active
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    namespace = {'old_thing': old_thing}
+    deprecation_id = _utils.get_deprecation_id(
+        'function', _utils.get_full_name(old_thing)
+    )
+    # Ignore it by policy so that the warnings module is not part of it.
+    policy.set_policy(deprecation_id, policy.IGNORE)
+    try:
+        _run('remove (ignored)', 'old_thing()', number, repeat, namespace)
+        attribution.enable_audit()
+        try:
+            _run(
+                'remove (ignored, audit)',
+                'old_thing()',
+                number,
+                repeat,
+                namespace,
+            )
+            sys.addaudithook(_audit_hook)
+            _audit_hook_active = True
+            try:
+                _run(
+                    'remove (ignored, audit hook)',
+                    'old_thing()',
+                    number,
+                    repeat,
+                    namespace,
+                )
+            finally:
+                _audit_hook_active = False
+        finally:
+            attribution.disable_audit()
+    finally:
+        policy.remove_policy(deprecation_id)
+
+
+def bench_middleware(number, repeat):
+    """Request overhead of the WSGI middleware (no deprecation hit)."""
+
+    def app(environ, start_response):
+        start_response('200 OK', [])
+        return [b'ok']
+
+    def call(application):
+        result = application({'PATH_INFO': '/'}, lambda *args: None)
+        for _chunk in result:
+            pass
+        close = getattr(result, 'close', None)
+        if close is not None:
+            close()
+
+    namespace = {
+        'call': call,
+        'app': app,
+        'wrapped': middleware.WSGIMiddleware(app),
+    }
+    _run('wsgi', 'call(app)', number, repeat, namespace)
+    _run('wsgi (middleware)', 'call(wrapped)', number, repeat, namespace)
+
+
+def bench_monitoring(number, repeat):
+    """Call overhead of ``remove`` wrapping vs ``sys.monitoring`` (3.12+)."""
+
+    def plain():
+        pass
+
+    @removals.remove
+    def wrapped():
+        pass
+
+    @removals.remove(monitoring=True)
+    def monitored():
+        pass
+
+    # The first call of a monitored function warns (then stops monitoring).
+    monitored()
+    namespace = {'plain': plain, 'wrapped': wrapped, 'monitored': monitored}
+    _run('plain', 'plain()', number, repeat, namespace)
+    _run('remove', 'wrapped()', number, repeat, namespace)
+    _run('remove(monitoring=True)', 'monitored()', number, repeat, namespace)
+
+
+def bench_once(number, repeat):
+    """Hit overhead of once per host warnings (bit already set)."""
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    deprecation_id = _utils.get_deprecation_id(
+        'function', _utils.get_full_name(old_thing)
+    )
+    namespace = {'old_thing': old_thing, 'deprecation_id': deprecation_id}
+    _run('remove', 'old_thing()', number, repeat, namespace)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shared_once = shared.enable_once(os.path.join(tmp_dir, 'once'))
+        try:
+            old_thing()
+            namespace['first'] = shared_once.first
+            _run(
+                'first (bit set)',
+                'first(deprecation_id)',
+                number,
+                repeat,
+                namespace,
+            )
+            _run(
+                'remove (once per host)',
+                'old_thing()',
+                number,
+                repeat,
+                namespace,
+            )
+        finally:
+            shared.disable_once()
+
+
+def _run_threads(name, func, number, repeat, threads):
+    # Every thread calls the function number / threads times (at once).
+    per_thread = number // threads
+    timings = []
+    for _i in range(repeat):
+        barrier = threading.Barrier(threads + 1)
+
+        def worker():
+            barrier.wait()
+            for _j in range(per_thread):
+                func()
+
+        workers = [threading.Thread(target=worker) for _j in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        timings.append(time.perf_counter() - started)
+    _report(f'{name} ({threads} threads)', timings, per_thread * threads)
+
+
+def bench_threads(number, repeat):
+    """Hit throughput of many threads (already warned about, attributed)."""
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    deprecation_id = _utils.get_deprecation_id(
+        'function', _utils.get_full_name(old_thing)
+    )
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"  (the GIL is {'enabled' if gil else 'disabled'})")
+    policy.set_policy(deprecation_id, policy.ONCE)
+    attribution.enable()
+    try:
+        old_thing()
+        for threads in (1, 2, 4, 8):
+            _run_threads('remove (once)', old_thing, number, repeat, threads)
+    finally:
+        attribution.disable()
+        policy.remove_policy(deprecation_id)
+
+
+def bench_tracing(number, repeat):
+    """Hit overhead of span events (no tracer, not recording, recording)."""
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    deprecation_id = _utils.get_deprecation_id(
+        'function', _utils.get_full_name(old_thing)
+    )
+    namespace = {'old_thing': old_thing}
+    # Ignore it by policy so that the warnings module is not part of it.
+    policy.set_policy(deprecation_id, policy.IGNORE)
+    try:
+        _run('remove (ignored)', 'old_thing()', number, repeat, namespace)
+        for name, span in (
+            ('not recording', tracing.InMemorySpan(recording=False)),
+            ('recording', tracing.InMemorySpan()),
+        ):
+            tracing.enable(lambda span=span: span)
+            try:
+                _run(
+                    f'remove (ignored, {name})',
+                    'old_thing()',
+                    number,
+                    repeat,
+                    namespace,
+                )
+            finally:
+                tracing.disable()
+    finally:
+        policy.remove_policy(deprecation_id)
+
+
+def bench_rates(number, repeat):
+    """Hit overhead of tracking the rates of deprecation hits."""
+
+    @removals.remove
+    def old_thing():
+        pass
+
+    deprecation_id = _utils.get_deprecation_id(
+        'function', _utils.get_full_name(old_thing)
+    )
+    namespace = {'old_thing': old_thing}
+    # Ignore it by policy so that the warnings module is not part of it.
+    policy.set_policy(deprecation_id, policy.IGNORE)
+    try:
+        _run('remove (ignored)', 'old_thing()', number, repeat, namespace)
+        rates.enable()
+        try:
+            _run(
+                'remove (ignored, rates)',
+                'old_thing()',
+                number,
+                repeat,
+                namespace,
+            )
+            _run(
+                'get_rates',
+                'get_rates()',
+                number,
+                repeat,
+                {'get_rates': rates.get_rates},
+            )
+        finally:
+            rates.disable()
+    finally:
+        policy.remove_policy(deprecation_id)
+
+
+BENCHMARKS = {
+    'attribution': bench_attribution,
+    'audit': bench_audit,
+    'middleware': bench_middleware,
+    'monitoring': bench_monitoring,
+    'once': bench_once,
+    'property': bench_property,
+    'rates': bench_rates,
+    'threads': bench_threads,
+    'tracing': bench_tracing,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'names', nargs='*', help='benchmarks to run (defaults to all)'
+    )
+    parser.add_argument('--number', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}'")
+    warnings.simplefilter('ignore')
+    for name in args.names or sorted(BENCHMARKS):
+        bench = BENCHMARKS[name]
+        print(f"{name}: {bench.__doc__}")
+        bench(args.number, args.repeat)
+
+
+if __name__ == '__main__':
+    main()